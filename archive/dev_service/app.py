@@ -6,6 +6,9 @@ from pydantic import BaseModel
 from dotenv import load_dotenv
 from concurrent.futures import ThreadPoolExecutor
 from fastapi import Request
+from fastapi.responses import StreamingResponse
+from typing import List
+import asyncio
 import json
 import uuid
 import requests
@@ -17,6 +20,11 @@ AGENT_PRIVATE_KEY = os.getenv("AGENT_PRIVATE_KEY")
 GATEWAY_URL = os.getenv("GATEWAY_URL", "http://localhost:3000")
 # Optional API key to protect the dev service endpoints
 DEV_SERVICE_API_KEY = os.getenv("DEV_SERVICE_API_KEY")
+# Job status push (SSE keepalive interval and long-poll cap, seconds)
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+LONG_POLL_MAX_SECONDS = float(os.getenv("LONG_POLL_MAX_SECONDS", "60"))
+# Upper bound on updates accepted by /jobs/batch_update
+MAX_JOB_BATCH = int(os.getenv("MAX_JOB_BATCH", "1000"))
 
 if not AGENT_PRIVATE_KEY:
     raise RuntimeError("AGENT_PRIVATE_KEY must be set in environment")
@@ -81,6 +89,11 @@ def init_db():
         )
         """
     )
+    # Lookups by user / status (and the paginated /jobs listing) use these
+    cur.execute("CREATE INDEX IF NOT EXISTS jobs_user_status ON jobs (user_id, status, created_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+    # WAL lets status reads proceed while a batch of updates is being written
+    cur.execute("PRAGMA journal_mode=WAL")
     conn.commit()
     conn.close()
 
@@ -98,15 +111,115 @@ def upsert_subscription(user_id: str, chat_id: str):
     conn.close()
 
 
+# Upsert that keeps created_at and a previously stored user_id when an update omits it
+UPSERT_JOB_SQL = (
+    "INSERT INTO jobs (job_id, user_id, status, result, error) VALUES (?, ?, ?, ?, ?)"
+    " ON CONFLICT(job_id) DO UPDATE SET user_id=COALESCE(excluded.user_id, jobs.user_id),"
+    " status=excluded.status, result=excluded.result, error=excluded.error,"
+    " updated_at=strftime('%s','now')"
+)
+
+
+def persist_job_records(records):
+    """Apply many job status changes in a single transaction.
+
+    `records` is an iterable of `(job_id, user_id, status, result, error)` tuples.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    cur.executemany(
+        UPSERT_JOB_SQL,
+        [
+            (job_id, user_id, status, json.dumps(result) if result else None, error)
+            for job_id, user_id, status, result, error in records
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
 def persist_job_record(job_id: str, user_id: str, status: str, result: Optional[dict] = None, error: Optional[str] = None):
+    persist_job_records([(job_id, user_id, status, result, error)])
+
+
+# Terminal job states: subscribers stop waiting once a job reaches one of these
+TERMINAL_JOB_STATUSES = ("finished", "failed")
+
+
+class JobEvents:
+    """In-process pub/sub of job status changes, fed by `/jobs/{job_id}/update`.
+
+    Each subscriber gets an asyncio.Queue receiving the job dicts of the ids it
+    subscribed to, so one SSE connection can follow many jobs.
+    """
+
+    def __init__(self):
+        self._subs: dict = {}
+
+    def subscribe(self, job_ids) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue()
+        for job_id in job_ids:
+            self._subs.setdefault(job_id, set()).add(q)
+        return q
+
+    def unsubscribe(self, job_ids, q: asyncio.Queue):
+        for job_id in job_ids:
+            queues = self._subs.get(job_id)
+            if queues is None:
+                continue
+            queues.discard(q)
+            if not queues:
+                del self._subs[job_id]
+
+    def publish(self, job: dict):
+        for q in self._subs.get(job["job_id"], ()):
+            q.put_nowait(job)
+
+
+job_events = JobEvents()
+
+
+def _job_row_to_dict(row) -> dict:
+    return {
+        'job_id': row[0],
+        'user_id': row[1],
+        'status': row[2],
+        'result': json.loads(row[3]) if row[3] else None,
+        'error': row[4],
+        'created_at': row[5],
+        'updated_at': row[6],
+    }
+
+
+def load_jobs(job_ids) -> dict:
+    """Fetch several job records in one query, keyed by job id."""
+    if not job_ids:
+        return {}
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
+    placeholders = ",".join("?" for _ in job_ids)
     cur.execute(
-        "INSERT OR REPLACE INTO jobs (job_id, user_id, status, result, error, created_at, updated_at) VALUES (?, ?, ?, ?, ?, COALESCE((SELECT created_at FROM jobs WHERE job_id = ?), strftime('%s','now')), strftime('%s','now'))",
-        (job_id, user_id, status, json.dumps(result) if result else None, error, job_id),
+        f'SELECT job_id, user_id, status, result, error, created_at, updated_at FROM jobs WHERE job_id IN ({placeholders})',
+        tuple(job_ids),
     )
-    conn.commit()
+    rows = cur.fetchall()
     conn.close()
+    return {row[0]: _job_row_to_dict(row) for row in rows}
+
+
+def require_api_key(x_api_key: Optional[str] = Header(None)):
+    if DEV_SERVICE_API_KEY:
+        if not x_api_key or x_api_key != DEV_SERVICE_API_KEY:
+            raise HTTPException(status_code=401, detail="Invalid API key")
+
+
+def get_chat_id(user_id: str) -> Optional[str]:
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    cur.execute("SELECT chat_id FROM subscriptions WHERE user_id = ?", (user_id,))
+    row = cur.fetchone()
+    conn.close()
+    return row[0] if row else None
 
 
 def _process_delivery_simple(user_id: str, chat_id: str, message: str):
@@ -158,41 +271,171 @@ async def job_update(job_id: str, payload: dict, _=Depends(require_api_key)):
 
     # Update DB
     persist_job_record(job_id, payload.get('user_id', None), status, result, error)
+    # Push to SSE / long-poll subscribers
+    job_events.publish({'job_id': job_id, 'status': status, 'result': result, 'error': error})
     return {"ok": True}
 
 
-@app.get('/jobs/{job_id}')
-async def get_job(job_id: str, _=Depends(require_api_key)):
+class JobUpdateIn(BaseModel):
+    job_id: str
+    status: str
+    user_id: Optional[str] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
+
+class JobBatchUpdateIn(BaseModel):
+    updates: List[JobUpdateIn]
+
+
+@app.post('/jobs/batch_update')
+async def job_batch_update(payload: JobBatchUpdateIn, _=Depends(require_api_key)):
+    """Apply many job status updates in one transaction (e.g. from a broadcast worker)."""
+    if len(payload.updates) > MAX_JOB_BATCH:
+        raise HTTPException(status_code=413, detail=f"at most {MAX_JOB_BATCH} updates per batch")
+    persist_job_records([(u.job_id, u.user_id, u.status, u.result, u.error) for u in payload.updates])
+    for u in payload.updates:
+        job_events.publish({'job_id': u.job_id, 'status': u.status, 'result': u.result, 'error': u.error})
+    return {"ok": True, "updated": len(payload.updates)}
+
+
+@app.get('/jobs')
+async def list_jobs(
+    user_id: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    _=Depends(require_api_key),
+):
+    """List jobs (newest first) filtered by user and/or status.
+
+    Pagination is keyset-based: pass the returned `next_cursor` to get the next page.
+    """
+    limit = max(1, min(limit, 500))
+    clauses, args = [], []
+    if user_id is not None:
+        clauses.append("user_id = ?")
+        args.append(user_id)
+    if status is not None:
+        clauses.append("status = ?")
+        args.append(status)
+    if cursor:
+        try:
+            created_at, job_id = cursor.split(":", 1)
+            created_at = int(created_at)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="invalid cursor")
+        clauses.append("(created_at < ? OR (created_at = ? AND job_id < ?))")
+        args.extend([created_at, created_at, job_id])
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
-    cur.execute('SELECT job_id, user_id, status, result, error, created_at, updated_at FROM jobs WHERE job_id = ?', (job_id,))
-    row = cur.fetchone()
+    cur.execute(
+        f"SELECT job_id, user_id, status, result, error, created_at, updated_at FROM jobs{where}"
+        " ORDER BY created_at DESC, job_id DESC LIMIT ?",
+        (*args, limit + 1),
+    )
+    rows = cur.fetchall()
     conn.close()
-    if not row:
-        raise HTTPException(status_code=404, detail='job not found')
-    return {
-        'job_id': row[0],
-        'user_id': row[1],
-        'status': row[2],
-        'result': json.loads(row[3]) if row[3] else None,
-        'error': row[4],
-        'created_at': row[5],
-        'updated_at': row[6],
-    }
 
+    jobs = [_job_row_to_dict(r) for r in rows[:limit]]
+    next_cursor = f"{jobs[-1]['created_at']}:{jobs[-1]['job_id']}" if len(rows) > limit else None
+    return {"jobs": jobs, "next_cursor": next_cursor}
 
-def require_api_key(x_api_key: Optional[str] = Header(None)):
-    if DEV_SERVICE_API_KEY:
-        if not x_api_key or x_api_key != DEV_SERVICE_API_KEY:
-            raise HTTPException(status_code=401, detail="Invalid API key")
 
-def get_chat_id(user_id: str) -> Optional[str]:
+class JobIdsIn(BaseModel):
+    job_ids: List[str]
+
+
+def _parse_ids(ids: Optional[str]) -> List[str]:
+    return [i for i in (ids or "").split(",") if i]
+
+
+async def _job_event_stream(request: Request, job_ids: List[str]):
+    # Subscribe before reading the DB so no update between the two is lost
+    q = job_events.subscribe(job_ids)
+    try:
+        pending = set(job_ids)
+        for job in load_jobs(job_ids).values():
+            yield f"event: job\ndata: {json.dumps(job)}\n\n"
+            if job['status'] in TERMINAL_JOB_STATUSES:
+                pending.discard(job['job_id'])
+        while pending:
+            try:
+                job = await asyncio.wait_for(q.get(), timeout=SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: job\ndata: {json.dumps(job)}\n\n"
+            if job['status'] in TERMINAL_JOB_STATUSES:
+                pending.discard(job['job_id'])
+        yield "event: done\ndata: {}\n\n"
+    finally:
+        job_events.unsubscribe(job_ids, q)
+
+
+@app.get('/jobs/events')
+async def job_events_get(request: Request, ids: str, _=Depends(require_api_key)):
+    """Server-sent events for the comma-separated job `ids`.
+
+    Emits the current state of every known job, then one `job` event per status
+    update, and a final `done` event once all jobs are finished or failed.
+    """
+    job_ids = _parse_ids(ids)
+    if not job_ids:
+        raise HTTPException(status_code=400, detail="ids required")
+    return StreamingResponse(_job_event_stream(request, job_ids), media_type="text/event-stream")
+
+
+@app.post('/jobs/events')
+async def job_events_post(request: Request, payload: JobIdsIn, _=Depends(require_api_key)):
+    """Same as `GET /jobs/events` with the job ids in the body (for large id sets)."""
+    if not payload.job_ids:
+        raise HTTPException(status_code=400, detail="job_ids required")
+    return StreamingResponse(_job_event_stream(request, payload.job_ids), media_type="text/event-stream")
+
+
+@app.get('/jobs/wait')
+async def job_wait(ids: str, timeout: float = 30.0, _=Depends(require_api_key)):
+    """Long-poll: return once every job in `ids` is finished/failed, or after `timeout` seconds."""
+    job_ids = _parse_ids(ids)
+    if not job_ids:
+        raise HTTPException(status_code=400, detail="ids required")
+    q = job_events.subscribe(job_ids)
+    try:
+        jobs = load_jobs(job_ids)
+        pending = {i for i in job_ids if jobs.get(i, {}).get('status') not in TERMINAL_JOB_STATUSES}
+        deadline = asyncio.get_running_loop().time() + min(max(timeout, 0.0), LONG_POLL_MAX_SECONDS)
+        while pending:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                job = await asyncio.wait_for(q.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            jobs[job['job_id']] = {**jobs.get(job['job_id'], {}), **job}
+            if job['status'] in TERMINAL_JOB_STATUSES:
+                pending.discard(job['job_id'])
+    finally:
+        job_events.unsubscribe(job_ids, q)
+    return {"done": not pending, "jobs": [jobs[i] for i in job_ids if i in jobs]}
+
+
+@app.get('/jobs/{job_id}')
+async def get_job(job_id: str, _=Depends(require_api_key)):
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
-    cur.execute("SELECT chat_id FROM subscriptions WHERE user_id = ?", (user_id,))
+    cur.execute('SELECT job_id, user_id, status, result, error, created_at, updated_at FROM jobs WHERE job_id = ?', (job_id,))
     row = cur.fetchone()
     conn.close()
-    return row[0] if row else None
+    if not row:
+        raise HTTPException(status_code=404, detail='job not found')
+    return _job_row_to_dict(row)
+
 
 @app.post("/subscribe")
 async def subscribe(payload: SubscribeIn, _=Depends(require_api_key)):
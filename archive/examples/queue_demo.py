@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
 """
-Example: subscribe a demo user, enqueue a notification job, and poll job status.
+Example: subscribe a demo user, enqueue a notification job, and wait for its status.
+
+Job status is pushed by the dev service over server-sent events (`/jobs/events`);
+the SDK helper `x402_notify.jobs.wait_for_job` follows the stream instead of
+polling `GET /jobs/{job_id}`.
 
 Prereqs:
 - Run `docker compose up --build` from the repo root (starts dev_service + redis + worker)
@@ -10,9 +14,10 @@ Usage:
     python examples/queue_demo.py
 """
 import os
-import time
 import requests
 
+from x402_notify.jobs import wait_for_job
+
 DEV_SERVICE = os.environ.get("DEV_SERVICE_URL", "http://localhost:8001")
 API_KEY = os.environ.get("DEV_SERVICE_API_KEY")
 
@@ -59,23 +64,15 @@ def main():
     job_id = enqueue(user_id, message)
     print("Enqueued job_id:", job_id)
 
-    print("Polling job status...")
-    timeout = 180
-    start = time.time()
-    while time.time() - start < timeout:
-        job = get_job(job_id)
-        if job is None:
-            print("Job not found yet")
-        else:
-            status = job.get("status")
-            print("status:", status)
-            if status in ("finished", "failed"):
-                print("job result:", job.get("result"))
-                print("error:", job.get("error"))
-                return
-        time.sleep(3)
-
-    print("Timed out waiting for job completion")
+    print("Waiting for job status...")
+    try:
+        job = wait_for_job(DEV_SERVICE, job_id, timeout=180, api_key=API_KEY)
+    except TimeoutError:
+        print("Timed out waiting for job completion")
+        return
+    print("status:", job.get("status"))
+    print("job result:", job.get("result"))
+    print("error:", job.get("error"))
 
 
 if __name__ == "__main__":
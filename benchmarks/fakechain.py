@@ -0,0 +1,333 @@
+"""In-process fake JSON-RPC chain for offline benchmarks.
+
+Implements the subset of the Ethereum JSON-RPC API the SDK uses, over a local
+HTTP server, so `Web3.HTTPProvider` / `AsyncHTTPProvider` talk to it like to a
+real node:
+
+  - blocks are produced every `block_time` seconds by a background thread
+  - every request is delayed by `latency` seconds (simulated network RTT)
+  - nonces are enforced like a real mempool: a nonce below the account's
+    confirmed nonce is rejected, a second transaction with a pending nonce must
+    raise both fees by 10% to replace it
+  - transactions whose fee cap is below the current base fee stay pending
+    (set `base_fee` to simulate a fee spike)
+
+`calls` counts requests per RPC method.
+"""
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+from eth_account import Account
+from eth_account.typed_transactions import TypedTransaction
+from eth_account._utils.legacy_transactions import Transaction as LegacyTransaction
+from hexbytes import HexBytes
+from web3 import Web3
+
+EMPTY_BLOOM = "0x" + "00" * 256
+ZERO_HASH = "0x" + "00" * 32
+
+
+class RPCError(Exception):
+    def __init__(self, message: str, code: int = -32000):
+        super().__init__(message)
+        self.code = code
+
+
+def _hex(value: int) -> str:
+    return hex(value)
+
+
+def _decode(raw: bytes) -> dict:
+    """Sender, nonce, recipient, value and fee fields of a signed raw transaction."""
+    raw = HexBytes(raw)
+    if raw[0] <= 0x7F:
+        fields = TypedTransaction.from_bytes(raw).as_dict()
+    else:
+        fields = LegacyTransaction.from_bytes(raw).as_dict()
+    to = fields.get("to")
+    max_fee = fields.get("maxFeePerGas", fields.get("gasPrice"))
+    return {
+        "hash": Web3.to_hex(Web3.keccak(raw)),
+        "from": Account.recover_transaction(raw),
+        "to": Web3.to_checksum_address(to) if to else None,
+        "value": fields["value"],
+        "nonce": fields["nonce"],
+        "gas": fields["gas"],
+        "max_fee": max_fee,
+        "priority_fee": fields.get("maxPriorityFeePerGas", max_fee),
+        "type": fields.get("type", 0),
+    }
+
+
+class FakeChain:
+    """A single-node chain with a mempool, driven by wall-clock block production.
+
+    Args:
+        block_time: Seconds between blocks
+        latency: Seconds added to every RPC request
+        chain_id: Chain ID reported by `eth_chainId`
+        base_fee: Base fee (wei) of produced blocks
+        balance: Starting balance (wei) of every account
+    """
+
+    def __init__(
+        self,
+        block_time: float = 0.5,
+        latency: float = 0.0,
+        chain_id: int = 84532,
+        base_fee: int = 10**6,
+        balance: int = 10**21,
+    ):
+        self.block_time = block_time
+        self.latency = latency
+        self.chain_id = chain_id
+        self.base_fee = base_fee
+        self.default_balance = balance
+
+        self.calls: Counter = Counter()
+        self._lock = threading.Lock()
+        # some history, so block-time estimates have timestamps to work from
+        self._genesis = time.time() - 10 * block_time
+        self._blocks = [self._make_block(n, [], self._timestamp(n)) for n in range(11)]
+        self._nonces: Dict[str, int] = {}
+        self._balances: Dict[str, int] = {}
+        self._pending: Dict[Tuple[str, int], dict] = {}
+        self._txs: Dict[str, dict] = {}
+        self._receipts: Dict[str, dict] = {}
+
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._miner: Optional[threading.Thread] = None
+
+    # -- chain state ----------------------------------------------------------
+
+    def _make_block(self, number: int, tx_hashes: list, timestamp: int) -> dict:
+        return {
+            "number": number,
+            "hash": Web3.to_hex(Web3.keccak(text=f"block-{number}-{timestamp}")),
+            "timestamp": timestamp,
+            "baseFeePerGas": self.base_fee,
+            "transactions": tx_hashes,
+        }
+
+    def _timestamp(self, number: int) -> int:
+        return int(self._genesis + number * self.block_time)
+
+    @property
+    def head(self) -> int:
+        return self._blocks[-1]["number"]
+
+    def balance_of(self, address: str) -> int:
+        return self._balances.get(address, self.default_balance)
+
+    def mine(self):
+        """Produce one block including every executable pending transaction."""
+        with self._lock:
+            number = self.head + 1
+            included = []
+            for sender in sorted({s for s, _ in self._pending}):
+                nonce = self._nonces.get(sender, 0)
+                while (sender, nonce) in self._pending:
+                    tx = self._pending[(sender, nonce)]
+                    if tx["max_fee"] < self.base_fee:
+                        break
+                    del self._pending[(sender, nonce)]
+                    included.append(tx)
+                    nonce += 1
+                self._nonces[sender] = nonce
+            block = self._make_block(number, [tx["hash"] for tx in included], self._timestamp(number))
+            for index, tx in enumerate(included):
+                gas_price = min(tx["max_fee"], self.base_fee + tx["priority_fee"])
+                self._balances[tx["from"]] = self.balance_of(tx["from"]) - tx["value"] - 21000 * gas_price
+                if tx["to"]:
+                    self._balances[tx["to"]] = self.balance_of(tx["to"]) + tx["value"]
+                tx["blockNumber"] = number
+                self._receipts[tx["hash"]] = {
+                    "transactionHash": tx["hash"],
+                    "transactionIndex": _hex(index),
+                    "blockHash": block["hash"],
+                    "blockNumber": _hex(number),
+                    "from": tx["from"],
+                    "to": tx["to"],
+                    "cumulativeGasUsed": _hex(21000 * (index + 1)),
+                    "gasUsed": _hex(21000),
+                    "effectiveGasPrice": _hex(gas_price),
+                    "contractAddress": None,
+                    "logs": [],
+                    "logsBloom": EMPTY_BLOOM,
+                    "status": "0x1",
+                    "type": _hex(tx["type"]),
+                }
+            self._blocks.append(block)
+
+    def send_raw(self, raw: bytes) -> str:
+        tx = _decode(raw)
+        with self._lock:
+            if tx["hash"] in self._txs:
+                raise RPCError("already known")
+            if tx["nonce"] < self._nonces.get(tx["from"], 0):
+                raise RPCError("nonce too low")
+            key = (tx["from"], tx["nonce"])
+            current = self._pending.get(key)
+            if current is not None:
+                if tx["max_fee"] < current["max_fee"] * 1.1 or tx["priority_fee"] < current["priority_fee"] * 1.1:
+                    raise RPCError("replacement transaction underpriced")
+                del self._txs[current["hash"]]
+            self._pending[key] = tx
+            self._txs[tx["hash"]] = tx
+        return tx["hash"]
+
+    def transaction(self, tx_hash: str) -> Optional[dict]:
+        """The transaction with `tx_hash` (pending or mined), as decoded fields."""
+        return self._txs.get(tx_hash)
+
+    def receipt(self, tx_hash: str) -> Optional[dict]:
+        return self._receipts.get(tx_hash)
+
+    # -- JSON-RPC ---------------------------------------------------------------
+
+    def _block_json(self, block: dict) -> dict:
+        return {
+            "number": _hex(block["number"]),
+            "hash": block["hash"],
+            "parentHash": ZERO_HASH,
+            "nonce": "0x0000000000000000",
+            "sha3Uncles": ZERO_HASH,
+            "logsBloom": EMPTY_BLOOM,
+            "transactionsRoot": ZERO_HASH,
+            "stateRoot": ZERO_HASH,
+            "receiptsRoot": ZERO_HASH,
+            "miner": "0x" + "00" * 20,
+            "difficulty": "0x0",
+            "totalDifficulty": "0x0",
+            "extraData": "0x",
+            "size": "0x0",
+            "gasLimit": _hex(30_000_000),
+            "gasUsed": _hex(21000 * len(block["transactions"])),
+            "timestamp": _hex(block["timestamp"]),
+            "baseFeePerGas": _hex(block["baseFeePerGas"]),
+            "mixHash": ZERO_HASH,
+            "transactions": block["transactions"],
+            "uncles": [],
+        }
+
+    def _resolve_block(self, ident) -> dict:
+        if ident in ("latest", "safe", "finalized"):
+            return self._blocks[-1]
+        if ident == "pending":
+            head = self._blocks[-1]
+            return dict(head, number=head["number"] + 1, transactions=[], baseFeePerGas=self.base_fee)
+        if ident == "earliest":
+            return self._blocks[0]
+        number = int(ident, 16)
+        if number >= len(self._blocks):
+            return None
+        return self._blocks[number]
+
+    def handle(self, method: str, params: list):
+        self.calls[method] += 1
+        if method == "eth_chainId":
+            return _hex(self.chain_id)
+        if method == "net_version":
+            return str(self.chain_id)
+        if method == "eth_blockNumber":
+            return _hex(self.head)
+        if method == "eth_getBlockByNumber":
+            block = self._resolve_block(params[0])
+            return self._block_json(block) if block else None
+        if method == "eth_gasPrice":
+            return _hex(self.base_fee * 2)
+        if method == "eth_maxPriorityFeePerGas":
+            return _hex(10**6)
+        if method == "eth_feeHistory":
+            count = min(int(params[0], 16) if isinstance(params[0], str) else int(params[0]), self.head + 1)
+            percentiles = params[2] if len(params) > 2 else []
+            return {
+                "oldestBlock": _hex(self.head - count + 1),
+                "baseFeePerGas": [_hex(self.base_fee)] * (count + 1),
+                "gasUsedRatio": [0.5] * count,
+                "reward": [[_hex(10**6) for _ in percentiles] for _ in range(count)],
+            }
+        if method == "eth_estimateGas":
+            return _hex(21000)
+        if method == "eth_getTransactionCount":
+            address = Web3.to_checksum_address(params[0])
+            with self._lock:
+                nonce = self._nonces.get(address, 0)
+                if len(params) > 1 and params[1] == "pending":
+                    while (address, nonce) in self._pending:
+                        nonce += 1
+            return _hex(nonce)
+        if method == "eth_getBalance":
+            return _hex(self.balance_of(Web3.to_checksum_address(params[0])))
+        if method == "eth_sendRawTransaction":
+            return self.send_raw(Web3.to_bytes(hexstr=params[0]))
+        if method == "eth_getTransactionReceipt":
+            return self._receipts.get(params[0])
+        raise RPCError(f"the method {method} does not exist/is not available", code=-32601)
+
+    def _dispatch(self, request: dict) -> dict:
+        reply = {"jsonrpc": "2.0", "id": request.get("id")}
+        try:
+            reply["result"] = self.handle(request["method"], request.get("params") or [])
+        except RPCError as e:
+            reply["error"] = {"code": e.code, "message": str(e)}
+        except Exception as e:
+            reply["error"] = {"code": -32603, "message": f"internal error: {e}"}
+        return reply
+
+    # -- server -----------------------------------------------------------------
+
+    def _handler(self):
+        chain = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                if chain.latency:
+                    time.sleep(chain.latency)
+                if isinstance(body, list):
+                    reply = [chain._dispatch(r) for r in body]
+                else:
+                    reply = chain._dispatch(body)
+                data = json.dumps(reply).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def _mine_loop(self):
+        while not self._stop.wait(self.block_time):
+            self.mine()
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start the RPC server and block production; returns the RPC URL."""
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="fakechain-rpc", daemon=True).start()
+        self._miner = threading.Thread(target=self._mine_loop, name="fakechain-miner", daemon=True)
+        self._miner.start()
+        return self.url
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,155 @@
+"""Local stand-in for the gateway's `/notify` x402 contract.
+
+Mirrors `gateway/src/index.ts`: a request without a payment header gets a 402
+with `x402.accepts[0]` (`payTo`, `maxAmountRequired`); a request presenting
+`x-agent-payment-tx` / `x-payment-tx` is verified against a `FakeChain`
+(recipient, amount, mined, status, `min_confirmations`), deduplicated per tx
+hash, and "delivered" after `delivery_latency` seconds instead of calling
+Telegram.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from web3 import Web3
+
+from .fakechain import FakeChain
+
+GATEWAY_WALLET = Web3.to_checksum_address("0x" + "9a" * 20)
+MESSAGE_PRICE_ETH = "0.0001"
+
+
+class FakeGateway:
+    """Args:
+        chain: The `FakeChain` payments are verified against
+        min_confirmations: Like the gateway's MIN_CONFIRMATIONS
+        delivery_latency: Seconds a simulated Telegram send takes
+        pay_to: Gateway wallet
+        price_eth: Price per message
+    """
+
+    def __init__(
+        self,
+        chain: FakeChain,
+        min_confirmations: int = 1,
+        delivery_latency: float = 0.0,
+        pay_to: str = GATEWAY_WALLET,
+        price_eth: str = MESSAGE_PRICE_ETH,
+    ):
+        self.chain = chain
+        self.min_confirmations = min_confirmations
+        self.delivery_latency = delivery_latency
+        self.pay_to = pay_to
+        self.price_eth = price_eth
+
+        self.delivered = 0
+        self.requests = 0
+        # message text -> time.monotonic() of delivery
+        self.delivered_at = {}
+        self._processed = set()
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def notify(self, payload: dict, payment_tx: Optional[str]):
+        """Returns `(status_code, body)` for a POST /notify."""
+        with self._lock:
+            self.requests += 1
+        if not payload.get("chat_id") or not payload.get("message"):
+            return 400, {"error": "Missing chat_id or message"}
+        if not payment_tx:
+            return 402, {
+                "error": "Payment Required",
+                "x402": {
+                    "version": "1.0",
+                    "accepts": [{
+                        "scheme": "exact",
+                        "network": "base-sepolia",
+                        "maxAmountRequired": self.price_eth,
+                        "payTo": self.pay_to,
+                        "asset": "ETH",
+                    }],
+                },
+            }
+        tx = self.chain.transaction(payment_tx)
+        if tx is None:
+            return 402, {"error": "Transaction not found on network"}
+        if (tx["to"] or "").lower() != self.pay_to.lower():
+            return 402, {"error": "Invalid recipient (did not pay Gateway)"}
+        if tx["value"] < Web3.to_wei(self.price_eth, "ether"):
+            return 402, {"error": f"Insufficient payment. Sent {Web3.from_wei(tx['value'], 'ether')}, required {self.price_eth}"}
+        receipt = self.chain.receipt(payment_tx)
+        if receipt is None:
+            return 402, {"error": "Transaction not yet mined"}
+        if self.min_confirmations > 0:
+            confirmations = self.chain.head - int(receipt["blockNumber"], 16) + 1
+            if confirmations < self.min_confirmations:
+                return 402, {"error": f"Waiting for confirmations. Have {confirmations}, need {self.min_confirmations}"}
+        with self._lock:
+            if payment_tx in self._processed:
+                return 200, {"success": True, "txHash": payment_tx, "idempotent": True}
+        if self.delivery_latency:
+            time.sleep(self.delivery_latency)
+        with self._lock:
+            self._processed.add(payment_tx)
+            self.delivered += 1
+            self.delivered_at[payload["message"]] = time.monotonic()
+        return 200, {"success": True, "txHash": payment_tx}
+
+    def _handler(self):
+        gateway = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self, status: int, body: dict):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                if self.path != "/notify":
+                    self.rfile.read(length)
+                    return self._reply(404, {"error": "Not found"})
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    return self._reply(400, {"error": "Invalid JSON"})
+                payment_tx = self.headers.get("x-payment-tx") or self.headers.get("x-agent-payment-tx")
+                self._reply(*gateway.notify(payload, payment_tx))
+
+            def do_GET(self):
+                if self.path.startswith("/stats/"):
+                    return self._reply(200, {"wallet": self.path[len("/stats/"):], "delivered": gateway.delivered})
+                self._reply(200, {
+                    "service": "x402-Notify Gateway (benchmark stand-in)",
+                    "pricing": {"perMessage": gateway.price_eth + " ETH"},
+                    "network": {"expectedChainId": gateway.chain.chain_id, "minConfirmations": gateway.min_confirmations},
+                })
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving; returns the gateway URL."""
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="fakegateway", daemon=True).start()
+        return self.url
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
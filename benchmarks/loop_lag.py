@@ -0,0 +1,121 @@
+"""Event-loop lag of the native async client while it signs payments.
+
+Runs `n` concurrent paid notifications through `async_native.AsyncNotifyClient`
+against a `FakeChain`/`FakeGateway` once per signing mode, with a ticker task
+that wakes every `tick` seconds and records how late it was woken. Lag is what
+every other coroutine on the loop (e.g. unrelated FastAPI requests) waits.
+
+Modes:
+  inline   sign inside the coroutine (the old behaviour)
+  thread   client's dedicated signing thread (default)
+  batch    BatchSigner: concurrent requests signed in one executor call
+  process  shared ProcessPoolExecutor
+
+Usage (from the repository root):
+    python -m benchmarks.loop_lag -n 50
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from .fakechain import FakeChain
+from .fakegateway import FakeGateway
+from .run import CHAT_ID, percentile
+
+MODES = ("inline", "thread", "batch", "process")
+
+
+def mode_wallet(mode: str) -> str:
+    return "0x" + (0x40 + MODES.index(mode)).to_bytes(1, "big").hex() * 32
+
+
+async def _measure(mode: str, n: int, chain: FakeChain, gateway: FakeGateway, tick: float, executor) -> dict:
+    from x402_notify.async_native import AsyncNotifyClient
+
+    kwargs = {"inline_signing": mode == "inline", "batch_signing": mode == "batch"}
+    if mode == "process":
+        kwargs["sign_executor"] = executor
+    lags: List[float] = []
+    stop = asyncio.Event()
+
+    async def ticker():
+        loop = asyncio.get_running_loop()
+        while not stop.is_set():
+            expected = loop.time() + tick
+            await asyncio.sleep(tick)
+            lags.append(max(0.0, loop.time() - expected))
+
+    async with AsyncNotifyClient(
+        mode_wallet(mode), gateway_url=gateway.url, rpc_url=chain.url, chain_id=chain.chain_id, rpc_retry_delay=0.05, **kwargs
+    ) as client:
+        ticking = asyncio.create_task(ticker())
+        start = time.monotonic()
+        results = await asyncio.gather(*(client.notify(CHAT_ID, f"lag {mode} #{i}") for i in range(n)), return_exceptions=True)
+        elapsed = time.monotonic() - start
+        stop.set()
+        await ticking
+    ok = sum(1 for r in results if not isinstance(r, Exception))
+    return {
+        "mode": mode,
+        "ok": ok,
+        "failed": n - ok,
+        "per_sec": ok / elapsed if elapsed else 0.0,
+        "lag_p50_ms": percentile(lags, 50) * 1000,
+        "lag_p99_ms": percentile(lags, 99) * 1000,
+        "lag_max_ms": max(lags, default=0.0) * 1000,
+    }
+
+
+def run_loop_lag(modes=MODES, n: int = 50, *, block_time: float = 0.2, tick: float = 0.001, verbose: bool = False) -> List[dict]:
+    """Measure each signing mode against a fresh fake chain and gateway."""
+    chain = FakeChain(block_time=block_time, latency=0.0)
+    chain.start()
+    gateway = FakeGateway(chain)
+    gateway.start()
+    executor: Optional[ProcessPoolExecutor] = ProcessPoolExecutor(max_workers=2) if "process" in modes else None
+    results = []
+    try:
+        for mode in modes:
+            quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+            with quiet:
+                results.append(asyncio.run(_measure(mode, n, chain, gateway, tick, executor)))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        gateway.stop()
+        chain.stop()
+    return results
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Event-loop lag while the native async client signs payments")
+    parser.add_argument("-n", "--count", type=int, default=50, help="concurrent notifications per mode")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"comma-separated subset of {','.join(MODES)}")
+    parser.add_argument("--block-time", type=float, default=0.2, help="seconds between fake blocks")
+    parser.add_argument("--tick", type=float, default=0.001, help="ticker interval in seconds")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show SDK logs")
+    args = parser.parse_args(argv)
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(unknown)}")
+
+    results = run_loop_lag(modes, args.count, block_time=args.block_time, tick=args.tick, verbose=args.verbose)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{'mode':<9}{'ok':>5}{'failed':>8}{'notif/s':>10}{'lag p50 ms':>12}{'lag p99 ms':>12}{'lag max ms':>12}")
+    for r in results:
+        print(f"{r['mode']:<9}{r['ok']:>5}{r['failed']:>8}{r['per_sec']:>10.1f}{r['lag_p50_ms']:>12.2f}{r['lag_p99_ms']:>12.2f}{r['lag_max_ms']:>12.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
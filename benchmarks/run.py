@@ -0,0 +1,334 @@
+"""Offline end-to-end benchmark for the notify pipeline.
+
+Starts a `FakeChain` (JSON-RPC) and a `FakeGateway` (`/notify` x402 contract)
+in-process, drives the SDK entry points against them and reports, per phase,
+notifications/sec, p50/p99 latency and RPC calls per notification.
+
+Phases:
+  sync          NotifyClient.notify, one after another
+  background    NotifyClient.notify(background=True), all submitted at once
+  async-thread  x402_notify.async_client.AsyncNotifyClient (thread wrapper)
+  async-native  x402_notify.async_native.AsyncNotifyClient (AsyncWeb3 + httpx)
+  agent-app     create_agent_app POST /send/{user_id} (needs fastapi)
+  queue         enqueue_notify into the SQLite queue, drained by queue workers
+
+Each phase pays from its own wallet, so nonces never carry over between phases.
+
+Usage (from the repository root):
+    python -m benchmarks.run -n 50
+    python -m benchmarks.run --phases sync,async-native --block-time 2 --rpc-latency 0.05
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from .fakechain import FakeChain
+from .fakegateway import FakeGateway
+
+PHASES = ("sync", "background", "async-thread", "async-native", "agent-app", "queue")
+CHAT_ID = "424242"
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def wallet_key(phase: str) -> str:
+    """A distinct, deterministic wallet per phase."""
+    return "0x" + (PHASES.index(phase) + 1).to_bytes(1, "big").hex() * 32
+
+
+class Bench:
+    """Shared chain + gateway and the per-phase drivers."""
+
+    def __init__(self, n: int, concurrency: int, chain: FakeChain, gateway: FakeGateway, client_kwargs: dict, queue_workers: int = 1):
+        self.n = n
+        self.concurrency = concurrency
+        self.chain = chain
+        self.gateway = gateway
+        self.client_kwargs = client_kwargs
+        self.queue_workers = queue_workers
+
+    def _message(self, phase: str, i: int) -> str:
+        return f"bench {phase} #{i}"
+
+    def _result(self, phase: str, latencies: List[float], failed: int, elapsed: float, rpc_calls: int, errors: List[str]) -> dict:
+        ok = len(latencies)
+        return {
+            "phase": phase,
+            "n": self.n,
+            "ok": ok,
+            "failed": failed,
+            "elapsed": elapsed,
+            "per_sec": ok / elapsed if elapsed else 0.0,
+            "p50": percentile(latencies, 50),
+            "p99": percentile(latencies, 99),
+            "rpc_per_notification": rpc_calls / ok if ok else 0.0,
+            "errors": sorted(set(errors))[:3],
+        }
+
+    def _delivery_latencies(self, phase: str, started: Dict[int, float], idle_timeout: float) -> List[float]:
+        """Wait for the gateway to see the phase's messages; latency = delivery - submission.
+
+        Gives up once nothing new was delivered for `idle_timeout` seconds (the
+        remaining notifications failed somewhere we cannot observe).
+        """
+        wanted = {self._message(phase, i): t for i, t in started.items()}
+        seen, last_progress = 0, time.monotonic()
+        while True:
+            delivered = sum(1 for m in wanted if m in self.gateway.delivered_at)
+            if delivered == len(wanted):
+                break
+            if delivered != seen:
+                seen, last_progress = delivered, time.monotonic()
+            elif time.monotonic() - last_progress > idle_timeout:
+                break
+            time.sleep(0.05)
+        return [self.gateway.delivered_at[m] - t for m, t in wanted.items() if m in self.gateway.delivered_at]
+
+    def run(self, phase: str) -> dict:
+        runner: Callable = getattr(self, "phase_" + phase.replace("-", "_"))
+        calls_before = sum(self.chain.calls.values())
+        start = time.monotonic()
+        latencies, failed, errors = runner(phase)
+        elapsed = time.monotonic() - start
+        return self._result(phase, latencies, failed, elapsed, sum(self.chain.calls.values()) - calls_before, errors)
+
+    # -- phases -----------------------------------------------------------------
+
+    def _sync_client(self, phase: str):
+        from x402_notify.client import NotifyClient
+
+        return NotifyClient(
+            wallet_key(phase), gateway_url=self.gateway.url, rpc_url=self.chain.url, chain_id=self.chain.chain_id, **self.client_kwargs
+        )
+
+    def phase_sync(self, phase: str):
+        client = self._sync_client(phase)
+        latencies, errors = [], []
+        for i in range(self.n):
+            t0 = time.monotonic()
+            try:
+                client.notify(CHAT_ID, self._message(phase, i))
+                latencies.append(time.monotonic() - t0)
+            except Exception as e:
+                errors.append(str(e))
+        client.close()
+        return latencies, len(errors), errors
+
+    def phase_background(self, phase: str):
+        client = self._sync_client(phase)
+        latencies, errors = [], []
+        lock = threading.Lock()
+
+        def _track(t0):
+            def _done(fut):
+                with lock:
+                    if fut.exception() is None:
+                        latencies.append(time.monotonic() - t0)
+                    else:
+                        errors.append(str(fut.exception()))
+            return _done
+
+        futures = []
+        for i in range(self.n):
+            future = client.notify(CHAT_ID, self._message(phase, i), background=True)
+            future.add_done_callback(_track(time.monotonic()))
+            futures.append(future)
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                pass
+        client.close()
+        return latencies, len(errors), errors
+
+    async def _gather(self, notify, phase: str):
+        latencies, errors = [], []
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def one(i):
+            async with semaphore:
+                t0 = time.monotonic()
+                try:
+                    await notify(CHAT_ID, self._message(phase, i))
+                    latencies.append(time.monotonic() - t0)
+                except Exception as e:
+                    errors.append(str(e))
+
+        await asyncio.gather(*(one(i) for i in range(self.n)))
+        return latencies, len(errors), errors
+
+    def phase_async_thread(self, phase: str):
+        from x402_notify.async_client import AsyncNotifyClient
+
+        async def main():
+            client = AsyncNotifyClient(
+                wallet_key(phase), gateway_url=self.gateway.url, rpc_url=self.chain.url, chain_id=self.chain.chain_id, **self.client_kwargs
+            )
+            try:
+                return await self._gather(client.notify, phase)
+            finally:
+                await client.close()
+
+        return asyncio.run(main())
+
+    def phase_async_native(self, phase: str):
+        from x402_notify.async_native import AsyncNotifyClient
+
+        async def main():
+            async with AsyncNotifyClient(
+                wallet_key(phase), gateway_url=self.gateway.url, rpc_url=self.chain.url, chain_id=self.chain.chain_id, **self.client_kwargs
+            ) as client:
+                return await self._gather(client.notify, phase)
+
+        return asyncio.run(main())
+
+    def phase_agent_app(self, phase: str):
+        try:
+            from fastapi.testclient import TestClient
+            from x402_notify.agent_server import create_agent_app
+        except ImportError as e:
+            return [], self.n, [f"skipped: {e}"]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            app = create_agent_app(
+                wallet_key(phase),
+                gateway_url=self.gateway.url,
+                db_path=os.path.join(tmp, "agent.db"),
+                rpc_url=self.chain.url,
+                chain_id=self.chain.chain_id,
+            )
+            started, errors = {}, []
+            with TestClient(app) as http:
+                http.post("/subscribe", json={"user_id": "bench", "chat_id": CHAT_ID})
+                for i in range(self.n):
+                    started[i] = time.monotonic()
+                    res = http.post("/send/bench", json={"message": self._message(phase, i)})
+                    if res.status_code != 200:
+                        errors.append(res.text)
+                latencies = self._delivery_latencies(phase, started, idle_timeout=max(10.0, 20 * self.chain.block_time))
+        return latencies, self.n - len(latencies), errors
+
+    def phase_queue(self, phase: str):
+        from x402_notify.queue import enqueue_notify
+        from x402_notify.sqlite_queue import SQLiteQueue, run_workers, work
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "queue.db")
+            queue = SQLiteQueue(db_path)
+            started = {}
+            for i in range(self.n):
+                started[i] = time.monotonic()
+                enqueue_notify(
+                    None, wallet_key(phase), self.gateway.url, self.chain.url, self.chain.chain_id,
+                    CHAT_ID, self._message(phase, i), backend=queue,
+                )
+            if self.queue_workers > 1:
+                run_workers(db_path, processes=self.queue_workers, burst=True)
+            else:
+                work(db_path, burst=True)
+            counts = queue.counts()
+            queue.close()
+        latencies = self._delivery_latencies(phase, started, idle_timeout=1.0)
+        return latencies, self.n - len(latencies), [f"queue counts: {counts}"] if counts.get("failed") else []
+
+
+def format_table(results: List[dict]) -> str:
+    header = f"{'phase':<13} {'ok':>5} {'fail':>5} {'elapsed':>8} {'notif/s':>8} {'p50 s':>7} {'p99 s':>7} {'rpc/notif':>9}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r['phase']:<13} {r['ok']:>5} {r['failed']:>5} {r['elapsed']:>8.2f} {r['per_sec']:>8.2f} "
+            f"{r['p50']:>7.3f} {r['p99']:>7.3f} {r['rpc_per_notification']:>9.1f}"
+        )
+        for error in r["errors"]:
+            lines.append(f"    ! {error[:120]}")
+    return "\n".join(lines)
+
+
+def run_benchmarks(
+    phases=PHASES,
+    n: int = 20,
+    *,
+    block_time: float = 0.5,
+    rpc_latency: float = 0.005,
+    delivery_latency: float = 0.0,
+    min_confirmations: int = 1,
+    concurrency: int = 16,
+    queue_workers: int = 1,
+    client_kwargs: Optional[dict] = None,
+    verbose: bool = False,
+) -> List[dict]:
+    """Run the given phases against a fresh fake chain and gateway; returns one result dict per phase."""
+    chain = FakeChain(block_time=block_time, latency=rpc_latency)
+    chain.start()
+    gateway = FakeGateway(chain, min_confirmations=min_confirmations, delivery_latency=delivery_latency)
+    gateway.start()
+    kwargs = {"rpc_retry_delay": 0.05, "min_confirmations": min_confirmations}
+    kwargs.update(client_kwargs or {})
+    bench = Bench(n, concurrency, chain, gateway, kwargs, queue_workers=queue_workers)
+    results = []
+    try:
+        for phase in phases:
+            # the SDK logs every step; keep the report readable unless asked
+            quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+            with quiet:
+                results.append(bench.run(phase))
+    finally:
+        gateway.stop()
+        chain.stop()
+    return results
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline notify pipeline benchmark (fake chain + fake gateway)")
+    parser.add_argument("-n", "--count", type=int, default=20, help="notifications per phase")
+    parser.add_argument("--phases", default=",".join(PHASES), help=f"comma-separated subset of {','.join(PHASES)}")
+    parser.add_argument("--block-time", type=float, default=0.5, help="seconds between fake blocks")
+    parser.add_argument("--rpc-latency", type=float, default=0.005, help="seconds added to every RPC call")
+    parser.add_argument("--delivery-latency", type=float, default=0.0, help="seconds a simulated Telegram send takes")
+    parser.add_argument("--min-confirmations", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=16, help="in-flight notifications for the async phases")
+    parser.add_argument("--queue-workers", type=int, default=1, help="worker processes for the queue phase")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show SDK logs")
+    args = parser.parse_args(argv)
+
+    phases = [p.strip() for p in args.phases.split(",") if p.strip()]
+    unknown = [p for p in phases if p not in PHASES]
+    if unknown:
+        parser.error(f"unknown phases: {', '.join(unknown)}")
+
+    results = run_benchmarks(
+        phases,
+        args.count,
+        block_time=args.block_time,
+        rpc_latency=args.rpc_latency,
+        delivery_latency=args.delivery_latency,
+        min_confirmations=args.min_confirmations,
+        concurrency=args.concurrency,
+        queue_workers=args.queue_workers,
+        verbose=args.verbose,
+    )
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"[bench] {args.count} notifications/phase, block time {args.block_time}s, RPC latency {args.rpc_latency}s")
+        print(format_table(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
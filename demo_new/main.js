@@ -43,8 +43,8 @@ async function api(path, method = 'GET', body) {
 // Toggle subscribe/unsubscribe with single button
 async function isSubscribed(chat) {
   try {
-    const s = await api('/status');
-    return Array.isArray(s.subscribers) && s.subscribers.includes(chat);
+    const s = await api(`/subscribers/${encodeURIComponent(chat)}`);
+    return Boolean(s.subscribed);
   } catch (e) {
     return false;
   }
@@ -200,7 +200,7 @@ async function pollLoop() {
       const s = await api('/status');
       lastFetchedPrice = s.price;
       // update subscriber count separately
-      if (Array.isArray(s.subscribers)) countEl.textContent = s.subscribers.length;
+      if (typeof s.count === 'number') countEl.textContent = s.count;
     } catch (e) {
       console.warn('poll error', e);
     }
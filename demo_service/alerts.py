@@ -0,0 +1,150 @@
+"""Per-subscriber price alert rules for the demo service.
+
+Each rule fires when the price crosses its threshold in its direction
+(`above`: previous < threshold <= price, `below`: previous > threshold >= price).
+Thresholds are kept in two sorted arrays (one per direction), so a tick only
+bisects for the span the price moved through: O(log n + k) for k fired rules,
+independent of how many rules exist.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+DIRECTIONS = ("above", "below")
+
+
+class _SortedIndex:
+    """Thresholds sorted ascending, with the rule id stored at the same position."""
+
+    def __init__(self):
+        self.thresholds = array("d")
+        self.rule_ids = array("q")
+
+    def __len__(self):
+        return len(self.thresholds)
+
+    def add(self, threshold: float, rule_id: int):
+        i = bisect_right(self.thresholds, threshold)
+        self.thresholds.insert(i, threshold)
+        self.rule_ids.insert(i, rule_id)
+
+    def bulk_add(self, items: List[Tuple[float, int]]):
+        merged = sorted(list(zip(self.thresholds, self.rule_ids)) + items)
+        self.thresholds = array("d", (t for t, _ in merged))
+        self.rule_ids = array("q", (r for _, r in merged))
+
+    def remove(self, threshold: float, rule_id: int) -> bool:
+        i = bisect_left(self.thresholds, threshold)
+        while i < len(self.thresholds) and self.thresholds[i] == threshold:
+            if self.rule_ids[i] == rule_id:
+                del self.thresholds[i]
+                del self.rule_ids[i]
+                return True
+            i += 1
+        return False
+
+    def ids_between(self, lo: int, hi: int) -> array:
+        return self.rule_ids[lo:hi]
+
+
+class AlertEngine:
+    """Threshold rules indexed for crossing detection on every price tick."""
+
+    def __init__(self):
+        self._index = {"above": _SortedIndex(), "below": _SortedIndex()}
+        # rule_id -> (chat_id, threshold, direction)
+        self._rules: Dict[int, Tuple[str, float, str]] = {}
+        self._by_chat: Dict[str, Set[int]] = {}
+        self._next_id = 1
+        self.last_price: Optional[float] = None
+
+    def __len__(self):
+        return len(self._rules)
+
+    def _new_rule(self, chat_id: str, threshold: float, direction: str) -> int:
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {DIRECTIONS}")
+        rule_id = self._next_id
+        self._next_id += 1
+        self._rules[rule_id] = (chat_id, float(threshold), direction)
+        self._by_chat.setdefault(chat_id, set()).add(rule_id)
+        return rule_id
+
+    def add_rule(self, chat_id: str, threshold: float, direction: str) -> int:
+        """Subscribe `chat_id` to a crossing of `threshold`; returns the rule id."""
+        rule_id = self._new_rule(chat_id, threshold, direction)
+        self._index[direction].add(float(threshold), rule_id)
+        return rule_id
+
+    def add_rules(self, rules: Iterable[Tuple[str, float, str]]) -> List[int]:
+        """Bulk-load `(chat_id, threshold, direction)` rules with one sort per index."""
+        new: Dict[str, List[Tuple[float, int]]] = {d: [] for d in DIRECTIONS}
+        ids = []
+        for chat_id, threshold, direction in rules:
+            rule_id = self._new_rule(chat_id, threshold, direction)
+            new[direction].append((float(threshold), rule_id))
+            ids.append(rule_id)
+        for direction, items in new.items():
+            if items:
+                self._index[direction].bulk_add(items)
+        return ids
+
+    def remove_rule(self, rule_id: int) -> bool:
+        rule = self._rules.pop(rule_id, None)
+        if rule is None:
+            return False
+        chat_id, threshold, direction = rule
+        self._index[direction].remove(threshold, rule_id)
+        chat_rules = self._by_chat.get(chat_id)
+        if chat_rules is not None:
+            chat_rules.discard(rule_id)
+            if not chat_rules:
+                del self._by_chat[chat_id]
+        return True
+
+    def remove_chat(self, chat_id: str) -> int:
+        """Remove every rule of `chat_id`; returns how many were removed."""
+        rule_ids = list(self._by_chat.get(chat_id, ()))
+        for rule_id in rule_ids:
+            self.remove_rule(rule_id)
+        return len(rule_ids)
+
+    def rules_for(self, chat_id: str) -> List[dict]:
+        return [self.get_rule(rule_id) for rule_id in sorted(self._by_chat.get(chat_id, ()))]
+
+    def get_rule(self, rule_id: int) -> Optional[dict]:
+        rule = self._rules.get(rule_id)
+        if rule is None:
+            return None
+        chat_id, threshold, direction = rule
+        return {"rule_id": rule_id, "chat_id": chat_id, "threshold": threshold, "direction": direction}
+
+    def update(self, price: float) -> List[Tuple[str, float, str]]:
+        """Record a new price and return the `(chat_id, threshold, direction)` rules it crossed."""
+        prev, self.last_price = self.last_price, price
+        if prev is None or price == prev:
+            return []
+        if price > prev:
+            index = self._index["above"]
+            lo = bisect_right(index.thresholds, prev)
+            hi = bisect_right(index.thresholds, price)
+        else:
+            index = self._index["below"]
+            lo = bisect_left(index.thresholds, price)
+            hi = bisect_left(index.thresholds, prev)
+        if lo >= hi:
+            return []
+        rules = self._rules
+        return [rules[rule_id] for rule_id in index.ids_between(lo, hi)]
+
+
+def format_alert(fired: List[Tuple[str, float, str]], price: float) -> Dict[str, str]:
+    """Group fired rules into one alert message per chat."""
+    lines: Dict[str, List[str]] = {}
+    for chat_id, threshold, direction in fired:
+        if direction == "above":
+            line = f"🚀 ETH surged above ${threshold:,.0f} — price {price}"
+        else:
+            line = f"🔻 ETH dropped below ${threshold:,.0f} — price {price}"
+        lines.setdefault(chat_id, []).append(line)
+    return {chat_id: "\n".join(chat_lines) for chat_id, chat_lines in lines.items()}
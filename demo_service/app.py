@@ -1,6 +1,6 @@
 import os
 import asyncio
-from typing import Set
+from typing import Dict, Optional
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
@@ -8,6 +8,15 @@ from dotenv import load_dotenv
 from pathlib import Path
 from fastapi.staticfiles import StaticFiles
 
+try:
+    from .alerts import AlertEngine, format_alert
+    from .dispatcher import FanoutDispatcher
+    from .subscribers import SubscriberStore, parse_chat_id
+except ImportError:  # running from inside demo_service/ (uvicorn app:app)
+    from alerts import AlertEngine, format_alert
+    from dispatcher import FanoutDispatcher
+    from subscribers import SubscriberStore, parse_chat_id
+
 load_dotenv()
 
 AGENT_PRIVATE_KEY = os.getenv("AGENT_PRIVATE_KEY")
@@ -41,10 +50,24 @@ else:
 
 class SubIn(BaseModel):
     chat_id: str
+    # optional per-subscriber thresholds (defaults: DEMO_ALERT_ABOVE / DEMO_ALERT_BELOW)
+    above: Optional[float] = None
+    below: Optional[float] = None
+
+
+class RuleIn(BaseModel):
+    chat_id: str
+    threshold: float
+    direction: str  # "above" | "below"
 
 
-# in-memory set of chat ids (no persistence)
-subscribers: Set[str] = set()
+# packed chat ids, persisted to DEMO_SUBSCRIBERS_DIR (snapshot + append-only log); empty value = memory only
+subscribers = SubscriberStore(os.getenv("DEMO_SUBSCRIBERS_DIR", "./demo_subscribers") or None)
+
+# per-subscriber threshold rules, checked on every price tick
+alert_engine = AlertEngine()
+DEFAULT_ALERT_ABOVE = float(os.getenv("DEMO_ALERT_ABOVE", "4000"))
+DEFAULT_ALERT_BELOW = float(os.getenv("DEMO_ALERT_BELOW", "3000"))
 
 # price simulation state
 current_price = {"value": 3500, "phase": 0}
@@ -66,58 +89,112 @@ except Exception:
 # ########## SDK END ##########
 
 
+def _chat_id_or_400(chat_id: str) -> str:
+    if not chat_id:
+        raise HTTPException(status_code=400, detail="chat_id required")
+    try:
+        return str(parse_chat_id(chat_id))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
 @app.post("/subscribe")
 async def subscribe(payload: SubIn):
-    if not payload.chat_id:
-        raise HTTPException(status_code=400, detail="chat_id required")
-    subscribers.add(payload.chat_id)
+    chat_id = _chat_id_or_400(payload.chat_id)
+    custom = payload.above is not None or payload.below is not None
+    if custom or chat_id not in subscribers:
+        alert_engine.remove_chat(chat_id)
+        alert_engine.add_rule(chat_id, payload.above if payload.above is not None else DEFAULT_ALERT_ABOVE, "above")
+        alert_engine.add_rule(chat_id, payload.below if payload.below is not None else DEFAULT_ALERT_BELOW, "below")
+    subscribers.add(chat_id)
     return {"ok": True, "subscribed": True, "count": len(subscribers)}
 
 
 @app.post("/unsubscribe")
 async def unsubscribe(payload: SubIn):
-    if not payload.chat_id:
-        raise HTTPException(status_code=400, detail="chat_id required")
-    subscribers.discard(payload.chat_id)
+    chat_id = _chat_id_or_400(payload.chat_id)
+    subscribers.discard(chat_id)
+    alert_engine.remove_chat(chat_id)
     return {"ok": True, "subscribed": False, "count": len(subscribers)}
 
 
+@app.post("/rules")
+async def add_rule(payload: RuleIn):
+    chat_id = _chat_id_or_400(payload.chat_id)
+    try:
+        rule_id = alert_engine.add_rule(chat_id, payload.threshold, payload.direction)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    subscribers.add(chat_id)
+    return {"ok": True, "rule": alert_engine.get_rule(rule_id)}
+
+
+@app.delete("/rules/{rule_id}")
+async def delete_rule(rule_id: int):
+    if not alert_engine.remove_rule(rule_id):
+        raise HTTPException(status_code=404, detail="rule not found")
+    return {"ok": True}
+
+
+@app.get("/rules")
+async def list_rules(chat_id: str):
+    chat_id = _chat_id_or_400(chat_id)
+    return {"chat_id": chat_id, "rules": alert_engine.rules_for(chat_id)}
+
+
 @app.get("/status")
-async def status():
-    return {"price": current_price["value"], "subscribers": list(subscribers)}
+async def status(offset: int = 0, limit: int = 100):
+    """Current price, subscriber count and one page of subscribers."""
+    offset = max(0, offset)
+    limit = max(0, min(limit, 1000))
+    page = subscribers.page(offset, limit)
+    next_offset = offset + len(page) if offset + len(page) < len(subscribers) else None
+    return {"price": current_price["value"], "count": len(subscribers), "subscribers": page, "next_offset": next_offset}
 
 
-async def notify_all(message: str):
-    if not subscribers:
-        return
+@app.get("/subscribers/{chat_id}")
+async def subscriber_status(chat_id: str):
+    return {"chat_id": chat_id, "subscribed": chat_id in subscribers}
+
+
+def _send_notification(chat_id: str, message: str):
+    # blocking SDK call; the dispatcher runs it in one of its worker threads
+    client.notify(chat_id, message)
+
+
+# long-lived fan-out dispatcher (created on startup)
+dispatcher: Optional[FanoutDispatcher] = None
+
+
+def _can_send() -> bool:
     if client is None:
         # SDK not configured; just log
         print("SDK client not configured; skipping notifications")
-        return
-    # send notifications concurrently without blocking the simulator
-    async def _send(chat_id: str):
-        try:
-            # run the (possibly blocking) sync client.notify in a thread
-            await asyncio.to_thread(client.notify, chat_id, message)
-            print(f"[x402-Notify] Sent notification to {chat_id}")
-        except Exception as exc:
-            print(f"[x402-Notify] Error sending to {chat_id}: {exc}")
+        return False
+    if dispatcher is None:
+        print("[x402-Notify] Dispatcher not running; skipping notifications")
+        return False
+    return True
 
-    # limit concurrent sends to avoid overwhelming local resources
-    sem = asyncio.Semaphore(8)
 
-    async def _send_with_sem(chat_id: str):
-        async with sem:
-            await _send(chat_id)
+async def notify_all(message: str):
+    if not subscribers or not _can_send():
+        return
+    # hand off to the dispatcher's bounded queue; chats with a send in flight get the newest message
+    accepted = dispatcher.dispatch(message, subscribers)
+    print(f"[x402-Notify] Queued alert for {accepted}/{len(subscribers)} subscribers (backlog={dispatcher.backlog()})")
 
-    tasks = [asyncio.create_task(_send_with_sem(c)) for c in list(subscribers)]
-    # schedule background gather so notify_all returns quickly
-    asyncio.create_task(asyncio.gather(*tasks, return_exceptions=True))
-    print(f"[x402-Notify] Scheduled {len(tasks)} send tasks")
+
+async def notify_chats(messages: Dict[str, str]):
+    """Queue one (per-chat) message for each chat whose rules fired."""
+    if not messages or not _can_send():
+        return
+    accepted = sum(1 for chat_id, message in messages.items() if dispatcher.submit(chat_id, message))
+    print(f"[x402-Notify] Queued alerts for {accepted}/{len(messages)} chats (backlog={dispatcher.backlog()})")
 
 
 async def price_simulator():
-    """Emit a smooth sine-wave price every second and notify on threshold crossings.
+    """Emit a smooth sine-wave price every second and notify subscribers whose rules it crosses.
 
     Environment vars:
       DEMO_PERIOD: full sine period in seconds (default 120)
@@ -129,7 +206,6 @@ async def price_simulator():
     center = 3500   
     interval = 0.5
     start = time.time()
-    prev_in_range = None
 
     iter_count = 0
     while True:
@@ -143,23 +219,16 @@ async def price_simulator():
             if iter_count % 10 == 0:
                 print(f"[sim] price={price} subscribers={len(subscribers)}")
 
-            # detect crossing out of the safe range [3000,4000]
-            in_range = 3000 <= price <= 4000
-            if prev_in_range is None:
-                prev_in_range = in_range
-            else:
-                if prev_in_range and not in_range:
-                    if price > 4000:
-                        msg = f"🚀 ETH surged above $4,000 — price {price}"
-                    else:
-                        msg = f"🔻 ETH dropped below $3,000 — price {price}"
-                    print(msg)
-                    # schedule notify and don't await long-running sends
-                    try:
-                        asyncio.create_task(notify_all(msg))
-                    except Exception as exc:
-                        print(f"[sim] failed to schedule notify_all: {exc}")
-                prev_in_range = in_range
+            # only the rules whose threshold lies between the previous and current price fire
+            fired = alert_engine.update(price)
+            if fired:
+                messages = format_alert(fired, price)
+                print(f"[sim] price={price} crossed {len(fired)} rules for {len(messages)} chats")
+                # only enqueues; sends run on the dispatcher's workers
+                try:
+                    await notify_chats(messages)
+                except Exception as exc:
+                    print(f"[sim] failed to schedule notifications: {exc}")
 
             await asyncio.sleep(interval)
         except Exception as exc:
@@ -167,8 +236,32 @@ async def price_simulator():
             await asyncio.sleep(1)
 
 
+def restore_default_rules(store: SubscriberStore, engine: AlertEngine) -> int:
+    """Give restored subscribers without rules the default alert rules; returns how many chats.
+
+    Custom thresholds are not persisted, only the subscriber ids.
+    """
+    # decided up front: add_rules registers a chat's first rule before its second is generated
+    missing = [chat_id for chat_id in store if not engine.rules_for(chat_id)]
+    engine.add_rules(
+        (chat_id, threshold, direction)
+        for chat_id in missing
+        for threshold, direction in ((DEFAULT_ALERT_ABOVE, "above"), (DEFAULT_ALERT_BELOW, "below"))
+    )
+    return len(missing)
+
+
 @app.on_event("startup")
 async def startup_event():
+    global dispatcher
+    restore_default_rules(subscribers, alert_engine)
+    print(f"[sim] loaded {len(subscribers)} subscribers")
+    dispatcher = FanoutDispatcher(
+        _send_notification,
+        workers=int(os.getenv("DEMO_NOTIFY_WORKERS", "8")),
+        max_queue=int(os.getenv("DEMO_NOTIFY_QUEUE", "10000")),
+    )
+    dispatcher.start()
     # start background price simulator and keep a reference for shutdown
     sim_task = asyncio.create_task(price_simulator())
     app.state.sim_task = sim_task
@@ -184,3 +277,9 @@ async def shutdown_event():
             await task
         except asyncio.CancelledError:
             print('[sim] price simulator cancelled')
+    # let queued sends finish before the process exits
+    if dispatcher is not None:
+        await dispatcher.stop(timeout=float(os.getenv("DEMO_NOTIFY_DRAIN_SECONDS", "30")))
+        print(f"[x402-Notify] Dispatcher stopped: {dispatcher.stats}")
+    # write a final snapshot so the next start only maps it
+    subscribers.close()
@@ -0,0 +1,105 @@
+"""Long-lived notification fan-out for the demo service.
+
+A fixed set of worker tasks pulls chat ids from a bounded queue and runs the
+(blocking) SDK send in a thread, so the number of tasks and threads stays flat
+however often alerts fire. A chat that is already queued or has a send in
+flight is not queued again: its pending message is replaced by the newest one.
+"""
+import asyncio
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+
+class FanoutDispatcher:
+    def __init__(self, send: Callable[[str, str], object], workers: int = 8, max_queue: int = 10000, log: bool = True):
+        """
+        Args:
+            send: blocking callable `send(chat_id, message)`, run in a worker thread
+            workers: number of concurrent sends (and threads)
+            max_queue: chats that may wait for a worker; further work is dropped
+            log: print a line per successful send (failures are always printed)
+        """
+        self._send = send
+        self._log = log
+        self._workers = workers
+        self._max_queue = max_queue
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # chat_id -> latest message not yet handed to a worker
+        self._pending: Dict[str, str] = {}
+        self._inflight: Set[str] = set()
+
+        self.stats = {"sent": 0, "failed": 0, "merged": 0, "dropped": 0}
+
+    def start(self):
+        """Create the queue and worker tasks (call from within the running loop)."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self._max_queue)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self._workers)]
+
+    def submit(self, chat_id: str, message: str) -> bool:
+        """Queue `message` for `chat_id`. Returns False if it had to be dropped."""
+        if self._queue is None:
+            raise RuntimeError("dispatcher not started")
+        if chat_id in self._pending:
+            # Already waiting for a worker: newest alert supersedes the older one
+            self._pending[chat_id] = message
+            self.stats["merged"] += 1
+            return True
+        self._pending[chat_id] = message
+        if chat_id in self._inflight:
+            # The worker sending to this chat re-queues it when done
+            return True
+        try:
+            self._queue.put_nowait(chat_id)
+        except asyncio.QueueFull:
+            del self._pending[chat_id]
+            self.stats["dropped"] += 1
+            return False
+        return True
+
+    def dispatch(self, message: str, chat_ids: Iterable[str]) -> int:
+        """Queue `message` for every chat id; returns how many were accepted."""
+        return sum(1 for chat_id in chat_ids if self.submit(chat_id, message))
+
+    def backlog(self) -> int:
+        return len(self._pending) + len(self._inflight)
+
+    async def _worker(self):
+        while True:
+            chat_id = await self._queue.get()
+            message = self._pending.pop(chat_id, None)
+            if message is None:
+                self._queue.task_done()
+                continue
+            self._inflight.add(chat_id)
+            try:
+                await asyncio.to_thread(self._send, chat_id, message)
+                self.stats["sent"] += 1
+                if self._log:
+                    print(f"[x402-Notify] Sent notification to {chat_id}")
+            except Exception as exc:
+                self.stats["failed"] += 1
+                print(f"[x402-Notify] Error sending to {chat_id}: {exc}")
+            finally:
+                self._inflight.discard(chat_id)
+                if chat_id in self._pending:
+                    try:
+                        self._queue.put_nowait(chat_id)
+                    except asyncio.QueueFull:
+                        del self._pending[chat_id]
+                        self.stats["dropped"] += 1
+                self._queue.task_done()
+
+    async def stop(self, timeout: float = 30.0):
+        """Drain queued work (up to `timeout` seconds), then stop the workers."""
+        if self._queue is not None and self._tasks:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                print(f"[x402-Notify] Dispatcher drain timed out with {self.backlog()} chats pending")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -0,0 +1,190 @@
+"""High-speed price replay for benchmarking the demo alert pipeline.
+
+Feeds a recorded price series through the same path as `price_simulator`
+(AlertEngine crossing detection -> per-chat messages -> FanoutDispatcher) as
+fast as possible, with the SDK client replaced by an in-memory sink, and reports
+ticks/sec and alerts/sec.
+
+Price sources:
+  - CSV: one price per line, or a column named `price`
+  - raw binary: little-endian float64 values (`.bin`/`.f64`), memory-mapped
+  - `.npy` arrays (requires numpy), memory-mapped
+  - no file: a synthetic sine wave (`--synthetic N` ticks)
+
+Usage:
+    python -m demo_service.replay prices.csv --rules 100000 --chats 10000
+    python -m demo_service.replay --synthetic 1000000 --rules 1000000
+"""
+import argparse
+import asyncio
+import csv
+import math
+import mmap
+import random
+import sys
+import threading
+import time
+from typing import Iterator, Optional, Sequence
+
+try:
+    from .alerts import AlertEngine, format_alert
+    from .dispatcher import FanoutDispatcher
+except ImportError:  # running from inside demo_service/
+    from alerts import AlertEngine, format_alert
+    from dispatcher import FanoutDispatcher
+
+
+class MockSink:
+    """Stands in for the SDK client: records sends instead of paying/delivering."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.sent = 0
+        self._lock = threading.Lock()
+
+    def notify(self, chat_id: str, message: str):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.sent += 1
+        return {"success": True, "mock": True}
+
+
+def load_prices(path: str) -> Sequence[float]:
+    """Load a price series; binary and .npy files are memory-mapped, not copied."""
+    if path.endswith(".npy"):
+        import numpy as np
+
+        return np.load(path, mmap_mode="r")
+    if path.endswith((".bin", ".f64")):
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(mm).cast("d")
+    prices = []
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        column = 0
+        if header is not None:
+            try:
+                prices.append(float(header[0]))
+            except ValueError:
+                column = header.index("price") if "price" in header else 0
+        for row in reader:
+            if row:
+                prices.append(float(row[column]))
+    return prices
+
+
+def synthetic_prices(ticks: int, center: float = 3500, amplitude: float = 510, period: int = 120) -> Iterator[float]:
+    """The simulator's sine wave, one sample per tick."""
+    for i in range(ticks):
+        yield float(int(center + amplitude * math.sin(2 * math.pi * i / period)))
+
+
+def random_rules(engine: AlertEngine, rules: int, chats: int, low: float, high: float, seed: int = 0):
+    rng = random.Random(seed)
+    engine.add_rules(
+        (str(rng.randrange(chats)), rng.uniform(low, high), rng.choice(("above", "below")))
+        for _ in range(rules)
+    )
+
+
+async def replay(
+    prices,
+    engine: AlertEngine,
+    sink: MockSink,
+    *,
+    workers: int = 8,
+    max_queue: int = 100000,
+    dispatch: bool = True,
+    yield_every: int = 100,
+) -> dict:
+    """Run the price series through the pipeline and return throughput stats.
+
+    The loop yields to the dispatcher workers after every tick that queued
+    messages (and every `yield_every` ticks otherwise), so sends proceed
+    alongside ingestion instead of waiting for the replay loop.
+    """
+    # a line per send would make stdout the bottleneck being measured
+    dispatcher = FanoutDispatcher(sink.notify, workers=workers, max_queue=max_queue, log=False)
+    dispatcher.start()
+
+    ticks = alerts = messages = 0
+    detect_time = 0.0
+    start = time.perf_counter()
+    for price in prices:
+        t0 = time.perf_counter()
+        fired = engine.update(float(price))
+        detect_time += time.perf_counter() - t0
+        ticks += 1
+        submitted = False
+        if fired:
+            alerts += len(fired)
+            per_chat = format_alert(fired, price)
+            messages += len(per_chat)
+            if dispatch:
+                for chat_id, message in per_chat.items():
+                    dispatcher.submit(chat_id, message)
+                submitted = bool(per_chat)
+        if submitted or ticks % yield_every == 0:
+            # let the dispatcher workers run
+            await asyncio.sleep(0)
+    ingest_elapsed = time.perf_counter() - start
+    await dispatcher.stop(timeout=600)
+    total_elapsed = time.perf_counter() - start
+
+    return {
+        "ticks": ticks,
+        "alerts": alerts,
+        "messages": messages,
+        "sent": sink.sent,
+        "merged": dispatcher.stats["merged"],
+        "dropped": dispatcher.stats["dropped"],
+        "ticks_per_sec": ticks / ingest_elapsed if ingest_elapsed else 0.0,
+        "alerts_per_sec": alerts / ingest_elapsed if ingest_elapsed else 0.0,
+        "sends_per_sec": sink.sent / total_elapsed if total_elapsed else 0.0,
+        "detect_us_per_tick": detect_time / ticks * 1e6 if ticks else 0.0,
+        "elapsed": total_elapsed,
+    }
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Replay a price series through the demo alert pipeline")
+    parser.add_argument("path", nargs="?", help="CSV, .bin/.f64 (float64) or .npy price file")
+    parser.add_argument("--synthetic", type=int, default=100000, help="sine-wave ticks when no file is given")
+    parser.add_argument("--rules", type=int, default=100000, help="random rules to load")
+    parser.add_argument("--chats", type=int, default=10000, help="distinct chats the rules belong to")
+    parser.add_argument("--workers", type=int, default=8, help="dispatcher workers")
+    parser.add_argument("--sink-latency", type=float, default=0.0, help="seconds each mock send takes")
+    parser.add_argument("--no-dispatch", action="store_true", help="measure crossing detection only")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    prices = load_prices(args.path) if args.path else list(synthetic_prices(args.synthetic))
+    if not len(prices):
+        print("[replay] no prices to replay")
+        return 1
+    low, high = min(prices), max(prices)
+
+    engine = AlertEngine()
+    t0 = time.perf_counter()
+    random_rules(engine, args.rules, args.chats, low, high, seed=args.seed)
+    print(f"[replay] loaded {len(engine)} rules in {time.perf_counter() - t0:.2f}s; replaying {len(prices)} ticks")
+
+    stats = asyncio.run(
+        replay(prices, engine, MockSink(args.sink_latency), workers=args.workers, dispatch=not args.no_dispatch)
+    )
+    print(
+        f"[replay] {stats['ticks']} ticks, {stats['alerts']} alerts, {stats['messages']} messages "
+        f"({stats['sent']} sent, {stats['merged']} merged, {stats['dropped']} dropped) in {stats['elapsed']:.2f}s"
+    )
+    print(
+        f"[replay] {stats['ticks_per_sec']:.0f} ticks/sec, {stats['alerts_per_sec']:.0f} alerts/sec, "
+        f"{stats['sends_per_sec']:.0f} sends/sec, {stats['detect_us_per_tick']:.2f} us/tick detection"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""Compact, persistent subscriber store for the demo service.
+
+Telegram chat ids are integers, so subscribers are kept as packed int64 values
+in an `array('q')` with an open-addressing hash index (also an `array('q')`),
+about 24 bytes per subscriber instead of a Python string in a set.
+
+Persistence (optional, when a directory is given):
+  - `log.bin`: append-only records of adds/removes (`<bq`: op, chat id)
+  - `snapshot.bin`: the packed id array, rewritten every `snapshot_every` log
+    records and on close; loaded through mmap at startup, then the log is
+    replayed on top of it.
+"""
+import mmap
+import os
+import struct
+import threading
+from array import array
+from typing import Iterator, List, Optional
+
+_EMPTY = 0
+_TOMBSTONE = -1
+_RECORD = struct.Struct("<bq")
+_OP_ADD = 1
+_OP_REMOVE = 0
+_MASK64 = (1 << 64) - 1
+
+
+def parse_chat_id(chat_id) -> int:
+    """Telegram chat ids are (possibly negative) integers; reject anything else."""
+    try:
+        value = int(str(chat_id).strip())
+    except ValueError:
+        raise ValueError(f"chat_id must be an integer, got {chat_id!r}")
+    if not -(1 << 63) <= value < (1 << 63):
+        raise ValueError("chat_id out of range")
+    return value
+
+
+class SubscriberStore:
+    def __init__(self, path: Optional[str] = None, *, snapshot_every: int = 10000, fsync: bool = False):
+        """
+        Args:
+            path: directory for the snapshot and log; None keeps subscribers in memory only
+            snapshot_every: log records after which a new snapshot is written
+            fsync: fsync the log after every change (durable, slower)
+        """
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+
+        self._ids = array("q")
+        # slot -> position in _ids + 1 (0 empty, -1 tombstone)
+        self._slots = array("q", [_EMPTY]) * 8
+        self._used = 0  # occupied + tombstone slots
+        self._lock = threading.Lock()
+        self._log = None
+        self._log_records = 0
+
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+            self._load()
+            self._log = open(self._log_path, "ab")
+
+    # -- hash index -------------------------------------------------------
+
+    def _slot_of(self, chat_id: int, slots: array) -> int:
+        return ((chat_id & _MASK64) * 0x9E3779B97F4A7C15 >> 20) & (len(slots) - 1)
+
+    def _find(self, chat_id: int) -> int:
+        """Slot holding `chat_id`, or -1."""
+        slots, ids = self._slots, self._ids
+        mask = len(slots) - 1
+        i = self._slot_of(chat_id, slots)
+        while True:
+            v = slots[i]
+            if v == _EMPTY:
+                return -1
+            if v > 0 and ids[v - 1] == chat_id:
+                return i
+            i = (i + 1) & mask
+
+    def _insert_slot(self, chat_id: int, pos: int, slots: array):
+        mask = len(slots) - 1
+        i = self._slot_of(chat_id, slots)
+        while slots[i] > 0:
+            i = (i + 1) & mask
+        if slots[i] == _EMPTY:
+            self._used += 1
+        slots[i] = pos + 1
+
+    def _rebuild(self, capacity: int):
+        size = 8
+        while size < capacity:
+            size <<= 1
+        self._slots = array("q", [_EMPTY]) * size
+        self._used = 0
+        for pos, chat_id in enumerate(self._ids):
+            self._insert_slot(chat_id, pos, self._slots)
+
+    def _add(self, chat_id: int) -> bool:
+        if self._find(chat_id) >= 0:
+            return False
+        if (self._used + 1) * 2 > len(self._slots):
+            self._rebuild(max(8, (len(self._ids) + 1) * 2))
+        self._ids.append(chat_id)
+        self._insert_slot(chat_id, len(self._ids) - 1, self._slots)
+        return True
+
+    def _remove(self, chat_id: int) -> bool:
+        slot = self._find(chat_id)
+        if slot < 0:
+            return False
+        pos = self._slots[slot] - 1
+        last = len(self._ids) - 1
+        if pos != last:
+            # move the last id into the hole and repoint its slot
+            moved = self._ids[last]
+            self._slots[self._find(moved)] = pos + 1
+            self._ids[pos] = moved
+        self._ids.pop()
+        self._slots[slot] = _TOMBSTONE
+        return True
+
+    # -- persistence ------------------------------------------------------
+
+    @property
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.path, "snapshot.bin")
+
+    @property
+    def _log_path(self) -> str:
+        return os.path.join(self.path, "log.bin")
+
+    def _load(self):
+        if os.path.exists(self._snapshot_path) and os.path.getsize(self._snapshot_path) > 0:
+            with open(self._snapshot_path, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    self._ids.frombytes(mm[: len(mm) - len(mm) % self._ids.itemsize])
+        self._rebuild(len(self._ids) * 2)
+        if os.path.exists(self._log_path):
+            with open(self._log_path, "rb") as f:
+                data = f.read()
+            # a torn final record (crash mid-write) is ignored
+            usable = len(data) - len(data) % _RECORD.size
+            for op, chat_id in _RECORD.iter_unpack(data[:usable]):
+                if op == _OP_ADD:
+                    self._add(chat_id)
+                else:
+                    self._remove(chat_id)
+                self._log_records += 1
+
+    def _append(self, op: int, chat_id: int):
+        if self._log is None:
+            return
+        self._log.write(_RECORD.pack(op, chat_id))
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+        self._log_records += 1
+        if self._log_records >= self.snapshot_every:
+            self._snapshot()
+
+    def _snapshot(self):
+        tmp = self._snapshot_path + ".tmp"
+        with open(tmp, "wb") as f:
+            self._ids.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._snapshot_path)
+        # the snapshot now covers everything in the log
+        self._log.close()
+        self._log = open(self._log_path, "wb")
+        self._log_records = 0
+
+    # -- public API -------------------------------------------------------
+
+    def add(self, chat_id) -> bool:
+        """Subscribe `chat_id`; returns False if it was already subscribed."""
+        chat_id = parse_chat_id(chat_id)
+        with self._lock:
+            added = self._add(chat_id)
+            if added:
+                self._append(_OP_ADD, chat_id)
+            return added
+
+    def discard(self, chat_id) -> bool:
+        """Unsubscribe `chat_id`; returns False if it was not subscribed."""
+        chat_id = parse_chat_id(chat_id)
+        with self._lock:
+            removed = self._remove(chat_id)
+            if removed:
+                self._append(_OP_REMOVE, chat_id)
+            return removed
+
+    def __contains__(self, chat_id) -> bool:
+        try:
+            chat_id = parse_chat_id(chat_id)
+        except ValueError:
+            return False
+        with self._lock:
+            return self._find(chat_id) >= 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __bool__(self) -> bool:
+        return len(self._ids) > 0
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate chat ids as strings (over a snapshot, safe against concurrent changes)."""
+        with self._lock:
+            ids = array("q", self._ids)
+        return (str(chat_id) for chat_id in ids)
+
+    def page(self, offset: int = 0, limit: int = 100) -> List[str]:
+        with self._lock:
+            return [str(chat_id) for chat_id in self._ids[offset : offset + limit]]
+
+    def close(self):
+        with self._lock:
+            if self._log is not None:
+                self._snapshot()
+                self._log.close()
+                self._log = None
@@ -3,7 +3,9 @@ x402-Notify SDK
 Send permissionless Telegram notifications via x402 protocol.
 """
 
+from .balance import InsufficientFunds
 from .client import NotifyClient
+from .ratelimit import RateScheduler
 
 __version__ = "0.1.0"
-__all__ = ["NotifyClient"]
+__all__ = ["InsufficientFunds", "NotifyClient", "RateScheduler"]
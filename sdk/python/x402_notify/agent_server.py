@@ -2,9 +2,9 @@ from fastapi import FastAPI, HTTPException, Depends, Header
 from pydantic import BaseModel
 import sqlite3
 import os
-from typing import Optional
-from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Literal, Optional
 from .client import NotifyClient
+from .priority import PriorityExecutor
 
 
 class SubscribeIn(BaseModel):
@@ -14,21 +14,32 @@ class SubscribeIn(BaseModel):
 
 class SendIn(BaseModel):
     message: str
+    priority: Literal["high", "normal", "low"] = "normal"
 
 
 def create_agent_app(wallet_key: str,
                      gateway_url: str = "http://localhost:3000",
                      db_path: str = "./agent_server.db",
                      api_key: Optional[str] = None,
-                     workers: int = 2) -> FastAPI:
+                     workers: int = 2,
+                     rpc_url: str = "https://sepolia.base.org",
+                     chain_id: int = 84532,
+                     urgent_workers: int = 1,
+                     priority_weights: Optional[Dict[str, int]] = None) -> FastAPI:
     """Create a minimal agent FastAPI app that stores subscriptions and sends notifications.
 
     This helper is intended so developers write almost no code: install the SDK and run this app.
+
+    `/send/{user_id}` accepts a `priority` (`high`, `normal` or `low`). Each
+    priority has its own queue; the `workers` threads serve them by weighted
+    round-robin (`priority_weights`, see `x402_notify.priority`) and
+    `urgent_workers` extra threads only serve `high`, so alerts do not wait
+    behind a bulk broadcast.
     """
     app = FastAPI(title="x402 Agent Server")
 
-    client = NotifyClient(wallet_key=wallet_key, gateway_url=gateway_url)
-    executor = ThreadPoolExecutor(max_workers=workers)
+    client = NotifyClient(wallet_key=wallet_key, gateway_url=gateway_url, rpc_url=rpc_url, chain_id=chain_id)
+    executor = PriorityExecutor(workers=workers, urgent_workers=urgent_workers, weights=priority_weights)
 
     # DB init
     def init_db():
@@ -90,8 +101,12 @@ def create_agent_app(wallet_key: str,
         chat_id = get_chat_id(user_id)
         if not chat_id:
             raise HTTPException(status_code=404, detail="user not found")
-        executor.submit(_process, user_id, chat_id, payload.message)
-        return {"ok": True, "status": "queued"}
+        executor.submit(payload.priority, _process, user_id, chat_id, payload.message)
+        return {"ok": True, "status": "queued", "priority": payload.priority}
+
+    @app.get("/queue")
+    async def queue_depths(_=Depends(require_api_key)):
+        return executor.depths()
 
     @app.get("/users")
     async def list_users():
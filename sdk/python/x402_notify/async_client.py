@@ -41,8 +41,11 @@ class AsyncNotifyClient:
     async def close(self, wait: bool = True):
         return await asyncio.to_thread(self._client.close, wait)
 
-    async def get_stats(self):
-        return await asyncio.to_thread(self._client.get_stats)
+    async def get_stats(self, remote: bool = False, timeout: float = 10.0):
+        if not remote:
+            # local aggregates: no I/O, no thread hop
+            return self._client.get_stats()
+        return await asyncio.to_thread(self._client.get_stats, remote, timeout)
 
     # Context manager helpers for async with
     async def __aenter__(self):
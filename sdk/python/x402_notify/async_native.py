@@ -3,15 +3,67 @@
 This implements the same x402 flow as `NotifyClient` but uses async primitives
 so it can be integrated natively into async frameworks (FastAPI, etc.).
 """
-from typing import Optional, Any
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, List, Optional
 import asyncio
 import json
 
 import httpx
-from web3 import AsyncWeb3
-from web3.providers.async_rpc import AsyncHTTPProvider
+from web3 import AsyncHTTPProvider, AsyncWeb3
+from web3.exceptions import TransactionNotFound
 from eth_account import Account
 
+from .balance import BalanceTracker, InsufficientFunds
+from .blocktime import BlockClock
+from .fees import FeeOracle
+from .gateways import GatewayPool
+from .ratelimit import RateScheduler
+from .rpc import AsyncMultiHTTPProvider
+from .stats import NotifyStats
+from .replacement import bump_fees, nonce_consumed
+from .signing import BatchSigner, sign_transaction
+
+try:
+    import h2  # noqa: F401  (httpx's optional HTTP/2 support)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Gateway connection defaults: a handful of keep-alive sockets carry many
+# concurrent notifications instead of one socket each
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE = 10
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+DEFAULT_POOL_TIMEOUT = 10.0
+
+
+def create_http_client(
+    *,
+    http2: Optional[bool] = None,
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE,
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    read_timeout: float = DEFAULT_READ_TIMEOUT,
+    pool_timeout: float = DEFAULT_POOL_TIMEOUT,
+) -> httpx.AsyncClient:
+    """Build the pooled `httpx.AsyncClient` used for gateway requests.
+
+    Pass the result as `http_client=` to several `AsyncNotifyClient`s (e.g. one per
+    wallet) to share one connection pool; the caller then owns it and closes it.
+    `http2=None` enables HTTP/2 when the `h2` package is installed
+    (`pip install .[http2]`); over https the gateway negotiates it via ALPN and
+    requests are multiplexed on one connection, otherwise HTTP/1.1 keep-alive is used.
+    `pool_timeout` bounds how long a request waits for a free connection.
+    """
+    if http2 is None:
+        http2 = HTTP2_AVAILABLE
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections),
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout, pool=pool_timeout),
+    )
+
 
 class AsyncNotifyClient:
     def __init__(
@@ -26,9 +78,41 @@ class AsyncNotifyClient:
         gas_buffer_multiplier: float = 1.1,
         rpc_retries: int = 3,
         rpc_retry_delay: float = 1.0,
+        rate_limiter: Optional[RateScheduler] = None,
+        rate_limit_timeout: Optional[float] = None,
+        confirmation_timeout: float = 120.0,
+        receipt_poll_interval: Optional[float] = None,
+        min_confirmations: int = 1,
+        stuck_after_blocks: int = 3,
+        fee_bump_multiplier: float = 1.25,
+        max_fee_bumps: int = 5,
+        max_fee_ceiling_gwei: float = 100,
+        http_client: Optional[httpx.AsyncClient] = None,
+        w3: Optional[AsyncWeb3] = None,
+        http2: Optional[bool] = None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        pool_timeout: float = DEFAULT_POOL_TIMEOUT,
+        sign_executor: Optional[Executor] = None,
+        batch_signing: bool = False,
+        inline_signing: bool = False,
+        fee_oracle: Optional[FeeOracle] = None,
+        track_balance: bool = False,
+        balance_refresh_interval: float = 30.0,
+        low_balance_eth: float = 0.0,
+        on_low_balance=None,
+        insufficient_funds_wait: float = 0.0,
+        gateway_urls: Optional[List[str]] = None,
+        rpc_urls: Optional[List[str]] = None,
+        remote_stats_interval: float = 60.0,
     ):
-        self.gateway_url = gateway_url.rstrip("/")
-        self.rpc_url = rpc_url
+        # Gateway replicas, ordered by latency and error rate per request (see `NotifyClient`)
+        self.gateways = GatewayPool(gateway_urls or [gateway_url])
+        self.gateway_url = self.gateways.urls[0]
+        self.rpc_url = rpc_urls[0] if rpc_urls else rpc_url
+        self.rpc_urls = list(rpc_urls) if rpc_urls else [rpc_url]
         self.chain_id = chain_id
         self.wallet_key = wallet_key
 
@@ -39,33 +123,96 @@ class AsyncNotifyClient:
         self.rpc_retries = rpc_retries
         self.rpc_retry_delay = rpc_retry_delay
 
-        # Async Web3
-        self.w3 = AsyncWeb3(AsyncHTTPProvider(rpc_url))
+        # Confirmation / stuck-payment replacement (see `x402_notify.replacement`)
+        self.confirmation_timeout = confirmation_timeout
+        self.receipt_poll_interval = receipt_poll_interval
+        self.min_confirmations = min_confirmations
+        self.block_clock = BlockClock()
+        self.stuck_after_blocks = stuck_after_blocks
+        self.fee_bump_multiplier = fee_bump_multiplier
+        self.max_fee_bumps = max_fee_bumps
+        self.max_fee_ceiling_gwei = max_fee_ceiling_gwei
+
+        # Local aggregates behind `get_stats`
+        self.stats = NotifyStats(remote_interval=remote_stats_interval)
+
+        # Telegram delivery limits, enforced before paying
+        self.rate_limiter = rate_limiter
+        self.rate_limit_timeout = rate_limit_timeout
+
+        # Async Web3; a shared instance (and its provider session) is not ours to close
+        self._owns_w3 = w3 is None
+        if w3 is None:
+            w3 = AsyncWeb3(AsyncMultiHTTPProvider(self.rpc_urls) if len(self.rpc_urls) > 1 else AsyncHTTPProvider(self.rpc_url))
+        self.w3 = w3
         self.account = Account.from_key(wallet_key)
         self.wallet_address = self.account.address
 
-        # httpx client used for gateway interactions
-        self._http_client: Optional[httpx.AsyncClient] = None
+        # Cached fees and transfer gas, shared with every client on this RPC
+        self.fee_oracle = fee_oracle or FeeOracle.shared(self.rpc_urls if len(self.rpc_urls) > 1 else self.rpc_url)
+
+        # Local wallet balance for pre-flight spend checks (see `NotifyClient`)
+        self.balance: Optional[BalanceTracker] = None
+        if track_balance:
+            self.balance = BalanceTracker(balance_refresh_interval, AsyncWeb3.to_wei(low_balance_eth, "ether"), on_low_balance)
+        self.insufficient_funds_wait = insufficient_funds_wait
+
+        # httpx client used for gateway interactions; a shared one is not ours to close
+        self._http_client: Optional[httpx.AsyncClient] = http_client
+        self._owns_http_client = http_client is None
+        self._http_options = dict(
+            http2=http2,
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            pool_timeout=pool_timeout,
+        )
+
+        # Signing is CPU-bound: run it in `sign_executor` (e.g. a shared
+        # ProcessPoolExecutor) or, by default, a dedicated thread of this client
+        self.inline_signing = inline_signing
+        self.batch_signing = batch_signing
+        self._sign_executor = sign_executor
+        self._owns_sign_executor = sign_executor is None
+        self._batch_signer: Optional[BatchSigner] = None
+
+        # Locally allocated nonces, so concurrent payments never share one
+        self._nonce_lock = asyncio.Lock()
+        self._next_nonce: Optional[int] = None
 
     async def _get_http(self) -> httpx.AsyncClient:
         if not self._http_client:
-            self._http_client = httpx.AsyncClient()
+            self._http_client = create_http_client(**self._http_options)
         return self._http_client
 
     async def notify(self, chat_id: str, message: str, agent_tx: Optional[str] = None) -> Any:
+        started = asyncio.get_running_loop().time()
+        try:
+            result = await self._notify_flow(chat_id, message, agent_tx)
+        except Exception as e:
+            self.stats.record_failure(e)
+            raise
+        self.stats.record_sent(asyncio.get_running_loop().time() - started)
+        return result
+
+    async def _notify_flow(self, chat_id: str, message: str, agent_tx: Optional[str]) -> Any:
         client = await self._get_http()
-        endpoint = f"{self.gateway_url}/notify"
         payload = {"chat_id": chat_id, "message": message}
 
+        if self.rate_limiter is not None:
+            if not await self.rate_limiter.acquire_async(chat_id, timeout=self.rate_limit_timeout):
+                raise Exception(f"Rate limit wait timed out for chat {chat_id}")
+
         if agent_tx:
             headers = {"x-agent-payment-tx": agent_tx}
-            resp = await client.post(endpoint, json=payload, headers=headers, timeout=30)
+            _, resp = await self._post_notify(client, payload, headers, self._ordered())
             if resp.status_code == 200:
                 return resp.json()
             raise Exception(f"Delivery failed using agent_tx: {resp.status_code} - {resp.text}")
 
         # Step 1: request without payment
-        resp = await client.post(endpoint, json=payload, timeout=30)
+        gateway, resp = await self._post_notify(client, payload, None, self._ordered())
         if resp.status_code == 200:
             return resp.json()
         if resp.status_code != 402:
@@ -80,15 +227,95 @@ class AsyncNotifyClient:
         payment_info = accepts[0]
         pay_to = payment_info["payTo"]
         amount_eth = payment_info["maxAmountRequired"]
+        self.gateways.set_pay_to(gateway, pay_to)
 
-        tx_hash = await self._send_payment_async(pay_to, amount_eth)
+        cost = await self._reserve_funds(pay_to, amount_eth)
+        try:
+            tx_hash = await self._send_payment_async(pay_to, amount_eth)
+        except Exception:
+            if self.balance is not None:
+                self.balance.release(cost)
+                self.balance.invalidate()
+            raise
+        if self.balance is not None:
+            self.balance.spend(cost)
 
         headers = {"x-agent-payment-tx": tx_hash}
-        res_retry = await client.post(endpoint, json=payload, headers=headers, timeout=30)
+        _, res_retry = await self._post_notify(client, payload, headers, self._same_pay_to(client, gateway, pay_to, payload))
         if res_retry.status_code == 200:
             return res_retry.json()
         raise Exception(f"Delivery failed after payment: {res_retry.status_code} - {res_retry.text}")
 
+    async def _ordered(self, exclude=()) -> AsyncIterator[str]:
+        for gateway in self.gateways.ordered(exclude):
+            yield gateway
+
+    async def _post_notify(self, client: httpx.AsyncClient, payload: dict, headers: Optional[dict], gateways: AsyncIterator[str]) -> tuple:
+        """POST /notify to the first gateway answering below 500, failing over on errors; returns `(gateway, response)`."""
+        loop = asyncio.get_running_loop()
+        last_error, last = None, None
+        async for gateway in gateways:
+            started = loop.time()
+            try:
+                res = await client.post(f"{gateway}/notify", json=payload, headers=headers)
+            except httpx.TransportError as e:
+                self.gateways.record_failure(gateway)
+                last_error = e
+                continue
+            if res.status_code >= 500:
+                self.gateways.record_failure(gateway)
+                last = (gateway, res)
+                continue
+            self.gateways.record_success(gateway, loop.time() - started)
+            return gateway, res
+        if last is not None:
+            return last
+        if last_error is not None:
+            raise last_error
+        raise Exception("No gateway available")
+
+    async def _same_pay_to(self, client: httpx.AsyncClient, first: str, pay_to: str, payload: dict) -> AsyncIterator[str]:
+        # never re-pay: fail over only to replicas paid by the same wallet
+        yield first
+        async for gateway in self._ordered(exclude=[first]):
+            known = self.gateways.pay_to(gateway)
+            if known is None:
+                try:
+                    res = await client.post(f"{gateway}/notify", json=payload)
+                    accepts = res.json().get("x402", {}).get("accepts", []) if res.status_code == 402 else []
+                except (httpx.TransportError, ValueError):
+                    self.gateways.record_failure(gateway)
+                    continue
+                if not accepts:
+                    continue
+                known = accepts[0]["payTo"]
+                self.gateways.set_pay_to(gateway, known)
+            if known.lower() == pay_to.lower():
+                yield gateway
+
+    async def _payment_cost(self, to_address: str, value: int) -> int:
+        gas = self.fee_oracle.cached_gas_limit(to_address) or 21000
+        quote = self.fee_oracle.cached() or await asyncio.to_thread(self.fee_oracle.refresh)
+        fees = quote.tx_fields(self.max_fee_multiplier, AsyncWeb3.to_wei(self.max_priority_gwei, "gwei"))
+        return value + int(gas * self.gas_buffer_multiplier) * fees.get("maxFeePerGas", fees.get("gasPrice") or 0)
+
+    async def _reserve_funds(self, to_address: str, amount_eth: str) -> int:
+        if self.balance is None:
+            return 0
+        cost = await self._payment_cost(to_address, AsyncWeb3.to_wei(amount_eth, "ether"))
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.insufficient_funds_wait
+        while True:
+            if self.balance.stale():
+                self.balance.update(await self._rpc_with_retries(self.w3.eth.get_balance, self.wallet_address))
+            if self.balance.try_reserve(cost):
+                return cost
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise InsufficientFunds(cost, self.balance.available())
+            await asyncio.sleep(min(remaining, self.balance.refresh_interval, 5.0))
+            self.balance.invalidate()
+
     async def _rpc_with_retries(self, fn, *args, **kwargs):
         last_exc = None
         for _ in range(max(1, self.rpc_retries)):
@@ -100,72 +327,179 @@ class AsyncNotifyClient:
         # final attempt
         return await fn(*args, **kwargs)
 
-    async def _send_payment_async(self, to_address: str, amount_eth: str) -> str:
-        # nonce
-        nonce = await self._rpc_with_retries(self.w3.eth.get_transaction_count, self.wallet_address)
+    async def _allocate_nonce(self) -> int:
+        async with self._nonce_lock:
+            if self._next_nonce is None:
+                self._next_nonce = await self._rpc_with_retries(self.w3.eth.get_transaction_count, self.wallet_address, "pending")
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            return nonce
+
+    async def _reset_nonce(self):
+        # re-read from the chain on the next payment
+        async with self._nonce_lock:
+            self._next_nonce = None
 
+    async def _send_payment_async(self, to_address: str, amount_eth: str) -> str:
         # Convert amount to wei (accepts numeric or string)
         value = AsyncWeb3.to_wei(amount_eth, "ether")
 
-        # estimate gas
-        gas_limit = 21000
-        try:
-            gas_est = await self._rpc_with_retries(self.w3.eth.estimate_gas, {"to": to_address, "from": self.wallet_address, "value": value})
-            gas_limit = int(gas_est * self.gas_buffer_multiplier)
-        except Exception:
-            gas_limit = 21000
+        # fees and gas come from the oracle's cache; it only blocks (in a thread) when cold
+        gas = self.fee_oracle.cached_gas_limit(to_address)
+        if gas is None:
+            gas = await asyncio.to_thread(self.fee_oracle.gas_limit, to_address, value, self.wallet_address)
+        quote = self.fee_oracle.cached() or await asyncio.to_thread(self.fee_oracle.refresh)
 
+        # the nonce is taken last: a failed lookup above must not leave a gap
         tx = {
             "to": to_address,
             "value": value,
-            "gas": gas_limit,
-            "nonce": nonce,
+            "gas": int(gas * self.gas_buffer_multiplier),
+            "nonce": await self._allocate_nonce(),
             "chainId": self.chain_id,
         }
+        tx.update(quote.tx_fields(self.max_fee_multiplier, AsyncWeb3.to_wei(self.max_priority_gwei, "gwei")))
 
         try:
-            block = await self._rpc_with_retries(self.w3.eth.get_block, "pending")
-            base_fee = block.get("baseFeePerGas", None)
+            raw_tx = await self._sign(tx)
+            tx_hash_bytes = await self._rpc_with_retries(self.w3.eth.send_raw_transaction, raw_tx)
         except Exception:
-            base_fee = None
-
-        if base_fee:
-            max_priority = AsyncWeb3.to_wei(self.max_priority_gwei, "gwei")
-            max_fee = int(base_fee * self.max_fee_multiplier + max_priority)
-            tx.update({
-                "type": 2,
-                "maxPriorityFeePerGas": max_priority,
-                "maxFeePerGas": max_fee,
-            })
-        else:
-            try:
-                gas_price = await self._rpc_with_retries(self.w3.eth.gas_price)
-            except Exception:
-                gas_price = AsyncWeb3.to_wei("1", "gwei")
-            tx.update({"gasPrice": gas_price})
-
-        # sign (eth-account is synchronous)
-        signed = Account.sign_transaction(tx, self.wallet_key)
-
-        tx_hash_bytes = await self._rpc_with_retries(self.w3.eth.send_raw_transaction, signed.rawTransaction)
+            # an unbroadcast nonce would block every later payment; resync from the chain
+            await self._reset_nonce()
+            raise
         tx_hash = self.w3.to_hex(tx_hash_bytes)
 
-        receipt = await self._rpc_with_retries(self.w3.eth.wait_for_transaction_receipt, tx_hash_bytes, timeout=120)
+        tx_hash, receipt = await self._wait_for_inclusion(tx, tx_hash)
+        gas_used = receipt.get("gasUsed", 0)
+        self.stats.record_payment(value, gas_used, gas_used * receipt.get("effectiveGasPrice", 0))
         if receipt.status != 1:
             raise Exception("Payment transaction failed on-chain")
         return tx_hash
 
-    async def get_stats(self) -> Any:
-        client = await self._get_http()
-        res = await client.get(f"{self.gateway_url}/stats/{self.wallet_address}")
-        return res.json()
+    async def _sign(self, tx: dict) -> bytes:
+        if self.inline_signing:
+            return sign_transaction(tx, self.wallet_key)
+        if self._sign_executor is None:
+            self._sign_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="x402-sign")
+        if self.batch_signing:
+            if self._batch_signer is None:
+                self._batch_signer = BatchSigner(self.wallet_key, self._sign_executor)
+            return await self._batch_signer.sign(tx)
+        return await asyncio.get_running_loop().run_in_executor(self._sign_executor, sign_transaction, tx, self.wallet_key)
+
+    async def _get_receipt(self, tx_hash: str):
+        try:
+            return await self.w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            return None
+        except Exception:
+            return None
+
+    async def _block_number(self) -> Optional[int]:
+        try:
+            number = await self.w3.eth.block_number
+        except Exception:
+            return None
+        self.block_clock.observe(number)
+        return number
+
+    async def _seed_block_clock(self):
+        if self.block_clock.seeded:
+            return
+        self.block_clock.seeded = True
+        try:
+            latest = await self.w3.eth.get_block("latest")
+            span = min(10, latest["number"])
+            older = await self.w3.eth.get_block(latest["number"] - span)
+            self.block_clock.seed(latest["timestamp"] - older["timestamp"], span)
+        except Exception:
+            pass
+
+    async def _find_receipt(self, hashes: list) -> Optional[tuple]:
+        for candidate in reversed(hashes):
+            receipt = await self._get_receipt(candidate)
+            if receipt is not None:
+                return candidate, receipt
+        return None
+
+    async def _wait_for_inclusion(self, tx: dict, tx_hash: str) -> tuple:
+        """Wait until `tx` or a fee-bumped replacement has `min_confirmations`; returns `(tx_hash, receipt)` of the one that landed."""
+        hashes = [tx_hash]
+        bumps = 0
+        mined = False
+        await self._seed_block_clock()
+        current = sent_block = await self._block_number()
+        checked_block = -1
+        ceiling = AsyncWeb3.to_wei(self.max_fee_ceiling_gwei, "gwei")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.confirmation_timeout
+        while True:
+            if current is None or current != checked_block:
+                checked_block = current
+                found = await self._find_receipt(hashes)
+                mined = found is not None
+                if mined:
+                    confirmations = 1 if current is None else current - found[1]["blockNumber"] + 1
+                    if confirmations >= self.min_confirmations:
+                        return found
+
+            if loop.time() >= deadline:
+                raise Exception(f"Payment not confirmed within {self.confirmation_timeout}s (nonce {tx['nonce']}, tried {len(hashes)} tx)")
+
+            if (
+                not mined
+                and bumps < self.max_fee_bumps
+                and current is not None
+                and sent_block is not None
+                and current - sent_block >= self.stuck_after_blocks
+            ):
+                bumped = bump_fees(tx, self.fee_bump_multiplier, ceiling)
+                if bumped is not None:
+                    try:
+                        new_hash = self.w3.to_hex(await self.w3.eth.send_raw_transaction(await self._sign(bumped)))
+                    except Exception as e:
+                        if not nonce_consumed(e):
+                            print(f"[x402-Notify] Fee-bump replacement rejected: {e}")
+                    else:
+                        tx = bumped
+                        hashes.append(new_hash)
+                        bumps += 1
+                    sent_block = current
+
+            poll = self.receipt_poll_interval
+            await asyncio.sleep(self.block_clock.delay() if poll is None else poll)
+            current = await self._block_number()
+
+    async def get_stats(self, remote: bool = False, timeout: Optional[float] = 10.0) -> dict:
+        """Locally aggregated stats; with `remote`, merged with the gateway's (cached for `remote_stats_interval`)."""
+        if not remote:
+            return self.stats.snapshot()
+        if self.stats.remote_due():
+            try:
+                client = await self._get_http()
+                res = await client.get(f"{self.gateway_url}/stats/{self.wallet_address}", timeout=timeout)
+                res.raise_for_status()
+                self.stats.set_remote(res.json())
+            except Exception as e:
+                self.stats.set_remote(None, str(e))
+        return self.stats.merged()
 
     async def close(self):
-        if self._http_client:
+        self.gateways.close()
+        if self._http_client and self._owns_http_client:
             await self._http_client.aclose()
+        if self._owns_http_client:
             self._http_client = None
-        # Close web3 provider session if present
+        if self._owns_sign_executor and self._sign_executor is not None:
+            self._sign_executor.shutdown(wait=False)
+            self._sign_executor = None
+            self._batch_signer = None
+        # Close the web3 provider session, unless `w3` was passed in
+        if not self._owns_w3:
+            return
         provider = getattr(self.w3, "provider", None)
+        if isinstance(provider, AsyncMultiHTTPProvider):
+            await provider.disconnect()
         sess = getattr(provider, "session", None)
         if sess is not None:
             try:
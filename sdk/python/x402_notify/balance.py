@@ -0,0 +1,106 @@
+"""
+Local view of the paying wallet's balance.
+
+Without it, an empty wallet is only noticed when the node rejects the
+broadcast, after the gas estimate, fee lookup and signing; under load every
+queued notification repeats that. `BalanceTracker` keeps the last balance read
+from the chain (refreshed every `refresh_interval` seconds) minus the worst-case
+cost (value + gas limit * max fee) of payments in flight, so a client can
+refuse, or hold, a payment the wallet cannot cover before doing any RPC work.
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+
+class InsufficientFunds(Exception):
+    """The wallet cannot cover a payment (value plus worst-case gas)."""
+
+    def __init__(self, needed: int, available: int):
+        super().__init__(f"Insufficient wallet balance: payment needs up to {needed} wei, {available} wei available")
+        self.needed = needed
+        self.available = available
+
+
+class BalanceTracker:
+    """Thread-safe balance minus in-flight reservations.
+
+    Args:
+        refresh_interval: Seconds after which the chain balance is re-read
+        low_balance_wei: Fire `on_low_balance` when the available balance drops below this
+        on_low_balance: Called with the available balance (wei) each time it
+            crosses below `low_balance_wei`; fires again only after it recovered
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float = 30.0,
+        low_balance_wei: int = 0,
+        on_low_balance: Optional[Callable[[int], None]] = None,
+    ):
+        self.refresh_interval = refresh_interval
+        self.low_balance_wei = low_balance_wei
+        self.on_low_balance = on_low_balance
+
+        self._lock = threading.Lock()
+        self._balance: Optional[int] = None
+        self._reserved = 0
+        self._updated = 0.0
+        self._low = False
+
+    def stale(self) -> bool:
+        with self._lock:
+            return self._balance is None or time.monotonic() - self._updated >= self.refresh_interval
+
+    def invalidate(self):
+        """Force a chain read before the next reservation."""
+        with self._lock:
+            self._updated = 0.0
+
+    def update(self, balance: int):
+        """Record a balance read from the chain."""
+        with self._lock:
+            self._balance = balance
+            self._updated = time.monotonic()
+        self._check_low()
+
+    def available(self) -> Optional[int]:
+        """Last chain balance minus reservations (None before the first update)."""
+        with self._lock:
+            return None if self._balance is None else self._balance - self._reserved
+
+    def try_reserve(self, cost: int) -> bool:
+        """Reserve `cost` wei for a payment if the wallet can cover it."""
+        with self._lock:
+            if self._balance is not None and self._balance - self._reserved < cost:
+                return False
+            self._reserved += cost
+        self._check_low()
+        return True
+
+    def release(self, cost: int):
+        """Return a reservation whose payment was never broadcast."""
+        with self._lock:
+            self._reserved -= cost
+        self._check_low()
+
+    def spend(self, cost: int):
+        """A reserved payment landed: debit it until the next chain read."""
+        with self._lock:
+            self._reserved -= cost
+            if self._balance is not None:
+                self._balance -= cost
+
+    def _check_low(self):
+        with self._lock:
+            if self._balance is None:
+                return
+            available = self._balance - self._reserved
+            crossed = available < self.low_balance_wei and not self._low
+            self._low = available < self.low_balance_wei
+        if crossed and self.on_low_balance is not None:
+            try:
+                self.on_low_balance(available)
+            except Exception as e:
+                print(f"[x402-Notify] on_low_balance hook failed: {e}")
@@ -0,0 +1,75 @@
+"""
+Block cadence tracking for confirmation polling.
+
+Polling for a receipt at a fixed interval either wastes RPC calls (a 2s chain
+polled every 0.1s) or detects confirmations late. `BlockClock` learns the
+chain's block interval, first from recent block timestamps and then from the
+block heights the client observes, and tells the poller how long to sleep so
+the next check lands just after the next block is expected.
+"""
+
+import time
+from typing import Optional
+
+
+class BlockClock:
+    """EWMA estimate of the block interval plus the phase of the last seen block.
+
+    Args:
+        default_interval: Interval assumed until anything was observed
+        alpha: Weight of each new interval sample
+        slack: Fraction of the interval to wait past the expected block arrival
+        min_delay: Shortest sleep between polls
+        max_delay: Longest sleep between polls
+    """
+
+    def __init__(
+        self,
+        default_interval: float = 2.0,
+        alpha: float = 0.2,
+        slack: float = 0.1,
+        min_delay: float = 0.1,
+        max_delay: float = 15.0,
+    ):
+        self.interval = default_interval
+        self.alpha = alpha
+        self.slack = slack
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.seeded = False
+        self._last_number: Optional[int] = None
+        self._last_seen: Optional[float] = None
+
+    def seed(self, timestamp_span: float, blocks: int):
+        """Initialise the interval from two block timestamps `blocks` apart."""
+        self.seeded = True
+        if blocks > 0 and timestamp_span > 0:
+            self.interval = timestamp_span / blocks
+
+    def observe(self, block_number: Optional[int], now: Optional[float] = None):
+        """Record the chain head seen at `now`."""
+        if block_number is None:
+            return
+        now = time.monotonic() if now is None else now
+        if self._last_number is None or block_number < self._last_number:
+            # first sighting (or a reorg to a lower head): only the phase is known
+            self._last_number, self._last_seen = block_number, now
+            return
+        if block_number == self._last_number:
+            return
+        sample = (now - self._last_seen) / (block_number - self._last_number)
+        self.interval += self.alpha * (sample - self.interval)
+        self._last_number, self._last_seen = block_number, now
+
+    def delay(self, now: Optional[float] = None) -> float:
+        """Seconds to sleep so the next poll happens just after the next expected block."""
+        now = time.monotonic() if now is None else now
+        if self._last_seen is None:
+            return min(max(self.interval / 2, self.min_delay), self.max_delay)
+        expected = self._last_seen + self.interval * (1 + self.slack)
+        if expected <= now:
+            # block is overdue: check again in short steps rather than a full interval
+            delay = self.interval * 0.25
+        else:
+            delay = expected - now
+        return min(max(delay, self.min_delay), self.max_delay)
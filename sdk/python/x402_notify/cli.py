@@ -0,0 +1,207 @@
+"""
+`x402-notify` command line.
+
+    x402-notify send campaign.jsonl --checkpoint campaign.db --concurrency 32
+    cat rows.csv | x402-notify send - --format csv --chat-id 123456
+
+Rows are streamed (never loaded at once) from a JSONL file (`{"chat_id": ...,
+"message": ..., "id": ...}` per line), a CSV file with a header row, or stdin.
+`chat_id` falls back to `--chat-id`; `id` (or the row number) identifies the
+row across runs.
+
+With `--checkpoint`, every row is sent under an idempotency key backed by that
+SQLite ledger plus a payment journal next to it: re-running an interrupted
+campaign skips delivered rows and presents already-paid transactions instead
+of paying again. Re-run with the same input file (row numbers are part of the
+key when rows have no `id`).
+
+The wallet key is read from the environment (`--wallet-key-env`, default
+`AGENT_PRIVATE_KEY`), never from the command line.
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Deque, Iterator, List, Optional, TextIO, Tuple
+
+from .client import NotifyClient
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def iter_rows(stream: TextIO, fmt: str, default_chat_id: Optional[str] = None) -> Iterator[Tuple[str, str, str]]:
+    """Yield `(row_key, chat_id, message)` from a JSONL or CSV stream, one row at a time."""
+    if fmt == "csv":
+        records = ((n, row) for n, row in enumerate(csv.DictReader(stream), start=1))
+    else:
+        records = ((n, json.loads(line)) for n, line in enumerate(stream, start=1) if line.strip())
+    for n, row in records:
+        chat_id = row.get("chat_id") or default_chat_id
+        message = row.get("message")
+        if not chat_id or not message:
+            raise ValueError(f"Row {n}: needs chat_id (or --chat-id) and message")
+        row_id = row.get("id")
+        yield str(row_id if row_id is not None else f"row-{n}"), str(chat_id), message
+
+
+class Progress:
+    """Thread-safe counters and a window of recent latencies for live output."""
+
+    def __init__(self, window: int = 10000):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.submitted = 0
+        self.delivered = 0
+        self.skipped = 0
+        self.failed = 0
+        self.latencies: Deque[float] = deque(maxlen=window)
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            if ok:
+                self.delivered += 1
+                self.latencies.append(latency)
+            else:
+                self.failed += 1
+
+    def submit(self):
+        with self._lock:
+            self.submitted += 1
+
+    def skip(self):
+        with self._lock:
+            self.submitted += 1
+            self.skipped += 1
+
+    def line(self) -> str:
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            done = self.delivered + self.skipped + self.failed
+            latencies = list(self.latencies)
+            return (
+                f"[x402-notify] {done}/{self.submitted} done: {self.delivered} delivered, {self.skipped} skipped, "
+                f"{self.failed} failed | {self.delivered / elapsed if elapsed else 0.0:.1f} msg/s | "
+                f"p50 {_percentile(latencies, 50):.2f}s p99 {_percentile(latencies, 99):.2f}s"
+            )
+
+
+def send(args, out: Optional[TextIO] = None) -> int:
+    out = out or sys.stderr
+    wallet_key = os.environ.get(args.wallet_key_env)
+    if not wallet_key:
+        print(f"error: set {args.wallet_key_env} to the paying wallet's private key", file=out)
+        return 2
+
+    kwargs = dict(
+        executor_workers=args.concurrency,
+        # backpressure: reading stalls once this many rows are queued or in flight
+        max_pending=args.concurrency * 2,
+        gateway_urls=args.gateway_url,
+        rpc_urls=args.rpc_url,
+        chain_id=args.chain_id,
+    )
+    if args.checkpoint:
+        kwargs.update(ledger_path=args.checkpoint, journal_path=args.checkpoint + ".journal")
+
+    stream = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8", newline="")
+    fmt = args.format
+    if fmt == "auto":
+        fmt = "csv" if args.input.lower().endswith(".csv") else "jsonl"
+
+    progress = Progress()
+    stop = threading.Event()
+    errors = open(args.errors, "a", encoding="utf-8") if args.errors else None
+    errors_lock = threading.Lock()
+
+    def report():
+        while not stop.wait(args.stats_interval):
+            print(progress.line(), file=out, flush=True)
+
+    reporter = threading.Thread(target=report, name="x402-notify-progress", daemon=True)
+    with contextlib.ExitStack() as quiet:
+        if not args.verbose:
+            # the SDK logs every step of every payment; keep the terminal for progress
+            quiet.enter_context(contextlib.redirect_stdout(quiet.enter_context(open(os.devnull, "w"))))
+        client = NotifyClient(wallet_key, **kwargs)
+        try:
+            if client.recovery is not None:
+                # settle payments a crashed run left in flight before anything new is paid
+                client.recovery.result()
+            reporter.start()
+            for row_key, chat_id, message in iter_rows(stream, fmt, args.chat_id):
+                started = time.monotonic()
+
+                def done(future, row_key=row_key, chat_id=chat_id, message=message, started=started):
+                    error = future.exception()
+                    progress.record(time.monotonic() - started, error is None)
+                    if error is not None and errors is not None:
+                        with errors_lock:
+                            errors.write(json.dumps({"id": row_key, "chat_id": chat_id, "message": message, "error": str(error)}) + "\n")
+                            errors.flush()
+
+                key = row_key if args.checkpoint else None
+                if key is not None:
+                    entry = client.ledger.get(key)
+                    if entry and entry["status"] == "delivered":
+                        progress.skip()
+                        continue
+                client.notify(chat_id, message, background=True, idempotency_key=key, on_done=done)
+                progress.submit()
+            client.drain()
+        except KeyboardInterrupt:
+            print("[x402-notify] Interrupted: waiting for in-flight payments (re-run to resume)", file=out, flush=True)
+            client.drain()
+            return 130
+        finally:
+            stop.set()
+            client.close()
+            if stream is not sys.stdin:
+                stream.close()
+            if errors is not None:
+                errors.close()
+            print(progress.line(), file=out, flush=True)
+    return 1 if progress.failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="x402-notify", description="Send Telegram notifications paid via x402")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("send", help="stream notifications from a JSONL/CSV file or stdin")
+    p.add_argument("input", help="JSONL or CSV file, or - for stdin")
+    p.add_argument("--format", choices=("auto", "jsonl", "csv"), default="auto", help="input format (auto: by file extension)")
+    p.add_argument("--chat-id", help="chat id for rows without one")
+    p.add_argument("--gateway-url", action="append", default=None, help="gateway URL (repeat for replicas)")
+    p.add_argument("--rpc-url", action="append", default=None, help="RPC URL (repeat for several endpoints)")
+    p.add_argument("--chain-id", type=int, default=84532)
+    p.add_argument("--wallet-key-env", default="AGENT_PRIVATE_KEY", help="environment variable holding the wallet key")
+    p.add_argument("-c", "--concurrency", type=int, default=16, help="notifications in flight")
+    p.add_argument("--checkpoint", help="SQLite checkpoint; re-running with it resumes without re-paying")
+    p.add_argument("--errors", help="append failed rows (with the error) to this JSONL file")
+    p.add_argument("--stats-interval", type=float, default=5.0, help="seconds between progress lines")
+    p.add_argument("--verbose", action="store_true", help="show the SDK's per-payment logs")
+    return parser
+
+
+def main(argv: Optional[list] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.gateway_url is None:
+        args.gateway_url = [os.environ.get("X402_GATEWAY_URL", "http://localhost:3000")]
+    if args.rpc_url is None:
+        args.rpc_url = [os.environ.get("X402_RPC_URL", "https://sepolia.base.org")]
+    return send(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
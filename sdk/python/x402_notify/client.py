@@ -5,12 +5,30 @@ Handles the 402 payment flow automatically.
 
 import requests
 from web3 import Web3
+from web3.exceptions import TransactionNotFound
 from eth_account import Account
-from concurrent.futures import ThreadPoolExecutor, Future
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, Future, wait as wait_futures
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+import threading
 import time
 import atexit
 
+from .balance import BalanceTracker, InsufficientFunds
+from .blocktime import BlockClock
+from .fees import FeeOracle
+from .gateways import GatewayPool
+from .journal import PaymentJournal
+from .ledger import PaymentLedger
+from .presign import PresignedPool
+from .ratelimit import RateScheduler
+from .rpc import MultiHTTPProvider
+from .stats import NotifyStats
+from .replacement import bump_fees, nonce_consumed
+
+# Background notifications spend nearly all their time waiting on the chain and
+# the gateway, so the executor is sized for I/O, not CPU
+DEFAULT_BACKGROUND_WORKERS = 16
+
 
 class NotifyClient:
     """
@@ -28,12 +46,35 @@ class NotifyClient:
         rpc_url: str = "https://sepolia.base.org",
         chain_id: int = 84532,
         *,
-        executor_workers: int = 2,
+        executor_workers: int = DEFAULT_BACKGROUND_WORKERS,
+        max_pending: int = 1000,
         max_priority_gwei: int = 2,
         max_fee_multiplier: float = 2.0,
         gas_buffer_multiplier: float = 1.1,
         rpc_retries: int = 3,
         rpc_retry_delay: float = 1.0,
+        ledger_path: Optional[str] = None,
+        rate_limiter: Optional[RateScheduler] = None,
+        rate_limit_timeout: Optional[float] = None,
+        presign_pool_size: int = 0,
+        confirmation_timeout: float = 120.0,
+        receipt_poll_interval: Optional[float] = None,
+        min_confirmations: int = 1,
+        stuck_after_blocks: int = 3,
+        fee_bump_multiplier: float = 1.25,
+        max_fee_bumps: int = 5,
+        max_fee_ceiling_gwei: float = 100,
+        journal_path: Optional[str] = None,
+        fee_oracle: Optional[FeeOracle] = None,
+        track_balance: bool = False,
+        balance_refresh_interval: float = 30.0,
+        low_balance_eth: float = 0.0,
+        on_low_balance: Optional[Callable[[int], None]] = None,
+        insufficient_funds_wait: float = 0.0,
+        gateway_urls: Optional[List[str]] = None,
+        gateway_timeout: float = 30.0,
+        rpc_urls: Optional[List[str]] = None,
+        remote_stats_interval: float = 60.0,
     ):
         """
         Initialize the NotifyClient.
@@ -43,15 +84,66 @@ class NotifyClient:
             gateway_url: URL of the x402-Notify gateway
             rpc_url: RPC URL for the blockchain
             chain_id: Chain ID (default: Base Sepolia)
+            executor_workers: Threads running background notifications
+            max_pending: Background notifications that may be queued or running at
+                once; further `notify(..., background=True)` calls wait for a slot
+            ledger_path: SQLite file recording confirmed payments per idempotency key
+            rate_limiter: Shared `RateScheduler`; each notification waits for a per-chat
+                and global token before anything is paid
+            rate_limit_timeout: Give up (raise) after waiting this long for a token
+            presign_pool_size: Keep this many payments signed ahead of time (0 disables).
+                The pool then owns the wallet's nonces; see `x402_notify.presign`.
+            confirmation_timeout: Seconds to wait for a payment to be mined
+            receipt_poll_interval: Fixed receipt polling interval; by default polls are
+                timed to the chain's observed block cadence
+            min_confirmations: Blocks (including the inclusion block) to wait for before
+                presenting the payment; match the gateway's MIN_CONFIRMATIONS
+            stuck_after_blocks: Blocks without inclusion before the payment is
+                replaced (same nonce) with fees raised by `fee_bump_multiplier`
+            max_fee_bumps: Replacements per payment
+            max_fee_ceiling_gwei: Fee cap replacements never exceed
+            max_priority_gwei: Cap on the priority fee (the fee oracle's percentile
+                tip is paid up to this)
+            fee_oracle: Fee source; defaults to the process-wide `FeeOracle` for `rpc_url`
+            track_balance: Keep a local view of the wallet balance (re-read every
+                `balance_refresh_interval` seconds, minus payments in flight) and
+                raise `InsufficientFunds` before any RPC work when a payment cannot be covered
+            low_balance_eth: With `track_balance`, call `on_low_balance(available_wei)`
+                when the available balance drops below this
+            insufficient_funds_wait: Hold an uncovered payment this many seconds,
+                re-reading the balance, before raising `InsufficientFunds`
+            gateway_urls: Gateway replicas to route between (replaces `gateway_url`);
+                see `x402_notify.gateways`
+            gateway_timeout: Seconds to wait for a gateway response
+            rpc_urls: Several RPC endpoints (replaces `rpc_url`): reads go to the
+                fastest with hedging, broadcasts go to all; see `x402_notify.rpc`
+            remote_stats_interval: Seconds `get_stats(remote=True)` reuses the gateway's stats
+            journal_path: Append-only file journaling every payment until it is
+                delivered; unfinished entries are resumed (not re-paid) on startup,
+                see `recover_pending`
         """
-        self.gateway_url = gateway_url.rstrip("/")
-        self.rpc_url = rpc_url
+        # Gateway replicas, ordered by latency and error rate per request
+        self.gateways = GatewayPool(gateway_urls or [gateway_url])
+        self.gateway_url = self.gateways.urls[0]
+        self.gateway_timeout = gateway_timeout
+        self.rpc_url = rpc_urls[0] if rpc_urls else rpc_url
+        self.rpc_urls = list(rpc_urls) if rpc_urls else [rpc_url]
         self.chain_id = chain_id
         self.wallet_key = wallet_key
         
         # Background executor for non-blocking notify
-        self._executor = ThreadPoolExecutor(max_workers=executor_workers)
+        self._executor = ThreadPoolExecutor(max_workers=executor_workers, thread_name_prefix="x402-notify")
         self._executor_workers = executor_workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending: Set[Future] = set()
+        self._pending_lock = threading.Lock()
+
+        # Locally allocated nonces, so concurrent payments never share one
+        self._nonce_lock = threading.Lock()
+        self._next_nonce: Optional[int] = None
+        # lowest nonce a new payment may take (raised past journaled payments)
+        self._nonce_floor = 0
 
         # Fee / retry configuration
         self.max_priority_gwei = max_priority_gwei
@@ -60,93 +152,209 @@ class NotifyClient:
         self.rpc_retries = rpc_retries
         self.rpc_retry_delay = rpc_retry_delay
 
+        # Confirmation / stuck-payment replacement
+        self.confirmation_timeout = confirmation_timeout
+        self.receipt_poll_interval = receipt_poll_interval
+        self.min_confirmations = min_confirmations
+        self.block_clock = BlockClock()
+        self.stuck_after_blocks = stuck_after_blocks
+        self.fee_bump_multiplier = fee_bump_multiplier
+        self.max_fee_bumps = max_fee_bumps
+        self.max_fee_ceiling_gwei = max_fee_ceiling_gwei
+
+        # Local aggregates behind `get_stats`
+        self.stats = NotifyStats(remote_interval=remote_stats_interval)
+
+        # Paid-tx ledger backing `idempotency_key`
+        self.ledger = PaymentLedger(ledger_path) if ledger_path else None
+
+        # Crash-safe record of in-flight payments
+        self.journal = PaymentJournal(journal_path) if journal_path else None
+
+        # Telegram delivery limits, enforced before paying
+        self.rate_limiter = rate_limiter
+        self.rate_limit_timeout = rate_limit_timeout
+
         # Ensure executor is shut down on process exit
         atexit.register(self.close)
         
         # Setup Web3
-        self.w3 = Web3(Web3.HTTPProvider(rpc_url))
+        provider = MultiHTTPProvider(self.rpc_urls) if len(self.rpc_urls) > 1 else Web3.HTTPProvider(self.rpc_url)
+        self.w3 = Web3(provider)
         self.account = Account.from_key(wallet_key)
         self.wallet_address = self.account.address
-        
-        print(f"[x402-Notify] Initialized with wallet: {self.wallet_address[:10]}...")
 
-    def notify(self, chat_id: str, message: str, agent_tx: Optional[str] = None, background: bool = False) -> dict | Future:
-        endpoint = f"{self.gateway_url}/notify"
-        payload = {"chat_id": chat_id, "message": message}
+        # Cached fees and transfer gas, shared with every client on this RPC
+        self.fee_oracle = fee_oracle or FeeOracle.shared(self.rpc_urls if len(self.rpc_urls) > 1 else self.rpc_url)
 
-        # If agent already supplied a tx hash, use it directly
-        if agent_tx:
-            headers = {"x-agent-payment-tx": agent_tx}
-            print(f"[x402-Notify] Using agent-supplied tx header: {agent_tx}")
-            res = requests.post(endpoint, json=payload, headers=headers)
-            if res.status_code == 200:
-                return res.json()
-            raise Exception(f"Delivery failed using agent_tx: {res.status_code} - {res.text}")
+        # Local wallet balance for pre-flight spend checks
+        self.balance: Optional[BalanceTracker] = None
+        if track_balance:
+            self.balance = BalanceTracker(balance_refresh_interval, self.w3.to_wei(low_balance_eth, "ether"), on_low_balance)
+        self.insufficient_funds_wait = insufficient_funds_wait
 
-        # Step 1: Try without payment (expect 402)
-        print(f"[x402-Notify] Sending notification to {chat_id}...")
-        res = requests.post(endpoint, json=payload)
+        # Optional pool of payments signed ahead of time
+        self.presigner = None
+        if presign_pool_size > 0:
+            self.presigner = PresignedPool(
+                self.w3,
+                self.account,
+                chain_id,
+                size=presign_pool_size,
+                max_priority_gwei=max_priority_gwei,
+                max_fee_multiplier=max_fee_multiplier,
+                gas_buffer_multiplier=gas_buffer_multiplier,
+                fee_oracle=self.fee_oracle,
+            )
+        
+        print(f"[x402-Notify] Initialized with wallet: {self.wallet_address[:10]}...")
 
-        if res.status_code == 200:
-            # Already paid or free?
-            return res.json()
+        # Resume payments a previous process broadcast but never delivered
+        self.recovery: Optional[Future] = None
+        if self.journal is not None and self.journal.unfinished():
+            # their nonces may not be on the node yet: new payments must not take them
+            self._nonce_floor = max((e["nonce"] + 1 for e in self.journal.unfinished() if "nonce" in e), default=0)
+            self.recovery = self._executor.submit(self.recover_pending)
 
-        if res.status_code != 402:
-            raise Exception(f"Unexpected response: {res.status_code} - {res.text}")
+    def notify(
+        self,
+        chat_id: str,
+        message: str,
+        agent_tx: Optional[str] = None,
+        background: bool = False,
+        idempotency_key: Optional[str] = None,
+        on_done: Optional[Callable[[Future], None]] = None,
+        submit_timeout: Optional[float] = None,
+    ) -> dict | Future:
+        """Send a notification, paying the gateway if it answers 402.
 
-        # Step 2: Parse 402 response
-        data = res.json()
-        x402_data = data.get("x402", {})
-        accepts = x402_data.get("accepts", [])
+        Args:
+            chat_id: Telegram chat id to deliver to
+            message: Message text
+            agent_tx: Already-confirmed payment tx hash to present instead of paying
+            background: Return a Future right away and run the flow in the client's
+                executor (see `max_pending`, `wait_all`, `drain`)
+            idempotency_key: Key identifying this notification across retries. With
+                a `ledger_path` configured, a retry reuses the payment recorded for
+                the key instead of paying again.
+            on_done: With `background`, called with the finished Future
+            submit_timeout: With `background`, how long to wait for a free slot when
+                `max_pending` notifications are in flight (None waits indefinitely)
+        """
+        if background:
+            return self._submit(on_done, submit_timeout, chat_id, message, agent_tx, idempotency_key)
+        
+        # Otherwise run synchronously and return result
+        return self._notify_sync(chat_id, message, agent_tx, idempotency_key)
 
-        if not accepts:
-            raise Exception("No payment methods in 402 response")
+    def _submit(self, on_done: Optional[Callable[[Future], None]], submit_timeout: Optional[float], *args) -> Future:
+        if not self._slots.acquire(timeout=submit_timeout):
+            raise RuntimeError(f"Background queue full ({self.max_pending} notifications pending)")
+        try:
+            future = self._executor.submit(self._notify_sync, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._pending_lock:
+            self._pending.add(future)
+        future.add_done_callback(self._release_slot)
+        if on_done is not None:
+            future.add_done_callback(on_done)
+        return future
 
-        payment_info = accepts[0]
-        pay_to = payment_info["payTo"]
-        amount_eth = payment_info["maxAmountRequired"]
+    def _release_slot(self, future: Future):
+        with self._pending_lock:
+            self._pending.discard(future)
+        self._slots.release()
 
-        print(f"[x402-Notify] Payment required: {amount_eth} ETH to {pay_to[:10]}...")
+    def pending(self) -> int:
+        """Background notifications queued or running."""
+        with self._pending_lock:
+            return len(self._pending)
 
-        # Step 3: Send payment
-        tx_hash = self._send_payment(pay_to, amount_eth)
-        print(f"[x402-Notify] Payment sent: {tx_hash[:20]}...")
+    def wait_all(self, timeout: Optional[float] = None) -> Tuple[Set[Future], Set[Future]]:
+        """Wait for the background notifications submitted so far.
 
-        # Step 4: Retry with payment header (agent-paid header)
-        headers = {"x-agent-payment-tx": tx_hash}
-        res_retry = requests.post(endpoint, json=payload, headers=headers)
+        Returns `(done, not_done)` like `concurrent.futures.wait`.
+        """
+        with self._pending_lock:
+            futures = set(self._pending)
+        done, not_done = wait_futures(futures, timeout=timeout)
+        return done, not_done
 
-        if res_retry.status_code == 200:
-            print(f"[x402-Notify] ✅ Notification delivered!")
-            return res_retry.json()
-        else:
-            raise Exception(f"Delivery failed after payment: {res_retry.text}")
-        
-        # If background requested, submit sync task to executor and return a Future
-        if background:
-            future = self._executor.submit(self._notify_sync, chat_id, message, agent_tx)
-            return future
-        
-        # Otherwise run synchronously and return result
-        return self._notify_sync(chat_id, message, agent_tx)
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until no background notification is pending, including ones
+        submitted while draining. Returns False if `timeout` expired first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            _, not_done = self.wait_all(remaining)
+            if not_done:
+                return False
+            if self.pending() == 0:
+                return True
     
-    def _notify_sync(self, chat_id: str, message: str, agent_tx: Optional[str] = None) -> dict:
+    def _notify_sync(
+        self,
+        chat_id: str,
+        message: str,
+        agent_tx: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> dict:
         """Synchronous implementation of notify flow. Can be run in background by `notify(..., background=True)`."""
-        endpoint = f"{self.gateway_url}/notify"
+        started = time.monotonic()
+        try:
+            result = self._notify_flow(chat_id, message, agent_tx, idempotency_key)
+        except Exception as e:
+            self.stats.record_failure(e)
+            raise
+        self.stats.record_sent(time.monotonic() - started)
+        return result
+
+    def _notify_flow(
+        self,
+        chat_id: str,
+        message: str,
+        agent_tx: Optional[str],
+        idempotency_key: Optional[str],
+    ) -> dict:
         payload = {"chat_id": chat_id, "message": message}
+
+        if idempotency_key and self.ledger is None:
+            raise ValueError("idempotency_key requires a ledger (pass ledger_path to NotifyClient)")
+
+        # Reuse a payment already confirmed for this idempotency key
+        if idempotency_key and not agent_tx:
+            entry = self.ledger.get(idempotency_key)
+            if entry and entry["status"] == "delivered":
+                print(f"[x402-Notify] Already delivered for key {idempotency_key}")
+                return entry["result"] or {"success": True, "txHash": entry["tx_hash"], "idempotent": True}
+            if entry:
+                print(f"[x402-Notify] Reusing confirmed payment for key {idempotency_key}")
+                agent_tx = entry["tx_hash"]
+
+        # Wait for Telegram capacity before paying for a delivery it would reject
+        if self.rate_limiter is not None:
+            if not self.rate_limiter.acquire(chat_id, timeout=self.rate_limit_timeout):
+                raise Exception(f"Rate limit wait timed out for chat {chat_id}")
         
         # If agent already supplied a tx hash, use it directly
         if agent_tx:
             headers = {"x-agent-payment-tx": agent_tx}
             print(f"[x402-Notify] Using agent-supplied tx header: {agent_tx}")
-            res = requests.post(endpoint, json=payload, headers=headers)
+            # a presented tx can go to any replica: only their payTo decides if it counts
+            _, res = self._post_notify(payload, headers, self.gateways.ordered())
             if res.status_code == 200:
-                return res.json()
+                result = res.json()
+                if idempotency_key:
+                    self.ledger.record_delivery(idempotency_key, result)
+                    self._close_journaled(idempotency_key)
+                return result
             raise Exception(f"Delivery failed using agent_tx: {res.status_code} - {res.text}")
         
         # Step 1: Try without payment (expect 402)
         print(f"[x402-Notify] Sending notification to {chat_id}...")
-        res = requests.post(endpoint, json=payload)
+        gateway, res = self._post_notify(payload, None, self.gateways.ordered())
         
         if res.status_code == 200:
             # Already paid or free?
@@ -167,111 +375,408 @@ class NotifyClient:
         pay_to = payment_info["payTo"]
         amount_eth = payment_info["maxAmountRequired"]
         
+        self.gateways.set_pay_to(gateway, pay_to)
         print(f"[x402-Notify] Payment required: {amount_eth} ETH to {pay_to[:10]}...")
         
         # Step 3: Send payment
-        tx_hash = self._send_payment(pay_to, amount_eth)
+        cost = self._reserve_funds(pay_to, amount_eth)
+        entry_id = self.journal.start(chat_id, message, idempotency_key) if self.journal is not None else None
+        try:
+            tx_hash = self._send_payment(pay_to, amount_eth, entry_id)
+        except Exception as e:
+            # nothing was signed: the entry can never land, so close it
+            if entry_id is not None and self.journal.get(entry_id)["state"] == "pending":
+                self.journal.append(entry_id, "failed", error=str(e))
+            if self.balance is not None:
+                # it may or may not have been spent: re-read before the next payment
+                self.balance.release(cost)
+                self.balance.invalidate()
+            raise
+        if self.balance is not None:
+            self.balance.spend(cost)
         print(f"[x402-Notify] Payment sent: {tx_hash[:20]}...")
+        if idempotency_key:
+            self.ledger.record_payment(idempotency_key, chat_id, tx_hash)
         
         # Step 4: Retry with payment header (agent-paid header)
+        # Failover only to replicas paid by the same wallet, presenting the same tx
         headers = {"x-agent-payment-tx": tx_hash}
-        res_retry = requests.post(endpoint, json=payload, headers=headers)
+        _, res_retry = self._post_notify(payload, headers, self._same_pay_to(gateway, pay_to, payload))
         
         if res_retry.status_code == 200:
             print(f"[x402-Notify] ✅ Notification delivered!")
-            return res_retry.json()
+            result = res_retry.json()
+            if idempotency_key:
+                self.ledger.record_delivery(idempotency_key, result)
+            if entry_id is not None:
+                self.journal.append(entry_id, "delivered")
+            return result
         else:
+            # the entry stays `mined`, so the next startup retries the delivery
             raise Exception(f"Delivery failed after payment: {res_retry.text}")
 
-    def _send_payment(self, to_address: str, amount_eth: str) -> str:
-        """Send ETH payment to the gateway and wait for receipt.
-        
-        This function uses EIP-1559 fields when available and estimates gas.
+    def _close_journaled(self, idempotency_key: str):
+        # a retry of the key delivered the journaled payment: recovery must not deliver it again
+        if self.journal is None:
+            return
+        for entry in self.journal.unfinished():
+            if entry.get("idempotency_key") == idempotency_key:
+                self.journal.append(entry["id"], "delivered")
+
+    def _post_notify(self, payload: dict, headers: Optional[dict], gateways: Iterable[str]) -> tuple:
+        """POST /notify to the first gateway that answers below 500; returns `(gateway, response)`.
+
+        Connection errors, timeouts and 5xx answers fail over to the next
+        gateway. If all fail, the last 5xx response is returned (or the last
+        error raised).
         """
-        nonce = self.w3.eth.get_transaction_count(self.wallet_address)
-        
-        value = self.w3.to_wei(amount_eth, "ether")
-        
-        # Helper for RPC calls with retries
-        def _rpc_with_retries(fn, *args, **kwargs):
-            last_exc = None
-            for i in range(max(1, self.rpc_retries)):
+        last_error, last = None, None
+        for gateway in gateways:
+            started = time.monotonic()
+            try:
+                res = requests.post(f"{gateway}/notify", json=payload, headers=headers, timeout=self.gateway_timeout)
+            except requests.RequestException as e:
+                self.gateways.record_failure(gateway)
+                print(f"[x402-Notify] Gateway {gateway} unreachable: {e}")
+                last_error = e
+                continue
+            if res.status_code >= 500:
+                self.gateways.record_failure(gateway)
+                last = (gateway, res)
+                continue
+            self.gateways.record_success(gateway, time.monotonic() - started)
+            return gateway, res
+        if last is not None:
+            return last
+        if last_error is not None:
+            raise last_error
+        raise Exception("No gateway available")
+
+    def _same_pay_to(self, first: str, pay_to: str, payload: dict):
+        """`first`, then the other replicas whose payTo is `pay_to` (asking unknown ones for a 402)."""
+        yield first
+        for gateway in self.gateways.ordered(exclude=[first]):
+            known = self.gateways.pay_to(gateway)
+            if known is None:
                 try:
-                    return fn(*args, **kwargs)
-                except Exception as e:
-                    last_exc = e
-                    time.sleep(self.rpc_retry_delay)
-            # final attempt (let exceptions bubble)
-            return fn(*args, **kwargs)
-
-        # Estimate gas
-        gas_limit = 21000
-        try:
-            gas_est = _rpc_with_retries(self.w3.eth.estimate_gas, {"to": to_address, "from": self.wallet_address, "value": value})
-            gas_limit = int(gas_est * self.gas_buffer_multiplier)
-        except Exception:
-            gas_limit = 21000
-        
-        # Attempt EIP-1559 fees
+                    res = requests.post(f"{gateway}/notify", json=payload, timeout=self.gateway_timeout)
+                    accepts = res.json().get("x402", {}).get("accepts", []) if res.status_code == 402 else []
+                except (requests.RequestException, ValueError):
+                    self.gateways.record_failure(gateway)
+                    continue
+                if not accepts:
+                    continue
+                known = accepts[0]["payTo"]
+                self.gateways.set_pay_to(gateway, known)
+            if known.lower() == pay_to.lower():
+                yield gateway
+
+    def _payment_cost(self, to_address: str, value: int) -> int:
+        """Worst-case wei a payment of `value` spends (value + gas limit * max fee) at cached fees."""
+        gas = self.fee_oracle.cached_gas_limit(to_address) or 21000
+        fees = self.fee_oracle.quote().tx_fields(self.max_fee_multiplier, self.w3.to_wei(self.max_priority_gwei, "gwei"))
+        return value + int(gas * self.gas_buffer_multiplier) * fees.get("maxFeePerGas", fees.get("gasPrice") or 0)
+
+    def _reserve_funds(self, to_address: str, amount_eth: str) -> int:
+        """Reserve the worst-case cost of a payment against the tracked balance; returns it."""
+        if self.balance is None:
+            return 0
+        cost = self._payment_cost(to_address, self.w3.to_wei(amount_eth, "ether"))
+        deadline = time.monotonic() + self.insufficient_funds_wait
+        while True:
+            if self.balance.stale():
+                self.balance.update(self._rpc_with_retries(self.w3.eth.get_balance, self.wallet_address))
+            if self.balance.try_reserve(cost):
+                return cost
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise InsufficientFunds(cost, self.balance.available())
+            # held: re-read the chain in case the wallet was topped up
+            time.sleep(min(remaining, self.balance.refresh_interval, 5.0))
+            self.balance.invalidate()
+
+    def _rpc_with_retries(self, fn, *args, **kwargs):
+        """Call an RPC method, retrying transient failures."""
+        for _ in range(max(1, self.rpc_retries)):
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                time.sleep(self.rpc_retry_delay)
+        # final attempt (let exceptions bubble)
+        return fn(*args, **kwargs)
+
+    def _allocate_nonce(self) -> int:
+        with self._nonce_lock:
+            if self._next_nonce is None:
+                pending = self._rpc_with_retries(self.w3.eth.get_transaction_count, self.wallet_address, "pending")
+                self._next_nonce = max(pending, self._nonce_floor)
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            return nonce
+
+    def _reset_nonce(self):
+        # re-read from the chain on the next payment
+        with self._nonce_lock:
+            self._next_nonce = None
+
+    def _sign_payment(self, to_address: str, value: int) -> tuple:
+        """Build and sign a transfer of `value` wei; returns `(tx, raw_tx)`.
+
+        Fees and the gas limit come from the fee oracle's cache, so no RPC call
+        is made here once it is warm.
+        """
+        gas = self.fee_oracle.gas_limit(to_address, value, self.wallet_address, self._estimate_gas)
+        fees = self.fee_oracle.quote().tx_fields(self.max_fee_multiplier, self.w3.to_wei(self.max_priority_gwei, "gwei"))
+        # the nonce is taken last: a failed lookup above must not leave a gap
         tx: dict = {
             "to": to_address,
             "value": value,
-            "gas": gas_limit,
-            "nonce": nonce,
+            "gas": int(gas * self.gas_buffer_multiplier),
+            "nonce": self._allocate_nonce(),
             "chainId": self.chain_id,
         }
-        
+        tx.update(fees)
         try:
-            block = _rpc_with_retries(self.w3.eth.get_block, "pending")
-            base_fee = block.get("baseFeePerGas", None)
+            return tx, self._sign(tx)
         except Exception:
-            base_fee = None
-
-        if base_fee:
-            # Use a modest priority fee (configurable)
-            max_priority = self.w3.to_wei(self.max_priority_gwei, "gwei")
-            # max_fee = base_fee * multiplier + priority (configurable heuristic)
-            max_fee = int(base_fee * self.max_fee_multiplier + max_priority)
-            tx.update({
-                "type": 2,
-                "maxPriorityFeePerGas": max_priority,
-                "maxFeePerGas": max_fee,
-            })
-        else:
-            # Fallback to legacy gas price
-            try:
-                gas_price = self.w3.eth.gas_price
-            except Exception:
-                gas_price = self.w3.to_wei("1", "gwei")
-            tx.update({"gasPrice": gas_price})
-        
+            self._reset_nonce()
+            raise
+
+    def _estimate_gas(self, tx: dict) -> int:
+        return self._rpc_with_retries(self.w3.eth.estimate_gas, tx)
+
+    def _sign(self, tx: dict) -> bytes:
         signed = self.w3.eth.account.sign_transaction(tx, self.wallet_key)
         # web3.py naming differs between versions: support both `rawTransaction` and `raw_transaction`
         raw_tx = getattr(signed, "rawTransaction", None) or getattr(signed, "raw_transaction", None)
         if raw_tx is None:
             raise Exception("Signed transaction object missing raw bytes (rawTransaction/raw_transaction)")
-        tx_hash_bytes = _rpc_with_retries(self.w3.eth.send_raw_transaction, raw_tx)
+        return raw_tx
+
+    def _send_payment(self, to_address: str, amount_eth: str, journal_entry: Optional[str] = None) -> str:
+        """Send ETH payment to the gateway and wait for receipt."""
+        value = self.w3.to_wei(amount_eth, "ether")
+
+        if self.presigner is not None:
+            ptx = self.presigner.acquire(to_address, value)
+            tx, raw_tx = ptx.tx, ptx.raw
+        else:
+            tx, raw_tx = self._sign_payment(to_address, value)
+
+        if journal_entry is not None:
+            # journal before broadcasting: after a crash the hash is what we recover by
+            signed_hash = self.w3.to_hex(self.w3.keccak(raw_tx))
+            self.journal.append(journal_entry, "signed", tx_hash=signed_hash, nonce=tx["nonce"], tx=tx)
+
+        try:
+            tx_hash_bytes = self._rpc_with_retries(self.w3.eth.send_raw_transaction, raw_tx)
+        except Exception:
+            # an unbroadcast nonce would block every later payment; resync from the chain
+            if self.presigner is not None:
+                self.presigner.invalidate()
+            else:
+                self._reset_nonce()
+            raise
         tx_hash = self.w3.to_hex(tx_hash_bytes)
         
         print(f"[x402-Notify] Transaction broadcast: {tx_hash}")
         print(f"[x402-Notify] Waiting for confirmation (this may take 15s)...")
-        
-        try:
-            receipt = _rpc_with_retries(self.w3.eth.wait_for_transaction_receipt, tx_hash_bytes, timeout=120)
-        except Exception:
-            # Final attempt without wrapper (will raise normally)
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash_bytes, timeout=120)
-        
+
+        tx_hash, receipt = self._wait_for_inclusion(tx, tx_hash, journal_entry)
+        gas_used = receipt.get("gasUsed", 0)
+        self.stats.record_payment(value, gas_used, gas_used * receipt.get("effectiveGasPrice", 0))
         if receipt.status != 1:
             raise Exception("Payment transaction failed on-chain")
+        if journal_entry is not None:
+            self.journal.append(journal_entry, "mined", landed_tx=tx_hash)
         
         print(f"[x402-Notify] Transaction confirmed in block {receipt.blockNumber}")
         return tx_hash
 
-    def get_stats(self) -> dict:
-        """Get notification stats for this wallet."""
-        endpoint = f"{self.gateway_url}/stats/{self.wallet_address}"
-        res = requests.get(endpoint)
+    def _get_receipt(self, tx_hash: str):
+        try:
+            return self.w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            return None
+        except Exception:
+            # transient RPC failure: treat as not mined yet
+            return None
+
+    def _block_number(self) -> Optional[int]:
+        try:
+            number = self.w3.eth.block_number
+        except Exception:
+            return None
+        self.block_clock.observe(number)
+        return number
+
+    def _seed_block_clock(self):
+        """Learn the block interval from recent block timestamps (once per client)."""
+        if self.block_clock.seeded:
+            return
+        self.block_clock.seeded = True
+        try:
+            latest = self.w3.eth.get_block("latest")
+            span = min(10, latest["number"])
+            older = self.w3.eth.get_block(latest["number"] - span)
+            self.block_clock.seed(latest["timestamp"] - older["timestamp"], span)
+        except Exception:
+            pass
+
+    def _poll_delay(self) -> float:
+        if self.receipt_poll_interval is not None:
+            return self.receipt_poll_interval
+        return self.block_clock.delay()
+
+    def _find_receipt(self, hashes: list) -> Optional[tuple]:
+        # newest replacement first: it is the most likely to have landed
+        for candidate in reversed(hashes):
+            receipt = self._get_receipt(candidate)
+            if receipt is not None:
+                return candidate, receipt
+        return None
+
+    def _wait_for_inclusion(self, tx: dict, tx_hash: str, journal_entry: Optional[str] = None, earlier: tuple = ()) -> tuple:
+        """Wait until `tx` or one of its fee-bumped replacements has `min_confirmations`.
+
+        Receipts are only checked when the chain head moved, and polls are
+        timed to just after the next expected block (see `BlockClock`).
+        Returns `(tx_hash, receipt)` of the transaction that actually landed.
+        `earlier` are hashes of previous fee bumps (when resuming from the journal).
+        """
+        hashes = list(earlier) + [tx_hash]
+        bumps = 0
+        mined = False
+        self._seed_block_clock()
+        current = sent_block = self._block_number()
+        checked_block = -1
+        ceiling = self.w3.to_wei(self.max_fee_ceiling_gwei, "gwei")
+        deadline = time.monotonic() + self.confirmation_timeout
+        while True:
+            # a receipt can only appear (or disappear in a reorg) with a new head
+            if current is None or current != checked_block:
+                checked_block = current
+                found = self._find_receipt(hashes)
+                mined = found is not None
+                if mined:
+                    candidate, receipt = found
+                    confirmations = 1 if current is None else current - receipt["blockNumber"] + 1
+                    if confirmations >= self.min_confirmations:
+                        if candidate != hashes[0]:
+                            print(f"[x402-Notify] Replacement {candidate[:20]}... was mined")
+                        return candidate, receipt
+
+            if time.monotonic() >= deadline:
+                raise Exception(f"Payment not confirmed within {self.confirmation_timeout}s (nonce {tx['nonce']}, tried {len(hashes)} tx)")
+
+            if (
+                not mined
+                and bumps < self.max_fee_bumps
+                and current is not None
+                and sent_block is not None
+                and current - sent_block >= self.stuck_after_blocks
+            ):
+                bumped = bump_fees(tx, self.fee_bump_multiplier, ceiling)
+                if bumped is not None:
+                    try:
+                        raw_bumped = self._sign(bumped)
+                        if journal_entry is not None:
+                            self.journal.append(
+                                journal_entry, "replaced",
+                                tx_hash=self.w3.to_hex(self.w3.keccak(raw_bumped)), tx=bumped,
+                            )
+                        new_hash = self.w3.to_hex(self.w3.eth.send_raw_transaction(raw_bumped))
+                    except Exception as e:
+                        if not nonce_consumed(e):
+                            print(f"[x402-Notify] Fee-bump replacement rejected: {e}")
+                        # a nonce-too-low means an earlier hash landed: keep polling
+                        sent_block = current
+                    else:
+                        print(f"[x402-Notify] Payment stuck for {current - sent_block} blocks, replaced with higher fees: {new_hash}")
+                        tx = bumped
+                        hashes.append(new_hash)
+                        bumps += 1
+                        sent_block = current
+
+            time.sleep(self._poll_delay())
+            current = self._block_number()
+
+    def recover_pending(self) -> list:
+        """Resume journaled payments that never reached delivery.
+
+        Runs automatically (in the background executor, see `self.recovery`) when
+        the client starts with unfinished journal entries. For each one the
+        journaled hashes are looked up, the payment is re-broadcast and awaited
+        if it never landed, and the notification is delivered with the landed
+        tx as `agent_tx`, so nothing is paid twice. Returns the delivery results
+        (or exceptions) in journal order.
+        """
+        if self.journal is None:
+            return []
+        results = []
+        for entry in self.journal.unfinished():
+            try:
+                results.append(self._recover_entry(entry))
+            except Exception as e:
+                print(f"[x402-Notify] Recovery of journal entry {entry['id'][:8]} failed: {e}")
+                results.append(e)
+        return results
+
+    def _recover_entry(self, entry: dict) -> dict:
+        entry_id = entry["id"]
+        hashes = entry["tx_hashes"]
+        if not hashes:
+            # crashed before anything was signed: nothing was paid
+            self.journal.append(entry_id, "failed", error="interrupted before signing")
+            raise Exception("Payment was never signed")
+
+        landed = entry.get("landed_tx")
+        if not landed:
+            found = self._find_receipt(hashes)
+            if found is None:
+                tx = entry["tx"]
+                if self._rpc_with_retries(self.w3.eth.get_transaction_count, self.wallet_address, "latest") > tx["nonce"]:
+                    # the nonce went to some other transaction; none of ours can land now
+                    self.journal.append(entry_id, "failed", error="nonce consumed by another transaction")
+                    raise Exception(f"Journaled payment nonce {tx['nonce']} was consumed elsewhere")
+                try:
+                    # the node may have dropped it (or never seen it) across the restart
+                    self.w3.eth.send_raw_transaction(self._sign(tx))
+                except Exception:
+                    pass
+                found = self._wait_for_inclusion(tx, hashes[-1], entry_id, earlier=tuple(hashes[:-1]))
+            landed, receipt = found
+            if receipt["status"] != 1:
+                self.journal.append(entry_id, "failed", error="payment reverted", landed_tx=landed)
+                raise Exception("Payment transaction failed on-chain")
+            self.journal.append(entry_id, "mined", landed_tx=landed)
+
+        print(f"[x402-Notify] Resuming journaled payment {landed[:20]}... for chat {entry['chat_id']}")
+        key = entry.get("idempotency_key")
+        if key and self.ledger is not None:
+            # a retry of the same key must find this payment instead of paying again
+            self.ledger.record_payment(key, entry["chat_id"], landed)
+        result = self._notify_sync(entry["chat_id"], entry["message"], agent_tx=landed, idempotency_key=key if self.ledger is not None else None)
+        if self.journal.get(entry_id) is not None:
+            # (with a ledger the delivery above already closed it)
+            self.journal.append(entry_id, "delivered")
+        return result
+
+    def get_stats(self, remote: bool = False, timeout: float = 10.0) -> dict:
+        """Notification stats for this client, aggregated locally.
+
+        Returns messages sent, failures by reason, payments, ETH spent (value
+        and fees), gas used and delivery latency percentiles. With `remote`, the
+        gateway's `/stats/{wallet}` answer is merged in under `"remote"`; it is
+        fetched at most once per `remote_stats_interval`.
+        """
+        if not remote:
+            return self.stats.snapshot()
+        return self.stats.merged_with(lambda: self._fetch_remote_stats(timeout))
+
+    def _fetch_remote_stats(self, timeout: float) -> dict:
+        res = requests.get(f"{self.gateway_url}/stats/{self.wallet_address}", timeout=timeout)
+        res.raise_for_status()
         return res.json()
 
     def close(self, wait: bool = True) -> None:
@@ -284,6 +789,9 @@ class NotifyClient:
             self._executor.shutdown(wait=wait)
         except Exception:
             pass
+        if self.presigner is not None:
+            self.presigner.close()
+        self.gateways.close()
 
     def __enter__(self):
         return self
@@ -0,0 +1,180 @@
+"""
+Message coalescing for NotifyClient.
+
+Every notification is a separate paid transaction. `CoalescingNotifier` buffers
+messages per chat for a short window and sends each burst as a single digest
+message (one payment), splitting only when the digest would exceed Telegram's
+4096-character limit or `max_messages`.
+
+Usage:
+
+client = NotifyClient(wallet_key="0x...")
+notifier = CoalescingNotifier(client, window=3.0)
+notifier.notify("123", "ETH above $4,000")
+notifier.notify("123", "ETH below $4,000")   # same payment as the first one
+...
+notifier.close()  # flush pending digests
+"""
+
+import re
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+# Telegram's maximum message length
+TELEGRAM_MAX_CHARS = 4096
+
+_TAG = re.compile(r"<[^>]*>")
+_PARTIAL_ENTITY = re.compile(r"&[#\w]*$")
+
+
+class _Batch:
+    def __init__(self):
+        self.messages: List[str] = []
+        self.futures: List[Future] = []
+        self.chars = 0
+        self.timer: Optional[threading.Timer] = None
+
+
+class CoalescingNotifier:
+    """Buffers messages per `chat_id` and sends them as one digest per window.
+
+    Args:
+        client: A `NotifyClient` (anything with `notify(chat_id, message, background=True)`)
+        window: Seconds to wait for more messages after the first one in a burst
+        max_messages: Send immediately once a digest holds this many messages
+        max_chars: Digest size limit (Telegram allows 4096 characters)
+        separator: Text placed between messages in a digest
+    """
+
+    def __init__(
+        self,
+        client,
+        window: float = 2.0,
+        max_messages: int = 20,
+        max_chars: int = TELEGRAM_MAX_CHARS,
+        separator: str = "\n\n",
+    ):
+        self.client = client
+        self.window = window
+        self.max_messages = max_messages
+        self.max_chars = max_chars
+        self.separator = separator
+
+        self._lock = threading.Lock()
+        self._batches: Dict[str, _Batch] = {}
+        self._closed = False
+
+    def _clip(self, message: str) -> str:
+        if len(message) <= self.max_chars:
+            return message
+        # the gateway sends with parse_mode=HTML: a cut through a tag or an entity
+        # is rejected by Telegram after the payment, so drop the markup and never
+        # end on half an entity
+        text = _TAG.sub("", message)
+        if len(text) <= self.max_chars:
+            return text
+        return _PARTIAL_ENTITY.sub("", text[: self.max_chars - 1]) + "…"
+
+    def notify(self, chat_id: str, message: str) -> Future:
+        """Queue `message` for `chat_id`.
+
+        Returns a Future resolving to the gateway response of the digest that
+        carried the message.
+        """
+        if self._closed:
+            raise RuntimeError("CoalescingNotifier is closed")
+        message = self._clip(message)
+        future: Future = Future()
+        to_send = None
+        with self._lock:
+            batch = self._batches.get(chat_id)
+            if batch is not None and batch.chars + len(self.separator) + len(message) > self.max_chars:
+                # would not fit into one Telegram message: ship what we have first
+                to_send = self._take(chat_id)
+                batch = None
+            if batch is None:
+                batch = _Batch()
+                self._batches[chat_id] = batch
+                batch.timer = threading.Timer(self.window, self._expire, args=(chat_id, batch))
+                batch.timer.daemon = True
+                batch.timer.start()
+            if batch.messages:
+                batch.chars += len(self.separator)
+            batch.messages.append(message)
+            batch.futures.append(future)
+            batch.chars += len(message)
+            if len(batch.messages) >= self.max_messages:
+                full = self._take(chat_id)
+            else:
+                full = None
+        if to_send is not None:
+            self._send(chat_id, to_send)
+        if full is not None:
+            self._send(chat_id, full)
+        return future
+
+    def _take(self, chat_id: str) -> Optional[_Batch]:
+        # caller holds self._lock
+        batch = self._batches.pop(chat_id, None)
+        if batch is not None and batch.timer is not None:
+            batch.timer.cancel()
+        return batch
+
+    def _send(self, chat_id: str, batch: _Batch):
+        digest = self.separator.join(batch.messages)
+        if len(batch.messages) > 1:
+            print(f"[x402-Notify] Coalesced {len(batch.messages)} messages for {chat_id} into one notification")
+        try:
+            result = self.client.notify(chat_id, digest, background=True)
+        except Exception as e:
+            for f in batch.futures:
+                f.set_exception(e)
+            return
+
+        def _done(fut: Future):
+            exc = fut.exception()
+            for f in batch.futures:
+                if exc is not None:
+                    f.set_exception(exc)
+                else:
+                    f.set_result(fut.result())
+
+        if isinstance(result, Future):
+            result.add_done_callback(_done)
+        else:
+            for f in batch.futures:
+                f.set_result(result)
+
+    def _expire(self, chat_id: str, batch: _Batch):
+        with self._lock:
+            # a timer cancelled too late must not flush the chat's next batch
+            if self._batches.get(chat_id) is not batch:
+                return
+            self._take(chat_id)
+        self._send(chat_id, batch)
+
+    def flush(self, chat_id: Optional[str] = None):
+        """Send pending digests now (for one chat, or all chats)."""
+        with self._lock:
+            chat_ids = [chat_id] if chat_id is not None else list(self._batches)
+            batches = [(c, self._take(c)) for c in chat_ids]
+        for c, batch in batches:
+            if batch is not None and batch.messages:
+                self._send(c, batch)
+
+    def pending(self) -> int:
+        """Number of buffered messages not yet sent."""
+        with self._lock:
+            return sum(len(b.messages) for b in self._batches.values())
+
+    def close(self):
+        """Flush everything; further `notify` calls raise."""
+        self._closed = True
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
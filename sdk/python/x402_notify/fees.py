@@ -0,0 +1,211 @@
+"""
+Process-wide fee oracle.
+
+Every payment used to look up the pending block (plus `gas_price` on legacy
+chains) and estimate gas for what is always a plain ETH transfer, and paid a
+fixed 2 gwei tip. `FeeOracle` refreshes fees on a background timer from
+`eth_feeHistory`: the next block's base fee and a percentile of the priority
+fees recently paid, so a payment pays what gets included now rather than a
+constant. Gas estimates for transfers are memoized per destination.
+
+One oracle per RPC URL is shared by every client in the process
+(`FeeOracle.shared`); a payment then reads cached fees without any RPC call.
+A failed refresh keeps the last good quote until it is `max_age` old, and the
+background refresh stops after `idle_after` seconds without a quote being read.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence, Union
+
+from web3 import Web3
+
+PLAIN_TRANSFER_GAS = 21000
+
+
+class FeeQuote:
+    """Fees as of `updated` (time.monotonic()). `base_fee` is None on legacy chains."""
+
+    __slots__ = ("base_fee", "priority_fee", "gas_price", "updated")
+
+    def __init__(self, base_fee: Optional[int], priority_fee: int, gas_price: Optional[int], updated: float):
+        self.base_fee = base_fee
+        self.priority_fee = priority_fee
+        self.gas_price = gas_price
+        self.updated = updated
+
+    def tx_fields(self, max_fee_multiplier: float, max_priority_wei: Optional[int] = None) -> dict:
+        """Fee fields for a transaction: EIP-1559 when the chain has a base fee."""
+        if self.base_fee:
+            priority = self.priority_fee if max_priority_wei is None else min(self.priority_fee, max_priority_wei)
+            return {
+                "type": 2,
+                "maxPriorityFeePerGas": priority,
+                "maxFeePerGas": int(self.base_fee * max_fee_multiplier + priority),
+            }
+        return {"gasPrice": self.gas_price}
+
+
+class FeeOracle:
+    """Background-refreshed base and priority fees plus memoized transfer gas.
+
+    Args:
+        w3: Web3 instance (synchronous) used for the lookups
+        percentile: Priority-fee percentile of each block's transactions to pay
+        blocks: Blocks of fee history the priority fee is taken over (median)
+        refresh_interval: Seconds between background refreshes
+        max_age: A quote older than this is refreshed in the caller's thread
+            (e.g. when the background refresh keeps failing)
+        min_priority_gwei: Floor for the priority fee
+        idle_after: Seconds without any quote being read after which the
+            background refresh stops (it restarts on the next read)
+    """
+
+    _shared: Dict[object, "FeeOracle"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        w3,
+        *,
+        percentile: float = 50.0,
+        blocks: int = 10,
+        refresh_interval: float = 2.0,
+        max_age: float = 30.0,
+        min_priority_gwei: float = 0.001,
+        idle_after: float = 60.0,
+    ):
+        self.w3 = w3
+        self.percentile = percentile
+        self.blocks = blocks
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.min_priority_wei = Web3.to_wei(min_priority_gwei, "gwei")
+        self.idle_after = idle_after
+        self._last_read = time.monotonic()
+
+        self._lock = threading.Lock()
+        self._quote: Optional[FeeQuote] = None
+        self._gas: Dict[str, int] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @classmethod
+    def shared(cls, rpc_url: Union[str, Sequence[str]], **kwargs) -> "FeeOracle":
+        """The process-wide oracle for `rpc_url` (created on first use with `kwargs`).
+
+        A list of URLs is read through a `MultiHTTPProvider`.
+        """
+        key = rpc_url if isinstance(rpc_url, str) else tuple(rpc_url)
+        with cls._shared_lock:
+            oracle = cls._shared.get(key)
+            if oracle is None:
+                if isinstance(key, str):
+                    provider = Web3.HTTPProvider(key)
+                else:
+                    from .rpc import MultiHTTPProvider
+
+                    provider = MultiHTTPProvider(key)
+                oracle = cls._shared[key] = cls(Web3(provider), **kwargs)
+            return oracle
+
+    # -- fees -----------------------------------------------------------------
+
+    def _fetch(self) -> FeeQuote:
+        """Current fees from the chain; raises when the RPC cannot tell."""
+        try:
+            history = self.w3.eth.fee_history(self.blocks, "latest", [self.percentile])
+            # the last base fee is the one the next block will charge
+            base_fee = history["baseFeePerGas"][-1]
+            rewards = sorted(r[0] for r in history.get("reward") or [] if r)
+            priority = rewards[len(rewards) // 2] if rewards else 0
+            return FeeQuote(base_fee, max(priority, self.min_priority_wei), None, time.monotonic())
+        except Exception:
+            pass
+        # no eth_feeHistory: fall back to the pending block; only a block without
+        # a base fee (a legacy chain) selects a legacy gas price
+        base_fee = self.w3.eth.get_block("pending").get("baseFeePerGas", None)
+        if base_fee:
+            try:
+                priority = self.w3.eth.max_priority_fee
+            except Exception:
+                priority = self.min_priority_wei
+            return FeeQuote(base_fee, max(priority, self.min_priority_wei), None, time.monotonic())
+        return FeeQuote(None, 0, self.w3.eth.gas_price, time.monotonic())
+
+    def refresh(self) -> FeeQuote:
+        """Fetch fees now; on failure the last good quote is kept and the error raised."""
+        quote = self._fetch()
+        with self._lock:
+            self._quote = quote
+        return quote
+
+    def cached(self) -> Optional[FeeQuote]:
+        """The current quote if it is younger than `max_age`, without any RPC call."""
+        with self._lock:
+            self._last_read = time.monotonic()
+            quote = self._quote
+        self._start()
+        if quote is None or time.monotonic() - quote.updated > self.max_age:
+            return None
+        return quote
+
+    def quote(self) -> FeeQuote:
+        """Current fees; only blocks on RPC before the first refresh or when stale."""
+        return self.cached() or self.refresh()
+
+    # -- gas ------------------------------------------------------------------
+
+    def cached_gas_limit(self, to_address: str) -> Optional[int]:
+        with self._lock:
+            return self._gas.get(to_address.lower())
+
+    def gas_limit(self, to_address: str, value: int, from_address: str, estimate: Optional[Callable] = None) -> int:
+        """Gas estimate for a transfer of `value` to `to_address`, memoized per destination.
+
+        `estimate` defaults to `w3.eth.estimate_gas`. A failed estimate returns
+        21000 and is not memoized.
+        """
+        cached = self.cached_gas_limit(to_address)
+        if cached is not None:
+            return cached
+        try:
+            gas = int((estimate or self.w3.eth.estimate_gas)({"to": to_address, "from": from_address, "value": value}))
+        except Exception:
+            return PLAIN_TRANSFER_GAS
+        with self._lock:
+            self._gas[to_address.lower()] = gas
+        return gas
+
+    # -- background refresh -----------------------------------------------------
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            thread = self._thread = threading.Thread(target=self._run, name="x402-fee-oracle", daemon=True)
+        thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                if time.monotonic() - self._last_read > self.idle_after:
+                    # nothing is being paid: stop polling until the next read
+                    if self._thread is threading.current_thread():
+                        self._thread = None
+                    return
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"[x402-Notify] Fee oracle refresh failed: {e}")
+            self._stop.wait(self.refresh_interval)
+
+    def close(self):
+        """Stop the background refresh (it restarts on the next `quote`)."""
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
@@ -0,0 +1,171 @@
+"""
+Gateway selection across replicas.
+
+A client given several gateway URLs routes each request to the replica with
+the best score: the EWMA of its response latency plus a penalty for its
+recent error rate. Connection errors, timeouts and 5xx responses count as
+errors; a replica failing `down_after` times in a row is skipped for
+`cooldown` seconds (unless every replica is down). A background thread
+health-checks the replicas (`GET /`) so a recovered one is picked up again
+without sacrificing a real notification to find out.
+
+The pool also remembers each replica's `payTo` from its 402 answers. After a
+payment, delivery may only fail over to replicas paid by the same wallet: the
+paid tx hash is presented there instead of paying again.
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import requests
+
+
+class GatewayState:
+    __slots__ = ("url", "latency", "error_rate", "failures", "down_until", "pay_to")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.failures = 0
+        self.down_until = 0.0
+        self.pay_to: Optional[str] = None
+
+
+class GatewayPool:
+    """Latency/error-aware ordering of gateway replicas.
+
+    Args:
+        urls: Gateway base URLs
+        alpha: Weight of each new latency / error sample
+        error_penalty: Seconds added to a replica's score at a 100% error rate
+        down_after: Consecutive failures before a replica is skipped
+        cooldown: Seconds a failing replica is skipped
+        health_interval: Seconds between background health checks (only with
+            more than one replica)
+        health_timeout: Timeout of a health check
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        *,
+        alpha: float = 0.3,
+        error_penalty: float = 5.0,
+        down_after: int = 2,
+        cooldown: float = 30.0,
+        health_interval: float = 15.0,
+        health_timeout: float = 5.0,
+    ):
+        self._states: Dict[str, GatewayState] = {}
+        for url in urls:
+            url = url.rstrip("/")
+            self._states.setdefault(url, GatewayState(url))
+        if not self._states:
+            raise ValueError("At least one gateway URL is required")
+        self.alpha = alpha
+        self.error_penalty = error_penalty
+        self.down_after = down_after
+        self.cooldown = cooldown
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def urls(self) -> List[str]:
+        return list(self._states)
+
+    def _score(self, state: GatewayState) -> float:
+        # unmeasured replicas score 0 so each gets tried
+        return (state.latency or 0.0) + state.error_rate * self.error_penalty
+
+    def ordered(self, exclude: Iterable[str] = ()) -> List[str]:
+        """Replicas best first; ones in their cooldown go last."""
+        self._start()
+        excluded = set(exclude)
+        now = time.monotonic()
+        with self._lock:
+            states = [s for s in self._states.values() if s.url not in excluded]
+            states.sort(key=lambda s: (s.down_until > now, self._score(s)))
+            return [s.url for s in states]
+
+    def record_success(self, url: str, latency: float):
+        with self._lock:
+            state = self._states[url]
+            state.latency = latency if state.latency is None else (1 - self.alpha) * state.latency + self.alpha * latency
+            state.error_rate *= 1 - self.alpha
+            state.failures = 0
+            state.down_until = 0.0
+
+    def record_failure(self, url: str):
+        with self._lock:
+            state = self._states[url]
+            state.error_rate = (1 - self.alpha) * state.error_rate + self.alpha
+            state.failures += 1
+            if state.failures >= self.down_after:
+                state.down_until = time.monotonic() + self.cooldown
+
+    def pay_to(self, url: str) -> Optional[str]:
+        with self._lock:
+            return self._states[url].pay_to
+
+    def set_pay_to(self, url: str, pay_to: str):
+        with self._lock:
+            self._states[url].pay_to = pay_to
+
+    def stats(self) -> List[dict]:
+        """Per-replica latency EWMA, error rate and state, best first."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "url": s.url,
+                    "latency": s.latency,
+                    "error_rate": s.error_rate,
+                    "down": s.down_until > now,
+                    "pay_to": s.pay_to,
+                }
+                for s in sorted(self._states.values(), key=self._score)
+            ]
+
+    # -- health checks ----------------------------------------------------------
+
+    def check_health(self):
+        """Probe every replica once (`GET /`)."""
+        for url in self.urls:
+            started = time.monotonic()
+            try:
+                res = requests.get(url + "/", timeout=self.health_timeout)
+            except requests.RequestException:
+                self.record_failure(url)
+                continue
+            if res.status_code >= 500:
+                self.record_failure(url)
+            else:
+                self.record_success(url, time.monotonic() - started)
+
+    def _start(self):
+        if self._thread is not None or len(self._states) < 2:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="x402-gateway-health", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.health_interval):
+            try:
+                self.check_health()
+            except Exception as e:
+                print(f"[x402-Notify] Gateway health check failed: {e}")
+
+    def close(self):
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=self.health_timeout + 1)
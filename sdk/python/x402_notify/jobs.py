@@ -0,0 +1,162 @@
+"""
+Helpers for awaiting queued notification jobs.
+
+Services that enqueue jobs with `x402_notify.queue.enqueue_notify` and receive
+worker callbacks on `/jobs/{job_id}/update` (see `archive/dev_service`) expose
+job status as server-sent events on `/jobs/events`. These helpers subscribe to
+many job ids over one connection and return when all of them are finished or
+failed, instead of polling `GET /jobs/{job_id}` per job.
+
+Usage:
+
+from x402_notify.jobs import wait_for_job
+job = wait_for_job("http://localhost:8001", job_id, timeout=180)
+print(job["status"], job["result"])
+"""
+
+import json
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+
+TERMINAL_STATUSES = ("finished", "failed")
+
+
+def _headers(api_key: Optional[str]) -> dict:
+    headers = {"Accept": "text/event-stream"}
+    if api_key:
+        headers["x-api-key"] = api_key
+    return headers
+
+
+def _parse_sse(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """Yield `(event, data)` pairs from an iterable of SSE lines.
+
+    Comment lines (keepalives) are reported as `("comment", "")` so callers can
+    check their deadline on an otherwise idle stream.
+    """
+    event, data = "message", []
+    for line in lines:
+        if line == "":
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+        elif line.startswith(":"):
+            yield "comment", ""
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].lstrip())
+
+
+def wait_for_jobs(
+    service_url: str,
+    job_ids: List[str],
+    timeout: float = 180.0,
+    api_key: Optional[str] = None,
+) -> Dict[str, dict]:
+    """Block until every job is finished or failed and return the jobs by id.
+
+    Raises TimeoutError if some jobs are still pending after `timeout` seconds.
+    """
+    pending = set(job_ids)
+    jobs: Dict[str, dict] = {}
+    if not pending:
+        return jobs
+
+    deadline = time.monotonic() + timeout
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Timed out waiting for jobs: {sorted(pending)}")
+        try:
+            with requests.post(
+                f"{service_url.rstrip('/')}/jobs/events",
+                json={"job_ids": sorted(pending)},
+                headers=_headers(api_key),
+                stream=True,
+                timeout=(10, remaining),
+            ) as res:
+                res.raise_for_status()
+                for event, data in _parse_sse(res.iter_lines(decode_unicode=True)):
+                    if event == "done" or time.monotonic() >= deadline:
+                        break
+                    if event != "job":
+                        continue
+                    job = json.loads(data)
+                    jobs[job["job_id"]] = {**jobs.get(job["job_id"], {}), **job}
+                    if job.get("status") in TERMINAL_STATUSES:
+                        pending.discard(job["job_id"])
+                    if not pending:
+                        break
+        except (requests.ConnectionError, requests.Timeout):
+            # Stream dropped or idle past the deadline; reconnect while time is left
+            time.sleep(min(1.0, max(0.0, deadline - time.monotonic())))
+    return jobs
+
+
+def wait_for_job(service_url: str, job_id: str, timeout: float = 180.0, api_key: Optional[str] = None) -> dict:
+    """Block until `job_id` is finished or failed and return the job record."""
+    return wait_for_jobs(service_url, [job_id], timeout=timeout, api_key=api_key)[job_id]
+
+
+async def wait_for_jobs_async(
+    service_url: str,
+    job_ids: List[str],
+    timeout: float = 180.0,
+    api_key: Optional[str] = None,
+) -> Dict[str, dict]:
+    """Async variant of `wait_for_jobs` (requires httpx)."""
+    import asyncio
+
+    import httpx
+
+    pending = set(job_ids)
+    jobs: Dict[str, dict] = {}
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    async def _consume(client: httpx.AsyncClient):
+        async with client.stream(
+            "POST",
+            f"{service_url.rstrip('/')}/jobs/events",
+            json={"job_ids": sorted(pending)},
+            headers=_headers(api_key),
+        ) as res:
+            res.raise_for_status()
+            lines: List[str] = []
+            async for line in res.aiter_lines():
+                lines.append(line)
+                if line != "":
+                    continue
+                for event, data in _parse_sse(lines):
+                    if event != "job":
+                        continue
+                    job = json.loads(data)
+                    jobs[job["job_id"]] = {**jobs.get(job["job_id"], {}), **job}
+                    if job.get("status") in TERMINAL_STATUSES:
+                        pending.discard(job["job_id"])
+                lines = []
+                if not pending:
+                    return
+
+    async with httpx.AsyncClient(timeout=httpx.Timeout(10.0, read=None)) as client:
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise TimeoutError(f"Timed out waiting for jobs: {sorted(pending)}")
+            try:
+                await asyncio.wait_for(_consume(client), timeout=remaining)
+            except asyncio.TimeoutError:
+                continue
+            except httpx.TransportError:
+                # Stream dropped; reconnect while time is left
+                await asyncio.sleep(min(1.0, max(0.0, deadline - loop.time())))
+    return jobs
+
+
+async def wait_for_job_async(service_url: str, job_id: str, timeout: float = 180.0, api_key: Optional[str] = None) -> dict:
+    """Async variant of `wait_for_job` (requires httpx)."""
+    return (await wait_for_jobs_async(service_url, [job_id], timeout=timeout, api_key=api_key))[job_id]
@@ -0,0 +1,139 @@
+"""
+Append-only journal of in-flight payments.
+
+A crash between broadcasting a payment and delivering the notification used
+to lose the tx hash, so the message was paid for again after a restart. With a
+journal, NotifyClient appends (and fsyncs) a record at each step:
+
+  pending    chat_id, message, hash, idempotency key   before the payment is signed
+  signed     tx hash, nonce, tx fields                 before the tx is broadcast
+  replaced   new tx hash, tx fields                    before a fee-bump replacement
+  mined      landed tx hash (`landed_tx`)              once confirmed
+  delivered                                            after the gateway accepted it
+  failed     error                                     when the flow gave up
+
+On startup, entries that never reached `delivered`/`failed` are resumed: the
+client looks up the journaled hashes (a few RPC calls), waits for inclusion if
+needed, and delivers through the `agent_tx` path instead of paying again.
+
+One JSON object per line; the last record of an entry wins. Finished entries
+are dropped from memory right away and from the file when the journal is
+compacted: on open and after every `compact_every` finished entries.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from typing import Dict, List, Optional
+
+FINISHED_STATES = ("delivered", "failed")
+
+
+def message_hash(message: str) -> str:
+    return hashlib.sha256(message.encode("utf-8")).hexdigest()
+
+
+class PaymentJournal:
+    """Args:
+        path: Journal file (created if missing)
+        fsync: fsync after every record (the point of the journal; disable only in tests)
+        compact_every: Finished entries after which the file is rewritten
+    """
+
+    def __init__(self, path: str, fsync: bool = True, compact_every: int = 1000):
+        self.path = path
+        self.fsync = fsync
+        self.compact_every = compact_every
+        self._finished = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._entries = self._load()
+        self.compact()
+
+    def _load(self) -> Dict[str, dict]:
+        entries: Dict[str, dict] = {}
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # torn final line from a crash mid-write
+                    continue
+                self._apply(entries, record)
+        return entries
+
+    @staticmethod
+    def _apply(entries: Dict[str, dict], record: dict):
+        # fold a record into its entry, remembering every tx hash ever journaled
+        entry = entries.setdefault(record["id"], {"id": record["id"], "tx_hashes": []})
+        if record.get("tx_hash") and record["tx_hash"] not in entry["tx_hashes"]:
+            entry["tx_hashes"].append(record["tx_hash"])
+        entry.update(record)
+
+    def _write(self, f, record: dict):
+        f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def compact(self):
+        """Rewrite the journal keeping only unfinished entries."""
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        # caller holds the lock
+        self._entries = {k: e for k, e in self._entries.items() if e.get("state") not in FINISHED_STATES}
+        self._finished = 0
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in self._entries.values():
+                hashes = entry.get("tx_hashes", [])
+                base = {k: v for k, v in entry.items() if k not in ("tx_hashes", "tx_hash")}
+                if not hashes:
+                    self._write(f, base)
+                for tx_hash in hashes:
+                    self._write(f, dict(base, tx_hash=tx_hash))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def append(self, entry_id: str, state: str, **fields):
+        """Durably record that entry `entry_id` reached `state`."""
+        record = {"id": entry_id, "state": state}
+        record.update({k: v for k, v in fields.items() if v is not None})
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                self._write(f, record)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            if state in FINISHED_STATES:
+                # nothing left to recover: keep neither the message nor the tx around
+                self._entries.pop(entry_id, None)
+                self._finished += 1
+                if self._finished >= self.compact_every:
+                    self._compact()
+            else:
+                self._apply(self._entries, record)
+
+    def start(self, chat_id: str, message: str, idempotency_key: Optional[str] = None) -> str:
+        """Open a journal entry for a notification about to be paid; returns its id."""
+        entry_id = uuid.uuid4().hex
+        self.append(
+            entry_id, "pending",
+            chat_id=chat_id, message=message, message_hash=message_hash(message), idempotency_key=idempotency_key,
+        )
+        return entry_id
+
+    def get(self, entry_id: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(entry_id)
+            return dict(entry) if entry else None
+
+    def unfinished(self) -> List[dict]:
+        """Entries that never reached `delivered` or `failed`."""
+        with self._lock:
+            return [dict(e) for e in self._entries.values() if e.get("state") not in FINISHED_STATES]
@@ -0,0 +1,88 @@
+"""
+Local ledger of paid notifications.
+
+The ledger maps an idempotency key to the payment tx hash that was confirmed for
+it, so a retried notification can be delivered with the `x-agent-payment-tx`
+header instead of paying (and waiting for confirmation) a second time.
+"""
+
+import json
+import sqlite3
+from typing import Optional
+
+
+class PaymentLedger:
+    """SQLite-backed map of idempotency key -> confirmed payment.
+
+    Entries move from `paid` (payment confirmed, delivery pending) to
+    `delivered` (gateway accepted the message).
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_db(self):
+        conn = self._connect()
+        cur = conn.cursor()
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS payments (
+                idempotency_key TEXT PRIMARY KEY,
+                chat_id TEXT NOT NULL,
+                tx_hash TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                created_at INTEGER DEFAULT (strftime('%s','now')),
+                updated_at INTEGER DEFAULT (strftime('%s','now'))
+            )
+            """
+        )
+        conn.commit()
+        conn.close()
+
+    def get(self, idempotency_key: str) -> Optional[dict]:
+        conn = self._connect()
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT idempotency_key, chat_id, tx_hash, status, result FROM payments WHERE idempotency_key = ?",
+            (idempotency_key,),
+        )
+        row = cur.fetchone()
+        conn.close()
+        if not row:
+            return None
+        return {
+            "idempotency_key": row[0],
+            "chat_id": row[1],
+            "tx_hash": row[2],
+            "status": row[3],
+            "result": json.loads(row[4]) if row[4] else None,
+        }
+
+    def record_payment(self, idempotency_key: str, chat_id: str, tx_hash: str):
+        """Remember a confirmed payment for `idempotency_key`."""
+        conn = self._connect()
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO payments (idempotency_key, chat_id, tx_hash, status) VALUES (?, ?, ?, 'paid')"
+            " ON CONFLICT(idempotency_key) DO UPDATE SET tx_hash=excluded.tx_hash, status='paid',"
+            " updated_at=strftime('%s','now')",
+            (idempotency_key, chat_id, tx_hash),
+        )
+        conn.commit()
+        conn.close()
+
+    def record_delivery(self, idempotency_key: str, result: Optional[dict] = None):
+        """Mark the notification for `idempotency_key` as delivered."""
+        conn = self._connect()
+        cur = conn.cursor()
+        cur.execute(
+            "UPDATE payments SET status='delivered', result=?, updated_at=strftime('%s','now') WHERE idempotency_key = ?",
+            (json.dumps(result) if result is not None else None, idempotency_key),
+        )
+        conn.commit()
+        conn.close()
@@ -0,0 +1,216 @@
+"""
+Pre-signed payment pool for NotifyClient.
+
+Every payment normally needs a nonce lookup, a gas estimate, a pending-block
+fee lookup and a signature before it can be broadcast. `PresignedPool` does
+that work ahead of time on a background thread: it keeps `size` signed
+transfers to the gateway's `payTo` address with sequential nonces, and
+re-signs them when the base fee rises past what their fee cap was built for.
+A payment then only has to take one and broadcast it.
+
+The pool owns the wallet's nonce sequence while it is enabled: do not send
+other transactions from the same wallet at the same time.
+"""
+
+import threading
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from .fees import FeeQuote
+
+
+class PresignedTx:
+    """A signed transfer ready to broadcast."""
+
+    __slots__ = ("tx", "raw", "tx_hash", "base_fee")
+
+    def __init__(self, tx: dict, raw: bytes, tx_hash: str, base_fee: Optional[int]):
+        self.tx = tx
+        self.raw = raw
+        self.tx_hash = tx_hash
+        self.base_fee = base_fee
+
+    @property
+    def nonce(self) -> int:
+        return self.tx["nonce"]
+
+
+class PresignedPool:
+    """Background pool of signed payments to a single `(payTo, value)` target.
+
+    Args:
+        w3: Web3 instance
+        account: eth-account `LocalAccount` that pays
+        chain_id: Chain ID
+        size: Signed transactions kept ready
+        max_priority_gwei: Priority fee
+        max_fee_multiplier: Fee cap = base fee * multiplier + priority fee
+        gas_buffer_multiplier: Applied to the gas estimate for the target
+        refresh_interval: Seconds between fee checks
+        refresh_drift: Re-sign once the base fee rose by more than this fraction
+        fee_oracle: Take fees and the target's gas estimate from this `FeeOracle`
+            (the priority fee is then capped at `max_priority_gwei`)
+    """
+
+    def __init__(
+        self,
+        w3,
+        account,
+        chain_id: int,
+        *,
+        size: int = 4,
+        max_priority_gwei: int = 2,
+        max_fee_multiplier: float = 2.0,
+        gas_buffer_multiplier: float = 1.1,
+        refresh_interval: float = 5.0,
+        refresh_drift: float = 0.125,
+        fee_oracle=None,
+    ):
+        self.w3 = w3
+        self.account = account
+        self.chain_id = chain_id
+        self.size = size
+        self.max_priority_gwei = max_priority_gwei
+        self.max_fee_multiplier = max_fee_multiplier
+        self.gas_buffer_multiplier = gas_buffer_multiplier
+        self.refresh_interval = refresh_interval
+        self.refresh_drift = refresh_drift
+        self.fee_oracle = fee_oracle
+
+        self._lock = threading.RLock()
+        self._ready: Deque[PresignedTx] = deque()
+        self._target: Optional[Tuple[str, int]] = None
+        self._gas_limit = 21000
+        self._next_nonce: Optional[int] = None
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="x402-presign", daemon=True)
+        self._thread.start()
+
+    # -- signing ------------------------------------------------------------
+
+    def _base_fee(self) -> Optional[int]:
+        if self.fee_oracle is not None:
+            return self.fee_oracle.quote().base_fee
+        try:
+            return self.w3.eth.get_block("pending").get("baseFeePerGas", None)
+        except Exception:
+            return None
+
+    def _fee_fields(self, base_fee: Optional[int]) -> dict:
+        max_priority = self.w3.to_wei(self.max_priority_gwei, "gwei")
+        if self.fee_oracle is not None:
+            quote = self.fee_oracle.quote()
+            # priced for `base_fee`, the value later drift checks compare against
+            quote = FeeQuote(base_fee, quote.priority_fee, quote.gas_price, quote.updated)
+        else:
+            quote = FeeQuote(base_fee, max_priority, None if base_fee else self._gas_price(), 0.0)
+        return quote.tx_fields(self.max_fee_multiplier, max_priority)
+
+    def _gas_price(self) -> int:
+        try:
+            return self.w3.eth.gas_price
+        except Exception:
+            return self.w3.to_wei("1", "gwei")
+
+    def _sign(self, nonce: int, base_fee: Optional[int]) -> PresignedTx:
+        to_address, value = self._target
+        tx = {
+            "to": to_address,
+            "value": value,
+            "gas": self._gas_limit,
+            "nonce": nonce,
+            "chainId": self.chain_id,
+        }
+        tx.update(self._fee_fields(base_fee))
+        signed = self.account.sign_transaction(tx)
+        raw = getattr(signed, "rawTransaction", None) or getattr(signed, "raw_transaction", None)
+        if raw is None:
+            raise Exception("Signed transaction object missing raw bytes (rawTransaction/raw_transaction)")
+        return PresignedTx(tx, raw, self.w3.to_hex(signed.hash), base_fee)
+
+    def _set_target(self, to_address: str, value: int):
+        # caller holds the lock; unbroadcast transactions can simply be dropped,
+        # their nonces are handed out again
+        if self._ready:
+            self._next_nonce = self._ready[0].nonce
+        self._ready.clear()
+        self._target = (to_address, value)
+        if self.fee_oracle is not None:
+            gas_est = self.fee_oracle.gas_limit(to_address, value, self.account.address)
+            self._gas_limit = int(gas_est * self.gas_buffer_multiplier)
+            return
+        try:
+            gas_est = self.w3.eth.estimate_gas({"to": to_address, "from": self.account.address, "value": value})
+            self._gas_limit = int(gas_est * self.gas_buffer_multiplier)
+        except Exception:
+            self._gas_limit = 21000
+
+    def _sign_next(self, base_fee: Optional[int]) -> PresignedTx:
+        # caller holds the lock; the nonce only advances once signing succeeded
+        if self._next_nonce is None:
+            self._next_nonce = self.w3.eth.get_transaction_count(self.account.address, "pending")
+        ptx = self._sign(self._next_nonce, base_fee)
+        self._next_nonce += 1
+        return ptx
+
+    def _stale(self, ptx: PresignedTx, base_fee: Optional[int]) -> bool:
+        if not base_fee or not ptx.base_fee:
+            return base_fee != ptx.base_fee
+        return base_fee > ptx.base_fee * (1 + self.refresh_drift)
+
+    def refill(self):
+        """Re-sign stale transactions and top the pool up to `size`."""
+        with self._lock:
+            if self._target is None or self._closed:
+                return
+            base_fee = self._base_fee()
+            if any(self._stale(ptx, base_fee) for ptx in self._ready):
+                self._ready = deque(self._sign(ptx.nonce, base_fee) for ptx in self._ready)
+            while len(self._ready) < self.size:
+                self._ready.append(self._sign_next(base_fee))
+
+    # -- public API ---------------------------------------------------------
+
+    def acquire(self, to_address: str, value: int) -> PresignedTx:
+        """Take a signed payment to `to_address` for `value` wei.
+
+        Served from the pool when it holds transactions for this target;
+        otherwise one is signed on the spot (and the pool switches target).
+        """
+        with self._lock:
+            if self._target != (to_address, value):
+                self._set_target(to_address, value)
+            if self._ready:
+                ptx = self._ready.popleft()
+            else:
+                ptx = self._sign_next(self._base_fee())
+        self._wake.set()
+        return ptx
+
+    def invalidate(self):
+        """Drop the pool and re-read the nonce from the chain (e.g. after a failed broadcast)."""
+        with self._lock:
+            self._ready.clear()
+            self._next_nonce = None
+        self._wake.set()
+
+    def ready(self) -> int:
+        """Signed transactions currently waiting in the pool."""
+        with self._lock:
+            return len(self._ready)
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
+            try:
+                self.refill()
+            except Exception as e:
+                # keep the nonce sequence; the next wake-up tries again
+                print(f"[x402-Notify] Pre-signer refill failed: {e}")
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5)
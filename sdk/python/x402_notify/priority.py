@@ -0,0 +1,148 @@
+"""
+Priority lanes for notifications.
+
+Work used to be served strictly first-in first-out, so an urgent alert queued
+behind a bulk broadcast waited for all of it. Work is now queued per priority
+class (`high`, `normal`, `low`) and lanes are served by smooth weighted
+round-robin: with the default weights 8:3:1 a newly queued `high` item is the
+next one picked, while `normal` and `low` keep a guaranteed share and are
+never starved.
+
+`PriorityExecutor` runs callables on worker threads in that order, so whoever
+is picked next is the next to get a payment slot and a nonce. Workers reserved
+for `high` (`urgent_workers`) keep alerts moving even while every shared worker
+is busy waiting on a bulk payment's confirmation.
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, Iterable, List, Optional
+
+PRIORITIES = ("high", "normal", "low")
+DEFAULT_WEIGHTS = {"high": 8, "normal": 3, "low": 1}
+
+
+def check_priority(priority: str) -> str:
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority {priority!r} (expected one of {', '.join(PRIORITIES)})")
+    return priority
+
+
+class WeightedLanes:
+    """Smooth weighted round-robin choice between lanes that have work.
+
+    Args:
+        weights: Share of picks per priority while every lane is busy
+            (priorities left out keep their `DEFAULT_WEIGHTS` weight)
+
+    Not thread-safe; callers hold their own lock.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, int]] = None):
+        weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        for priority, weight in weights.items():
+            check_priority(priority)
+            if weight <= 0:
+                raise ValueError(f"Weight of {priority!r} must be positive")
+        self.weights = weights
+        self._current = {priority: 0 for priority in weights}
+
+    def pick(self, ready: Iterable[str]) -> Optional[str]:
+        """The lane to serve next among `ready`, or None when nothing is ready."""
+        ready = set(ready)
+        ready = [p for p in PRIORITIES if p in ready]
+        if not ready:
+            return None
+        for priority in self._current:
+            # an idle lane does not bank credit for later bursts
+            if priority not in ready:
+                self._current[priority] = 0
+        total = 0
+        for priority in ready:
+            self._current[priority] += self.weights[priority]
+            total += self.weights[priority]
+        chosen = max(ready, key=lambda p: self._current[p])
+        self._current[chosen] -= total
+        return chosen
+
+
+class _Item:
+    __slots__ = ("future", "fn", "args")
+
+    def __init__(self, future: Future, fn: Callable, args: tuple):
+        self.future = future
+        self.fn = fn
+        self.args = args
+
+
+class PriorityExecutor:
+    """Thread pool serving one queue per priority with weighted scheduling.
+
+    Args:
+        workers: Threads shared by every priority
+        urgent_workers: Extra threads that only run `high` work
+        weights: Lane weights for the shared workers (see `WeightedLanes`)
+    """
+
+    def __init__(self, workers: int = 2, urgent_workers: int = 0, weights: Optional[Dict[str, int]] = None):
+        self._lanes: Dict[str, Deque[_Item]] = {priority: deque() for priority in PRIORITIES}
+        self._picker = WeightedLanes(weights)
+        self._cond = threading.Condition()
+        self._shutdown = False
+        self._threads: List[threading.Thread] = []
+        for n in range(max(1, workers)):
+            self._threads.append(threading.Thread(target=self._run, args=(PRIORITIES,), name=f"x402-lane-{n}", daemon=True))
+        for n in range(max(0, urgent_workers)):
+            self._threads.append(threading.Thread(target=self._run, args=(("high",),), name=f"x402-lane-urgent-{n}", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, priority: str, fn: Callable, *args) -> Future:
+        check_priority(priority)
+        future: Future = Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("PriorityExecutor is shut down")
+            self._lanes[priority].append(_Item(future, fn, args))
+            self._cond.notify_all()
+        return future
+
+    def depths(self) -> Dict[str, int]:
+        """Queued (not yet started) items per priority."""
+        with self._cond:
+            return {priority: len(lane) for priority, lane in self._lanes.items()}
+
+    def _next(self, serves: tuple) -> Optional[_Item]:
+        with self._cond:
+            while True:
+                ready = [p for p in serves if self._lanes[p]]
+                if ready:
+                    priority = ready[0] if len(serves) == 1 else self._picker.pick(ready)
+                    return self._lanes[priority].popleft()
+                if self._shutdown:
+                    return None
+                self._cond.wait()
+
+    def _run(self, serves: tuple):
+        while True:
+            item = self._next(serves)
+            if item is None:
+                return
+            if not item.future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = item.fn(*item.args)
+            except BaseException as e:
+                item.future.set_exception(e)
+            else:
+                item.future.set_result(result)
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work; queued items still run."""
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
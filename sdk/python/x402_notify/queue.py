@@ -1,11 +1,17 @@
 """
-Lightweight RQ helpers for enqueuing x402 Notify jobs.
+Lightweight queue helpers for enqueuing x402 Notify jobs.
 
-This module provides a small helper to enqueue notification jobs into Redis via RQ
-and a worker-callable `run_notify_job` which re-creates a `NotifyClient` and
-executes the notify flow in a separate process. This avoids blocking the web
+This module provides a small helper to enqueue notification jobs into a queue
+backend and a worker-callable `run_notify_job` which re-creates a `NotifyClient`
+and executes the notify flow in a separate process. This avoids blocking the web
 server or main process while waiting for on-chain confirmations.
 
+Two backends are available:
+
+- Redis via RQ (`redis://...` URLs, the default)
+- an embedded SQLite queue (`sqlite:///path/to/jobs.db` URLs) that needs no
+  external services; see `x402_notify.sqlite_queue`
+
 Usage (producer):
 
 from x402_notify.queue import enqueue_notify
@@ -20,16 +26,60 @@ Run worker (in separate terminal/process):
 rq worker -u redis://localhost:6379/0
 
 The worker will import this module and execute `run_notify_job` for enqueued tasks.
+
+For the SQLite backend, enqueue with `redis_url="sqlite:///./jobs.db"` and run:
+
+python -m x402_notify.sqlite_queue --db ./jobs.db --processes 4
+
+Jobs carry a priority (`high`, `normal` or `low`). RQ keeps one queue per
+priority (`default-high`, `default`, `default-low`); list them in order so a
+worker always takes urgent jobs first:
+
+rq worker -u redis://localhost:6379/0 default-high default default-low
+
+The SQLite queue stores the priority with the job and its workers pick lanes
+by weighted round-robin (see `x402_notify.priority`).
 """
 
-from redis import Redis
-from rq import Queue
-from typing import Optional
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
 from x402_notify.client import NotifyClient
+from x402_notify.priority import check_priority
 import requests
+import hashlib
+import threading
 import uuid
 
 
+RUN_NOTIFY_JOB = "x402_notify.queue.run_notify_job"
+
+# one client per wallet and settings for the life of a worker process
+_clients: Dict[tuple, NotifyClient] = {}
+_clients_lock = threading.Lock()
+
+
+def _worker_client(wallet_key: str, gateway_url: str, rpc_url: str, chain_id: int, ledger_path: Optional[str]) -> NotifyClient:
+    key = (wallet_key, gateway_url, rpc_url, chain_id, ledger_path)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = NotifyClient(
+                wallet_key=wallet_key,
+                gateway_url=gateway_url,
+                rpc_url=rpc_url,
+                chain_id=chain_id,
+                ledger_path=ledger_path,
+            )
+        return client
+
+
+def priority_queue_name(queue_name: str, priority: str) -> str:
+    """RQ queue holding `priority` jobs of `queue_name` (`normal` keeps the plain name)."""
+    if check_priority(priority) == "normal":
+        return queue_name
+    return f"{queue_name}-{priority}"
+
+
 def run_notify_job(
     job_id: str,
     wallet_key: str,
@@ -40,12 +90,23 @@ def run_notify_job(
     message: str,
     agent_tx: Optional[str] = None,
     callback_url: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+    ledger_path: Optional[str] = None,
     **kwargs,
 ) -> dict:
     """Worker-callable: executes the full notify flow synchronously.
 
     This function is intentionally simple so RQ can import it and run it in
-    a separate process. It returns the gateway response dict on success.
+    a separate process. It returns the gateway response dict on success; on
+    failure it reports the job as `failed` to `callback_url` and re-raises.
+
+    With `ledger_path` set, the job id doubles as the idempotency key (unless
+    one is given), so a retried job reuses its confirmed payment.
+
+    The `NotifyClient` is kept for later jobs of the same wallet in this
+    process, which also keeps its nonce counter. Nonces are not coordinated
+    between processes: give each worker process its own wallet, or run a
+    single worker process per wallet.
     """
     # Notify job started (callback)
     if callback_url:
@@ -54,31 +115,97 @@ def run_notify_job(
         except Exception:
             pass
 
-    client = NotifyClient(
-        wallet_key=wallet_key,
-        gateway_url=gateway_url,
-        rpc_url=rpc_url,
-        chain_id=chain_id,
-    )
+    client = _worker_client(wallet_key, gateway_url, rpc_url, chain_id, ledger_path)
+    if ledger_path and not idempotency_key:
+        idempotency_key = job_id
 
     try:
-        res = client.notify(chat_id=chat_id, message=message, agent_tx=agent_tx, background=False)
-        # Success callback
+        res = client.notify(
+            chat_id=chat_id,
+            message=message,
+            agent_tx=agent_tx,
+            background=False,
+            idempotency_key=idempotency_key,
+        )
+    except Exception as e:
+        # Failure callback, so waiters stop waiting; the queue still sees the error
         if callback_url:
             try:
-                requests.post(f"{callback_url.rstrip('/')}/jobs/{job_id}/update", json={"status": "finished", "result": res}, timeout=5)
+                requests.post(f"{callback_url.rstrip('/')}/jobs/{job_id}/update", json={"status": "failed", "error": str(e)}, timeout=5)
             except Exception:
                 pass
-        return res
-    finally:
+        raise
+    # Success callback
+    if callback_url:
         try:
-            client.close()
+            requests.post(f"{callback_url.rstrip('/')}/jobs/{job_id}/update", json={"status": "finished", "result": res}, timeout=5)
         except Exception:
             pass
+    return res
+
+
+class QueueBackend(ABC):
+    """Interface for queue backends used by `enqueue_notify`.
+
+    A backend stores the keyword arguments of a `run_notify_job` call under a
+    job id and makes them available to its workers.
+    """
+
+    @abstractmethod
+    def enqueue(self, job_id: str, job_kwargs: dict, queue_name: str = "default", priority: str = "normal") -> str:
+        """Store a `run_notify_job` call and return its job id."""
+
+
+class RQBackend(QueueBackend):
+    """Redis/RQ backend. Requires `pip install rq redis`."""
+
+    def __init__(self, redis_url: str):
+        from redis import Redis
+
+        self.redis_url = redis_url
+        self._conn = Redis.from_url(redis_url)
+
+    def enqueue(self, job_id: str, job_kwargs: dict, queue_name: str = "default", priority: str = "normal") -> str:
+        from rq import Queue
+        from rq.job import Job
+
+        # Same job id (idempotency key) already queued or processed
+        if Job.exists(job_id, connection=self._conn):
+            return job_id
+
+        q = Queue(name=priority_queue_name(queue_name, priority), connection=self._conn)
+        kwargs = dict(job_kwargs)
+        q.enqueue(
+            RUN_NOTIFY_JOB,
+            job_id,
+            kwargs.pop("wallet_key"),
+            kwargs.pop("gateway_url"),
+            kwargs.pop("rpc_url"),
+            kwargs.pop("chain_id"),
+            kwargs.pop("chat_id"),
+            kwargs.pop("message"),
+            kwargs.pop("agent_tx", None),
+            job_id=job_id,
+            **kwargs,
+        )
+        return job_id
+
+
+def backend_from_url(url: str) -> QueueBackend:
+    """Create a backend from a URL.
+
+    `sqlite:///jobs.db` (relative) and `sqlite:////var/lib/jobs.db` (absolute)
+    select the embedded SQLite queue; anything else is handed to RQ.
+    """
+    if url.startswith("sqlite:///"):
+        from x402_notify.sqlite_queue import SQLiteQueue
+
+        return SQLiteQueue(url[len("sqlite:///"):])
+    return RQBackend(url)
 
 
 def enqueue_notify(
-    redis_url: str,
+    redis_url: Optional[str],
     wallet_key: str,
     gateway_url: str,
     rpc_url: str,
@@ -88,27 +215,48 @@ def enqueue_notify(
     agent_tx: Optional[str] = None,
     queue_name: str = "default",
     callback_url: Optional[str] = None,
+    backend: Optional[QueueBackend] = None,
+    idempotency_key: Optional[str] = None,
+    ledger_path: Optional[str] = None,
+    priority: str = "normal",
 ) -> str:
-    """Enqueue a notify job into Redis RQ.
+    """Enqueue a notify job.
+
+    `redis_url` selects the backend (`redis://...` for RQ, `sqlite:///...` for
+    the embedded SQLite queue); pass `backend` instead to reuse an existing
+    backend instance.
+
+    `idempotency_key` makes enqueueing idempotent: the job id is derived from
+    the key, so enqueueing the same key twice yields a single job. Together with
+    `ledger_path` (a paid-tx ledger shared by the workers) a retried job never
+    pays twice for the same notification.
+
+    `priority` (`high`, `normal` or `low`) selects the job's lane: urgent
+    alerts are claimed ahead of bulk jobs already waiting in the queue.
 
-    Returns the job ID. The job will be processed by an RQ worker that must be
-    running separately (see module docstring for `rq worker` command).
+    Returns the job ID. The job will be processed by a worker that must be
+    running separately (see module docstring for worker commands).
     """
-    redis_conn = Redis.from_url(redis_url)
-    q = Queue(name=queue_name, connection=redis_conn)
+    check_priority(priority)
+    if backend is None:
+        if not redis_url:
+            raise ValueError("Either redis_url or backend is required")
+        backend = backend_from_url(redis_url)
     # generate a stable job id so we can track it from the producer
-    job_id = uuid.uuid4().hex
-    job = q.enqueue(
-        "x402_notify.queue.run_notify_job",
-        job_id,
-        wallet_key,
-        gateway_url,
-        rpc_url,
-        chain_id,
-        chat_id,
-        message,
-        agent_tx,
-        callback_url=callback_url,
-        job_id=job_id,
-    )
-    return job_id
+    if idempotency_key:
+        job_id = hashlib.sha256(idempotency_key.encode()).hexdigest()[:32]
+    else:
+        job_id = uuid.uuid4().hex
+    job_kwargs = {
+        "wallet_key": wallet_key,
+        "gateway_url": gateway_url,
+        "rpc_url": rpc_url,
+        "chain_id": chain_id,
+        "chat_id": chat_id,
+        "message": message,
+        "agent_tx": agent_tx,
+        "callback_url": callback_url,
+        "idempotency_key": idempotency_key,
+        "ledger_path": ledger_path,
+    }
+    return backend.enqueue(job_id, job_kwargs, queue_name=queue_name, priority=priority)
@@ -0,0 +1,223 @@
+"""
+Telegram-aware rate scheduling for notifications.
+
+The gateway forwards every paid notification to Telegram, which delivers
+roughly 1 message/second per chat and ~30 messages/second per bot. Sending
+faster than that means paying on-chain and then getting `Telegram delivery
+failed`. `RateScheduler` makes callers wait for a per-chat and a global token
+*before* any payment is made, and hands out global tokens round-robin across
+chats so one busy chat cannot starve the others.
+
+Usage:
+
+limiter = RateScheduler(per_chat_rate=1.0, global_rate=30.0)
+client = NotifyClient(wallet_key="0x...", rate_limiter=limiter)
+
+Share one scheduler between all clients that deliver through the same bot.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens/second, holding at most `capacity`."""
+
+    def __init__(self, rate: float, capacity: float, now: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def available(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= 1.0
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1.0
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available."""
+        self._refill(now)
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+    def full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class _Waiter:
+    __slots__ = ("granted", "future")
+
+    def __init__(self, future: Optional["asyncio.Future"] = None):
+        self.granted = False
+        # set for `acquire_async` waiters, resolved when a token is granted
+        self.future = future
+
+    def grant(self):
+        self.granted = True
+        if self.future is not None:
+            self.future.get_loop().call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        if not self.future.done():
+            self.future.set_result(True)
+
+
+class RateScheduler:
+    """Per-chat and global token buckets with fair (round-robin) queuing across chats.
+
+    Args:
+        per_chat_rate: Messages per second allowed for a single chat
+        per_chat_burst: Messages a chat may send back-to-back after being idle
+        global_rate: Messages per second across all chats (per bot)
+        global_burst: Global burst size
+    """
+
+    def __init__(
+        self,
+        per_chat_rate: float = 1.0,
+        per_chat_burst: float = 1.0,
+        global_rate: float = 30.0,
+        global_burst: float = 30.0,
+    ):
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst
+        self._global = TokenBucket(global_rate, global_burst)
+        self._chats: Dict[str, TokenBucket] = {}
+        # chats with waiters, in round-robin order
+        self._ring: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self._cond = threading.Condition()
+
+    def _bucket(self, chat_id: str, now: float) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) > 10000:
+                self._prune(now)
+            bucket = TokenBucket(self.per_chat_rate, self.per_chat_burst, now)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _prune(self, now: float):
+        # a full bucket of a chat without waiters carries no state worth keeping
+        for chat_id in [c for c, b in self._chats.items() if c not in self._ring and b.full(now)]:
+            del self._chats[chat_id]
+
+    def _grant(self, now: float) -> float:
+        """Hand out tokens to waiting chats in round-robin order.
+
+        Caller holds the condition. Returns seconds until the next token could
+        be granted (or a large value when nobody is waiting).
+        """
+        granted = False
+        for chat_id in list(self._ring):
+            if not self._global.available(now):
+                break
+            bucket = self._chats[chat_id]
+            if not bucket.available(now):
+                continue
+            waiters = self._ring.pop(chat_id)
+            waiter = waiters.popleft()
+            bucket.take(now)
+            self._global.take(now)
+            waiter.grant()
+            granted = True
+            if waiters:
+                # served: go to the back of the ring
+                self._ring[chat_id] = waiters
+        if granted:
+            self._cond.notify_all()
+        if not self._ring:
+            return 60.0
+        next_chat = min(self._chats[c].wait_time(now) for c in self._ring)
+        return max(self._global.wait_time(now), next_chat, 0.001)
+
+    def acquire(self, chat_id: str, timeout: Optional[float] = None) -> bool:
+        """Block until `chat_id` may send one message. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waiter = _Waiter()
+        with self._cond:
+            now = time.monotonic()
+            self._bucket(chat_id, now)
+            self._ring.setdefault(chat_id, deque()).append(waiter)
+            while True:
+                wait = self._grant(time.monotonic())
+                if waiter.granted:
+                    return True
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._withdraw(chat_id, waiter)
+                        return False
+                    wait = min(wait, remaining)
+                self._cond.wait(wait)
+
+    async def acquire_async(self, chat_id: str, timeout: Optional[float] = None) -> bool:
+        """Async variant of `acquire`, waiting on the event loop rather than a thread.
+
+        A cancelled caller leaves the queue; a token granted to it just before
+        the cancellation is handed back.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        waiter = _Waiter(loop.create_future())
+        with self._cond:
+            self._bucket(chat_id, time.monotonic())
+            self._ring.setdefault(chat_id, deque()).append(waiter)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._grant(time.monotonic())
+                    if waiter.granted:
+                        return True
+                if deadline is not None:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    wait = min(wait, remaining)
+                # sleeps until the next token is due, or until another caller's grant wakes us
+                await asyncio.wait([waiter.future], timeout=wait)
+        except BaseException:
+            with self._cond:
+                if not self._withdraw(chat_id, waiter):
+                    self._refund(chat_id)
+            raise
+        with self._cond:
+            # a grant may have raced the deadline
+            return not self._withdraw(chat_id, waiter)
+
+    def _withdraw(self, chat_id: str, waiter: _Waiter) -> bool:
+        """Remove a waiting caller; False if it was already granted. Caller holds the condition."""
+        if waiter.granted:
+            return False
+        waiters = self._ring.get(chat_id)
+        if waiters is not None:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._ring[chat_id]
+        return True
+
+    def _refund(self, chat_id: str):
+        # give an unused grant back and pass it on. Caller holds the condition.
+        now = time.monotonic()
+        for bucket in (self._chats.get(chat_id), self._global):
+            if bucket is not None:
+                bucket._refill(now)
+                bucket.tokens = min(bucket.capacity, bucket.tokens + 1.0)
+        self._grant(now)
+
+    def queued(self) -> int:
+        """Number of callers currently waiting for a token."""
+        with self._cond:
+            return sum(len(w) for w in self._ring.values())
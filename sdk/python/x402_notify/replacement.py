@@ -0,0 +1,43 @@
+"""
+Same-nonce fee-bump replacement for stuck payments.
+
+When a fee spike leaves a payment's `maxFeePerGas` below the base fee, it sits
+in the mempool and blocks the wallet's nonce. The clients watch for inclusion
+and, once `stuck_after_blocks` blocks pass without a receipt, re-broadcast the
+same nonce with fees multiplied by `fee_bump_multiplier` (capped at
+`max_fee_ceiling_gwei`). Whichever hash gets mined is the one presented to the
+gateway.
+"""
+
+from typing import Optional
+
+# Nodes only accept a replacement that raises both fee fields by at least 10%
+MIN_REPLACEMENT_BUMP = 1.1
+
+
+def bump_fees(tx: dict, multiplier: float, ceiling_wei: int) -> Optional[dict]:
+    """Return a copy of `tx` with fees raised by `multiplier`, or None when the
+    ceiling leaves no room for a replacement the mempool would accept."""
+    multiplier = max(multiplier, MIN_REPLACEMENT_BUMP)
+    bumped = dict(tx)
+    if "maxFeePerGas" in tx:
+        old_fee = tx["maxFeePerGas"]
+        max_fee = min(int(old_fee * multiplier) + 1, ceiling_wei)
+        if max_fee < old_fee * MIN_REPLACEMENT_BUMP:
+            return None
+        priority = int(tx["maxPriorityFeePerGas"] * multiplier) + 1
+        bumped["maxFeePerGas"] = max_fee
+        bumped["maxPriorityFeePerGas"] = min(priority, max_fee)
+        return bumped
+    old_price = tx["gasPrice"]
+    gas_price = min(int(old_price * multiplier) + 1, ceiling_wei)
+    if gas_price < old_price * MIN_REPLACEMENT_BUMP:
+        return None
+    bumped["gasPrice"] = gas_price
+    return bumped
+
+
+def nonce_consumed(exc: Exception) -> bool:
+    """True when a broadcast failed because a tx with this nonce was already mined."""
+    text = str(exc).lower()
+    return "nonce too low" in text or "nonce has already been used" in text
@@ -0,0 +1,411 @@
+"""
+Web3 providers spreading JSON-RPC calls over several endpoints.
+
+A single public RPC endpoint is the main source of latency spikes and 429s.
+`MultiHTTPProvider` (and `AsyncMultiHTTPProvider` for `AsyncWeb3`) wrap one
+HTTP provider per endpoint and:
+
+  - send each read (receipts, fees, nonces, ...) to the endpoint with the
+    lowest latency EWMA, penalised by its recent error rate
+  - hedge: if that endpoint has not answered within its own p95 latency, the
+    same read goes to the next endpoint and the first answer wins
+  - fail over to the next endpoint on connection errors, HTTP errors and
+    rate-limit (429 / -32005) answers
+  - broadcast `eth_sendRawTransaction` to every endpoint at once; the same
+    signed bytes hash the same everywhere, so this only improves propagation
+
+`stats()` reports, per endpoint, requests, errors, hedges, wins and latency;
+`on_request(method, url, latency, ok)` observes every individual call.
+"""
+
+import asyncio
+import inspect
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait as wait_futures
+from typing import Any, Callable, Deque, List, Optional, Sequence
+
+from web3 import AsyncHTTPProvider, HTTPProvider
+from web3.providers.async_base import AsyncJSONBaseProvider
+from web3.providers.base import JSONBaseProvider
+
+BROADCAST_METHODS = ("eth_sendRawTransaction",)
+RATE_LIMIT_CODES = (429, -32005)
+
+
+def _rate_limited(response: Any) -> bool:
+    error = response.get("error") if isinstance(response, dict) else None
+    if not error:
+        return False
+    if isinstance(error, str):
+        message, code = error, None
+    else:
+        message, code = str(error.get("message", "")), error.get("code")
+    return code in RATE_LIMIT_CODES or "rate limit" in message.lower() or "too many requests" in message.lower()
+
+
+def _child_kwargs(provider_class, request_timeout: float) -> dict:
+    kwargs: dict = {"request_kwargs": {"timeout": request_timeout}}
+    # failover replaces the per-endpoint retry loop (web3 v7+; v6 providers do not retry)
+    if "exception_retry_configuration" in inspect.signature(provider_class.__init__).parameters:
+        kwargs["exception_retry_configuration"] = None
+    return kwargs
+
+
+class Endpoint:
+    """One RPC endpoint and its call statistics."""
+
+    def __init__(self, url: str, provider, alpha: float, samples: int):
+        self.url = url
+        self.provider = provider
+        self.alpha = alpha
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.recent: Deque[float] = deque(maxlen=samples)
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.hedges = 0
+        self.wins = 0
+
+    def record(self, latency: float, ok: bool, rate_limited: bool = False):
+        self.requests += 1
+        if ok:
+            self.recent.append(latency)
+            self.latency = latency if self.latency is None else (1 - self.alpha) * self.latency + self.alpha * latency
+            self.error_rate *= 1 - self.alpha
+        else:
+            self.errors += 1
+            self.rate_limited += rate_limited
+            self.error_rate = (1 - self.alpha) * self.error_rate + self.alpha
+
+    def p95(self) -> Optional[float]:
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+
+class _EndpointSet:
+    """Selection, hedging delay and instrumentation shared by both providers."""
+
+    def __init__(
+        self,
+        endpoints: List[Endpoint],
+        error_penalty: float,
+        hedge_after: float,
+        min_hedge_delay: float,
+        hedge_min_samples: int,
+        on_request: Optional[Callable[[str, str, float, bool], None]],
+    ):
+        if not endpoints:
+            raise ValueError("At least one RPC endpoint is required")
+        self.endpoints = endpoints
+        self.error_penalty = error_penalty
+        self.hedge_after = hedge_after
+        self.min_hedge_delay = min_hedge_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.on_request = on_request
+        self.lock = threading.Lock()
+
+    def ordered(self) -> List[Endpoint]:
+        with self.lock:
+            # unmeasured endpoints score 0 so each gets tried
+            return sorted(self.endpoints, key=lambda e: (e.latency or 0.0) + e.error_rate * self.error_penalty)
+
+    def hedge_delay(self, endpoint: Endpoint) -> float:
+        with self.lock:
+            p95 = endpoint.p95() if len(endpoint.recent) >= self.hedge_min_samples else None
+        return self.hedge_after if p95 is None else max(self.min_hedge_delay, p95)
+
+    def record(self, endpoint: Endpoint, method: str, latency: float, ok: bool, rate_limited: bool = False):
+        with self.lock:
+            endpoint.record(latency, ok, rate_limited)
+        if self.on_request is not None:
+            try:
+                self.on_request(method, endpoint.url, latency, ok)
+            except Exception:
+                pass
+
+    def count(self, endpoint: Endpoint, attr: str):
+        with self.lock:
+            setattr(endpoint, attr, getattr(endpoint, attr) + 1)
+
+    def stats(self) -> List[dict]:
+        with self.lock:
+            return [
+                {
+                    "url": e.url,
+                    "requests": e.requests,
+                    "errors": e.errors,
+                    "rate_limited": e.rate_limited,
+                    "hedges": e.hedges,
+                    "wins": e.wins,
+                    "latency": e.latency,
+                    "p95": e.p95(),
+                    "error_rate": e.error_rate,
+                }
+                for e in self.endpoints
+            ]
+
+
+class MultiHTTPProvider(JSONBaseProvider):
+    """Synchronous multi-endpoint provider for `Web3`.
+
+    Args:
+        endpoint_uris: RPC URLs
+        request_timeout: Timeout of each individual HTTP call
+        hedge_after: Hedge delay until an endpoint has `hedge_min_samples` latencies
+            (afterwards its p95 is used)
+        min_hedge_delay: Floor for the p95-based hedge delay
+        hedge_min_samples: Latencies needed before an endpoint's p95 is trusted
+        error_penalty: Seconds added to an endpoint's score at a 100% error rate
+        alpha: Weight of each new latency / error sample
+        on_request: Called with `(method, url, latency, ok)` after every call
+    """
+
+    def __init__(
+        self,
+        endpoint_uris: Sequence[str],
+        *,
+        request_timeout: float = 10.0,
+        hedge_after: float = 0.5,
+        min_hedge_delay: float = 0.02,
+        hedge_min_samples: int = 20,
+        error_penalty: float = 5.0,
+        alpha: float = 0.2,
+        on_request: Optional[Callable[[str, str, float, bool], None]] = None,
+    ):
+        super().__init__()
+        endpoints = [Endpoint(url, HTTPProvider(url, **_child_kwargs(HTTPProvider, request_timeout)), alpha, 100) for url in endpoint_uris]
+        self._set = _EndpointSet(endpoints, error_penalty, hedge_after, min_hedge_delay, hedge_min_samples, on_request)
+        self._executor = ThreadPoolExecutor(max_workers=max(4, 4 * len(endpoints)), thread_name_prefix="x402-rpc")
+
+    @property
+    def endpoint_uris(self) -> List[str]:
+        return [e.url for e in self._set.endpoints]
+
+    def stats(self) -> List[dict]:
+        """Per-endpoint requests, errors, rate limits, hedges, wins and latency (EWMA, p95)."""
+        return self._set.stats()
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return any(e.provider.is_connected(show_traceback) for e in self._set.endpoints)
+
+    def _call(self, endpoint: Endpoint, method, params, clock: Optional[list] = None):
+        started = time.monotonic()
+        if clock is not None:
+            clock[0] = started
+        try:
+            response = endpoint.provider.make_request(method, params)
+        except Exception:
+            self._set.record(endpoint, method, time.monotonic() - started, False)
+            raise
+        limited = _rate_limited(response)
+        self._set.record(endpoint, method, time.monotonic() - started, not limited, limited)
+        return response
+
+    def make_request(self, method, params):
+        if method in BROADCAST_METHODS:
+            return self._broadcast(method, params)
+        return self._read(method, params)
+
+    def _read(self, method, params):
+        order = self._set.ordered()
+        pending = {}
+        last_error: Optional[Exception] = None
+        last_response = None
+        launched = 0
+
+        def launch(hedge: bool) -> list:
+            nonlocal launched
+            endpoint = order[launched]
+            launched += 1
+            if hedge:
+                self._set.count(endpoint, "hedges")
+            # set to the attempt's start time once a worker picks it up
+            clock: list = [None]
+            pending[self._executor.submit(self._call, endpoint, method, params, clock)] = endpoint
+            return clock
+
+        clock = launch(False)
+        while pending:
+            timeout = delay = None
+            if launched < len(order):
+                delay = self._set.hedge_delay(order[launched - 1])
+                # time spent queued behind other calls does not count towards the hedge delay
+                timeout = delay if clock[0] is None else max(0.0, clock[0] + delay - time.monotonic())
+            done, _ = wait_futures(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                if clock[0] is not None and time.monotonic() - clock[0] >= delay:
+                    # the newest attempt is slower than its p95: race the next endpoint
+                    clock = launch(True)
+                continue
+            for future in done:
+                endpoint = pending.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if _rate_limited(response):
+                    last_response = response
+                    continue
+                self._set.count(endpoint, "wins")
+                return response
+            if not pending and launched < len(order):
+                clock = launch(False)
+        if last_response is not None:
+            return last_response
+        raise last_error
+
+    def _broadcast(self, method, params):
+        futures = {self._executor.submit(self._call, e, method, params): e for e in self._set.endpoints}
+        last_error: Optional[Exception] = None
+        first_response = None
+        remaining = set(futures)
+        while remaining:
+            done, remaining = wait_futures(remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if "error" not in response:
+                    self._set.count(futures[future], "wins")
+                    return response
+                first_response = first_response or response
+        if first_response is not None:
+            return first_response
+        raise last_error
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+class AsyncMultiHTTPProvider(AsyncJSONBaseProvider):
+    """`MultiHTTPProvider` for `AsyncWeb3`; same arguments."""
+
+    def __init__(
+        self,
+        endpoint_uris: Sequence[str],
+        *,
+        request_timeout: float = 10.0,
+        hedge_after: float = 0.5,
+        min_hedge_delay: float = 0.02,
+        hedge_min_samples: int = 20,
+        error_penalty: float = 5.0,
+        alpha: float = 0.2,
+        on_request: Optional[Callable[[str, str, float, bool], None]] = None,
+    ):
+        super().__init__()
+        endpoints = [Endpoint(url, AsyncHTTPProvider(url, **_child_kwargs(AsyncHTTPProvider, request_timeout)), alpha, 100) for url in endpoint_uris]
+        self._set = _EndpointSet(endpoints, error_penalty, hedge_after, min_hedge_delay, hedge_min_samples, on_request)
+
+    @property
+    def endpoint_uris(self) -> List[str]:
+        return [e.url for e in self._set.endpoints]
+
+    def stats(self) -> List[dict]:
+        return self._set.stats()
+
+    async def is_connected(self, show_traceback: bool = False) -> bool:
+        for endpoint in self._set.endpoints:
+            if await endpoint.provider.is_connected(show_traceback):
+                return True
+        return False
+
+    async def _call(self, endpoint: Endpoint, method, params):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            response = await endpoint.provider.make_request(method, params)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._set.record(endpoint, method, loop.time() - started, False)
+            raise
+        limited = _rate_limited(response)
+        self._set.record(endpoint, method, loop.time() - started, not limited, limited)
+        return response
+
+    async def make_request(self, method, params):
+        if method in BROADCAST_METHODS:
+            return await self._broadcast(method, params)
+        return await self._read(method, params)
+
+    async def _read(self, method, params):
+        order = self._set.ordered()
+        pending = {}
+        last_error: Optional[Exception] = None
+        last_response = None
+        launched = 0
+
+        def launch(hedge: bool):
+            nonlocal launched
+            endpoint = order[launched]
+            launched += 1
+            if hedge:
+                self._set.count(endpoint, "hedges")
+            pending[asyncio.ensure_future(self._call(endpoint, method, params))] = endpoint
+
+        launch(False)
+        try:
+            while pending:
+                timeout = self._set.hedge_delay(order[launched - 1]) if launched < len(order) else None
+                done, _ = await asyncio.wait(list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch(True)
+                    continue
+                for task in done:
+                    endpoint = pending.pop(task)
+                    try:
+                        response = task.result()
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    if _rate_limited(response):
+                        last_response = response
+                        continue
+                    self._set.count(endpoint, "wins")
+                    return response
+                if not pending and launched < len(order):
+                    launch(False)
+        finally:
+            # losing hedges are not needed any more
+            for task in pending:
+                task.cancel()
+        if last_response is not None:
+            return last_response
+        raise last_error
+
+    async def _broadcast(self, method, params):
+        tasks = {asyncio.ensure_future(self._call(e, method, params)): e for e in self._set.endpoints}
+        last_error: Optional[Exception] = None
+        first_response = None
+        remaining = set(tasks)
+        while remaining:
+            done, remaining = await asyncio.wait(remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    response = task.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if "error" not in response:
+                    self._set.count(tasks[task], "wins")
+                    # the other endpoints finish propagating in the background
+                    return response
+                first_response = first_response or response
+        if first_response is not None:
+            return first_response
+        raise last_error
+
+    async def disconnect(self):
+        for endpoint in self._set.endpoints:
+            try:
+                await endpoint.provider.disconnect()
+            except Exception:
+                pass
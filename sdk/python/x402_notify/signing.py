@@ -0,0 +1,92 @@
+"""
+Transaction signing off the event loop.
+
+ECDSA signing is CPU-bound and holds the GIL for most of its runtime; inside a
+coroutine it stalls every other task on the loop (in a FastAPI service: every
+unrelated request) for the duration. `AsyncNotifyClient` therefore signs in an
+executor. The functions here are module-level so they can be shipped to a
+`ProcessPoolExecutor` as well as a thread pool.
+
+`BatchSigner` goes one step further under bursts: signing requests arriving
+within `max_delay` of each other are handed to the executor as one batch, so
+one hop signs many prepared transactions.
+"""
+
+import asyncio
+from concurrent.futures import Executor
+from typing import List, Optional, Tuple
+
+from eth_account import Account
+
+
+def sign_transaction(tx: dict, private_key: str) -> bytes:
+    """Sign `tx`; returns the raw transaction bytes."""
+    signed = Account.sign_transaction(tx, private_key)
+    # web3.py naming differs between versions: support both `rawTransaction` and `raw_transaction`
+    raw_tx = getattr(signed, "rawTransaction", None) or getattr(signed, "raw_transaction", None)
+    if raw_tx is None:
+        raise Exception("Signed transaction object missing raw bytes (rawTransaction/raw_transaction)")
+    return bytes(raw_tx)
+
+
+def sign_batch(txs: List[dict], private_key: str) -> List[object]:
+    """Sign each of `txs`; a failure is returned in place of its raw bytes."""
+    results: List[object] = []
+    for tx in txs:
+        try:
+            results.append(sign_transaction(tx, private_key))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+class BatchSigner:
+    """Coalesces concurrent `sign` calls into `sign_batch` executor calls.
+
+    Args:
+        private_key: Key every transaction is signed with
+        executor: Where batches run (None: the loop's default executor)
+        max_batch: Transactions per executor call
+        max_delay: Seconds the first request of a batch waits for company
+    """
+
+    def __init__(self, private_key: str, executor: Optional[Executor] = None, max_batch: int = 32, max_delay: float = 0.002):
+        self.private_key = private_key
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._waiting: List[Tuple[dict, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self.batches = 0
+
+    async def sign(self, tx: dict) -> bytes:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._waiting.append((tx, future))
+        if len(self._waiting) >= self.max_batch:
+            self._flush(loop)
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_delay, self._flush, loop)
+        return await future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._waiting = self._waiting, []
+        if batch:
+            loop.create_task(self._run(loop, batch))
+
+    async def _run(self, loop: asyncio.AbstractEventLoop, batch: List[Tuple[dict, asyncio.Future]]):
+        self.batches += 1
+        try:
+            results = await loop.run_in_executor(self.executor, sign_batch, [tx for tx, _ in batch], self.private_key)
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,362 @@
+"""
+Embedded SQLite queue backend for x402 Notify jobs.
+
+This is a Redis-free alternative to the RQ helpers in `x402_notify.queue` for
+single-host deployments. Jobs are stored in a SQLite database (WAL mode) and
+claimed atomically by workers; a claimed job is leased for `visibility_timeout`
+seconds and becomes visible again if its worker dies without completing it.
+
+Usage (producer):
+
+from x402_notify.queue import enqueue_notify
+enqueue_notify(redis_url="sqlite:///./jobs.db", wallet_key=..., gateway_url=..., chat_id="123", message="hi")
+
+Run workers (separate terminal/process):
+
+python -m x402_notify.sqlite_queue --db ./jobs.db --processes 4
+
+Each worker process executes `x402_notify.queue.run_notify_job` for the jobs it
+claims, exactly like an RQ worker would, reusing one `NotifyClient` per wallet.
+Processes do not share nonces: with `--processes` above 1, enqueue jobs for
+different wallets (one per process), or nonces collide and payments stall.
+
+Failed jobs are retried only when they were enqueued with a `ledger_path`;
+without one a retry could pay a second time for the same message. Jobs enqueued with a `priority` are
+claimed by weighted round-robin across the `high`, `normal` and `low` lanes,
+oldest first within a lane.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+from x402_notify.priority import WeightedLanes, check_priority
+from x402_notify.queue import QueueBackend, run_notify_job
+
+
+class SQLiteQueue(QueueBackend):
+    """SQLite-backed job queue with atomic claiming and visibility timeouts.
+
+    Args:
+        db_path: Path of the SQLite database file (created if missing)
+        visibility_timeout: Seconds a claimed job stays invisible to other workers
+        max_attempts: Claims allowed before a job is marked `failed`. Only jobs
+            with a `ledger_path` are retried: without the idempotency ledger a
+            failed attempt may already have paid, and a retry would pay again
+        retry_delay: Seconds before a failed attempt becomes claimable again
+        priority_weights: Lane weights used when claiming (see `x402_notify.priority`).
+            The round-robin state lives in each `SQLiteQueue` instance, so every
+            worker process applies the weights to its own claims; across
+            processes the ratio holds only on average
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        *,
+        visibility_timeout: float = 300.0,
+        max_attempts: int = 3,
+        retry_delay: float = 5.0,
+        priority_weights: Optional[Dict[str, int]] = None,
+    ):
+        self.db_path = db_path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        self._lanes = WeightedLanes(priority_weights)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not cross a fork; reopen in child processes
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _init_db(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id TEXT UNIQUE NOT NULL,
+                    queue TEXT NOT NULL,
+                    priority TEXT NOT NULL DEFAULT 'normal',
+                    status TEXT NOT NULL,
+                    kwargs TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    token TEXT,
+                    lease_until REAL,
+                    available_at REAL NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            # databases created before priority lanes; workers starting together
+            # on one of them must not both add the column
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+                if "priority" not in columns:
+                    conn.execute("ALTER TABLE jobs ADD COLUMN priority TEXT NOT NULL DEFAULT 'normal'")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (queue, status, available_at, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_claim_priority ON jobs (queue, status, priority, available_at, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_lease ON jobs (status, lease_until)")
+
+    def enqueue(self, job_id: str, job_kwargs: dict, queue_name: str = "default", priority: str = "normal") -> str:
+        """Store a job. Enqueuing an existing job id is a no-op."""
+        check_priority(priority)
+        now = time.time()
+        with self._lock:
+            self._connect().execute(
+                "INSERT OR IGNORE INTO jobs (job_id, queue, priority, status, kwargs, available_at, created_at, updated_at)"
+                " VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, queue_name, priority, json.dumps(job_kwargs), now, now, now),
+            )
+        return job_id
+
+    def claim(self, queue_name: str = "default") -> Optional[dict]:
+        """Atomically claim the next available job, or return None.
+
+        The lane is chosen by weighted round-robin among the priorities that
+        have claimable jobs; within a lane the oldest job goes first.
+
+        The returned dict holds `job_id`, `kwargs`, `attempts` and the lease
+        `token` that must be passed to `heartbeat`, `complete` and `fail`.
+        """
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Expired leases: the worker died or hung, make the job visible again
+                conn.execute(
+                    "UPDATE jobs SET status = CASE WHEN attempts >= ? OR json_extract(kwargs, '$.ledger_path') IS NULL"
+                    " THEN 'failed' ELSE 'queued' END,"
+                    " error = COALESCE(error, 'visibility timeout expired'), token = NULL, updated_at = ?"
+                    " WHERE status = 'running' AND lease_until < ?",
+                    (self.max_attempts, now, now),
+                )
+                ready = conn.execute(
+                    "SELECT DISTINCT priority FROM jobs WHERE queue = ? AND status = 'queued' AND available_at <= ?",
+                    (queue_name, now),
+                ).fetchall()
+                priority = self._lanes.pick(r[0] for r in ready)
+                row = None
+                if priority is not None:
+                    row = conn.execute(
+                        "SELECT id, job_id, kwargs, attempts FROM jobs"
+                        " WHERE queue = ? AND status = 'queued' AND priority = ? AND available_at <= ? ORDER BY id LIMIT 1",
+                        (queue_name, priority, now),
+                    ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, token = ?, lease_until = ?, updated_at = ?"
+                    " WHERE id = ?",
+                    (token, now + self.visibility_timeout, now, row[0]),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return {"job_id": row[1], "kwargs": json.loads(row[2]), "attempts": row[3] + 1, "token": token}
+
+    def heartbeat(self, job_id: str, token: str) -> bool:
+        """Extend the lease of a running job. Returns False if the lease was lost."""
+        now = time.time()
+        with self._lock:
+            cur = self._connect().execute(
+                "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE job_id = ? AND token = ? AND status = 'running'",
+                (now + self.visibility_timeout, now, job_id, token),
+            )
+        return cur.rowcount == 1
+
+    def complete(self, job_id: str, token: str, result: Optional[dict] = None) -> bool:
+        """Mark a job finished. Ignored if the lease was lost to another worker."""
+        with self._lock:
+            cur = self._connect().execute(
+                "UPDATE jobs SET status = 'finished', result = ?, token = NULL, lease_until = NULL, updated_at = ?"
+                " WHERE job_id = ? AND token = ?",
+                (json.dumps(result) if result is not None else None, time.time(), job_id, token),
+            )
+        return cur.rowcount == 1
+
+    def fail(self, job_id: str, token: str, error: str, retry: bool = True) -> bool:
+        """Record a failed attempt; the job is retried until `max_attempts` is reached.
+
+        With `retry=False` the job is marked `failed` right away.
+        """
+        now = time.time()
+        with self._lock:
+            cur = self._connect().execute(
+                "UPDATE jobs SET status = CASE WHEN ? OR attempts >= ? THEN 'failed' ELSE 'queued' END,"
+                " error = ?, token = NULL, lease_until = NULL, available_at = ?, updated_at = ?"
+                " WHERE job_id = ? AND token = ?",
+                (not retry, self.max_attempts, error, now + self.retry_delay, now, job_id, token),
+            )
+        return cur.rowcount == 1
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Return the stored state of a job."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT job_id, queue, priority, status, attempts, result, error, created_at, updated_at FROM jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            "job_id": row[0],
+            "queue": row[1],
+            "priority": row[2],
+            "status": row[3],
+            "attempts": row[4],
+            "result": json.loads(row[5]) if row[5] else None,
+            "error": row[6],
+            "created_at": row[7],
+            "updated_at": row[8],
+        }
+
+    def counts(self, queue_name: Optional[str] = None) -> dict:
+        """Number of jobs per status, optionally for a single queue."""
+        sql = "SELECT status, COUNT(*) FROM jobs"
+        args: tuple = ()
+        if queue_name is not None:
+            sql += " WHERE queue = ?"
+            args = (queue_name,)
+        with self._lock:
+            rows = self._connect().execute(sql + " GROUP BY status", args).fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._conn_pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+def _run_claimed(queue: SQLiteQueue, job: dict):
+    job_id, token = job["job_id"], job["token"]
+
+    # Keep the lease alive while the payment waits for confirmation
+    stop = threading.Event()
+
+    def _beat():
+        while not stop.wait(max(1.0, queue.visibility_timeout / 3)):
+            if not queue.heartbeat(job_id, token):
+                return
+
+    beater = threading.Thread(target=_beat, daemon=True)
+    beater.start()
+    try:
+        res = run_notify_job(job_id, **job["kwargs"])
+    except Exception as e:
+        # retrying is only safe when the ledger remembers what this job already paid
+        queue.fail(job_id, token, str(e), retry=bool(job["kwargs"].get("ledger_path")))
+        print(f"[x402-Notify] Job {job_id} failed (attempt {job['attempts']}): {e}")
+    else:
+        queue.complete(job_id, token, res)
+    finally:
+        stop.set()
+
+
+def work(
+    db_path: str,
+    queue_name: str = "default",
+    *,
+    burst: bool = False,
+    poll_interval: float = 0.5,
+    visibility_timeout: float = 300.0,
+    max_attempts: int = 3,
+    retry_delay: float = 5.0,
+) -> int:
+    """Run a single worker loop and return the number of jobs processed.
+
+    With `burst=True` the worker exits once the queue has no claimable jobs.
+    """
+    queue = SQLiteQueue(
+        db_path,
+        visibility_timeout=visibility_timeout,
+        max_attempts=max_attempts,
+        retry_delay=retry_delay,
+    )
+    processed = 0
+    try:
+        while True:
+            job = queue.claim(queue_name)
+            if job is None:
+                if burst:
+                    return processed
+                time.sleep(poll_interval)
+                continue
+            _run_claimed(queue, job)
+            processed += 1
+    finally:
+        queue.close()
+
+
+def run_workers(db_path: str, processes: int = 4, queue_name: str = "default", **kwargs) -> None:
+    """Run `processes` worker processes against the same queue and wait for them."""
+    procs = [
+        multiprocessing.Process(target=work, args=(db_path, queue_name), kwargs=kwargs, daemon=False)
+        for _ in range(max(1, processes))
+    ]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run x402 Notify SQLite queue workers")
+    parser.add_argument("--db", required=True, help="path to the SQLite jobs database")
+    parser.add_argument("--queue", default="default", help="queue name to consume")
+    parser.add_argument("--processes", type=int, default=4, help="number of worker processes (one per wallet: nonces are not shared)")
+    parser.add_argument("--burst", action="store_true", help="exit when the queue is empty")
+    parser.add_argument("--visibility-timeout", type=float, default=300.0)
+    parser.add_argument("--max-attempts", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"[x402-Notify] Starting {args.processes} SQLite queue worker(s) on {args.db} ({args.queue})")
+    run_workers(
+        args.db,
+        processes=args.processes,
+        queue_name=args.queue,
+        burst=args.burst,
+        visibility_timeout=args.visibility_timeout,
+        max_attempts=args.max_attempts,
+    )
+
+
+if __name__ == "__main__":
+    main()
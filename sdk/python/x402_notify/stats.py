@@ -0,0 +1,140 @@
+"""
+Local notification and spend statistics.
+
+`get_stats` used to ask the gateway (`GET /stats/{wallet}`) on every call, so a
+polling dashboard turned into gateway load. Clients now aggregate what they
+see in the notify path: messages sent, ETH and gas spent, failures by reason
+and delivery latency percentiles. The gateway's view can still be merged in,
+fetched at most once per `remote_interval`.
+"""
+
+import threading
+import time
+from collections import Counter, deque
+from typing import Callable, Deque, Optional
+
+from web3 import Web3
+
+from .balance import InsufficientFunds
+
+
+def failure_reason(exc: BaseException) -> str:
+    """Short, stable category for a failed notification."""
+    message = str(exc)
+    if isinstance(exc, InsufficientFunds):
+        return "insufficient_funds"
+    if isinstance(exc, TimeoutError):
+        return "timeout"
+    for prefix, reason in (
+        ("Rate limit wait timed out", "rate_limit"),
+        ("Payment not confirmed", "confirmation_timeout"),
+        ("Payment transaction failed on-chain", "payment_reverted"),
+        ("Delivery failed", "delivery_failed"),
+        ("Unexpected response", "gateway_error"),
+        ("No payment methods", "gateway_error"),
+    ):
+        if message.startswith(prefix):
+            return reason
+    name = type(exc).__name__
+    if "Connection" in name or "Timeout" in name or name in ("TransportError", "ConnectError"):
+        return "gateway_unreachable"
+    return name
+
+
+def _percentile(ordered: list, q: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+class NotifyStats:
+    """Thread-safe aggregates updated by the clients.
+
+    Args:
+        latency_window: Most recent delivery latencies kept for percentiles
+        remote_interval: Seconds a fetched copy of the gateway's stats is reused
+    """
+
+    def __init__(self, latency_window: int = 10000, remote_interval: float = 60.0):
+        self.remote_interval = remote_interval
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._sent = 0
+        self._payments = 0
+        self._value_wei = 0
+        self._fees_wei = 0
+        self._gas_used = 0
+        self._failures: Counter = Counter()
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+        self._remote: Optional[dict] = None
+        self._remote_error: Optional[str] = None
+        self._remote_at = 0.0
+
+    def record_sent(self, latency: float):
+        with self._lock:
+            self._sent += 1
+            self._latencies.append(latency)
+
+    def record_failure(self, exc: BaseException):
+        reason = failure_reason(exc)
+        with self._lock:
+            self._failures[reason] += 1
+
+    def record_payment(self, value_wei: int, gas_used: int, fee_wei: int):
+        with self._lock:
+            self._payments += 1
+            self._value_wei += value_wei
+            self._gas_used += gas_used
+            self._fees_wei += fee_wei
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            spent = self._value_wei + self._fees_wei
+            return {
+                "since": self._started,
+                "sent": self._sent,
+                "failed": sum(self._failures.values()),
+                "failures": dict(self._failures),
+                "payments": self._payments,
+                "eth_spent": str(Web3.from_wei(spent, "ether")),
+                "eth_paid_to_gateway": str(Web3.from_wei(self._value_wei, "ether")),
+                "eth_fees": str(Web3.from_wei(self._fees_wei, "ether")),
+                "gas_used": self._gas_used,
+                "latency": {
+                    "p50": _percentile(latencies, 50),
+                    "p90": _percentile(latencies, 90),
+                    "p99": _percentile(latencies, 99),
+                },
+            }
+
+    # -- remote merge -----------------------------------------------------------
+
+    def remote_due(self) -> bool:
+        with self._lock:
+            return time.monotonic() - self._remote_at >= self.remote_interval or self._remote_at == 0.0
+
+    def set_remote(self, remote: Optional[dict], error: Optional[str] = None):
+        """Store a fetch of the gateway's stats (a failed fetch keeps the last good copy)."""
+        with self._lock:
+            if remote is not None:
+                self._remote = remote
+            self._remote_error = error
+            self._remote_at = time.monotonic()
+
+    def merged(self) -> dict:
+        stats = self.snapshot()
+        with self._lock:
+            stats["remote"] = self._remote
+            if self._remote_error:
+                stats["remote_error"] = self._remote_error
+        return stats
+
+    def merged_with(self, fetch: Callable[[], dict]) -> dict:
+        """Local stats plus the gateway's, calling `fetch` only when the cached copy is due."""
+        if self.remote_due():
+            try:
+                self.set_remote(fetch())
+            except Exception as e:
+                self.set_remote(None, str(e))
+        return self.merged()
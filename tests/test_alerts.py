@@ -0,0 +1,70 @@
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from demo_service.alerts import AlertEngine, format_alert  # noqa: E402
+
+
+def _crossed(rules, prev, price):
+    fired = []
+    for chat_id, threshold, direction in rules:
+        if direction == "above" and prev < threshold <= price:
+            fired.append((chat_id, threshold, direction))
+        elif direction == "below" and prev > threshold >= price:
+            fired.append((chat_id, threshold, direction))
+    return sorted(fired)
+
+
+def test_crossings_at_exact_thresholds():
+    engine = AlertEngine()
+    engine.add_rule("a", 100, "above")
+    engine.add_rule("b", 100, "below")
+    assert engine.update(99) == []  # first tick only records the price
+    assert engine.update(100) == [("a", 100.0, "above")]
+    assert engine.update(100) == []
+    # leaving the threshold upwards does not re-fire `above`
+    assert engine.update(101) == []
+    assert engine.update(100) == [("b", 100.0, "below")]
+    assert engine.update(99) == []
+    assert engine.update(100.5) == [("a", 100.0, "above")]
+
+
+def test_update_matches_brute_force_on_random_walk():
+    rng = random.Random(7)
+    rules = [(str(rng.randrange(50)), float(rng.randrange(90, 111)), rng.choice(("above", "below"))) for _ in range(400)]
+    engine = AlertEngine()
+    engine.add_rules(rules[:200])
+    for rule in rules[200:]:
+        engine.add_rule(*rule)
+
+    prev = None
+    for _ in range(2000):
+        # integer prices land exactly on thresholds often
+        price = float(rng.randrange(85, 116))
+        fired = engine.update(price)
+        assert sorted(fired) == ([] if prev is None else _crossed(rules, prev, price))
+        prev = price
+
+
+def test_removed_rules_stop_firing():
+    engine = AlertEngine()
+    keep = engine.add_rule("a", 100, "above")
+    drop = engine.add_rule("a", 100, "above")
+    engine.add_rules([("b", 100, "above"), ("b", 105, "above")])
+    assert engine.remove_rule(drop)
+    assert not engine.remove_rule(drop)
+    assert engine.remove_chat("b") == 2
+    assert [r["rule_id"] for r in engine.rules_for("a")] == [keep]
+
+    engine.update(99)
+    assert engine.update(110) == [("a", 100.0, "above")]
+    assert len(engine) == 1
+
+
+def test_format_alert_groups_per_chat():
+    messages = format_alert([("a", 100.0, "above"), ("b", 90.0, "below"), ("a", 105.0, "above")], 106)
+    assert set(messages) == {"a", "b"}
+    assert messages["a"].count("\n") == 1
+    assert "below $90" in messages["b"]
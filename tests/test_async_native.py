@@ -0,0 +1,56 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import httpx
+from web3 import AsyncWeb3
+
+from x402_notify.async_native import AsyncNotifyClient, create_http_client
+from x402_notify.rpc import AsyncMultiHTTPProvider
+
+WALLET_KEY = "0x" + "11" * 32
+
+
+def test_http_client_has_explicit_limits_and_timeouts():
+    client = create_http_client(http2=False, max_connections=7, connect_timeout=1.5, read_timeout=9.0, pool_timeout=2.0)
+    try:
+        assert client.timeout == httpx.Timeout(9.0, connect=1.5, pool=2.0)
+        assert client._transport._pool._max_connections == 7
+    finally:
+        asyncio.run(client.aclose())
+
+
+def test_shared_http_client_is_reused_and_left_open():
+    async def run():
+        shared = create_http_client(http2=False)
+        clients = [AsyncNotifyClient(WALLET_KEY, http_client=shared) for _ in range(3)]
+        for client in clients:
+            assert await client._get_http() is shared
+            await client.close()
+        assert not shared.is_closed
+        await shared.aclose()
+
+        owned = AsyncNotifyClient(WALLET_KEY)
+        http = await owned._get_http()
+        await owned.close()
+        assert http.is_closed
+
+    asyncio.run(run())
+
+
+def test_shared_w3_is_used_and_left_open():
+    async def run():
+        provider = AsyncMultiHTTPProvider(["http://127.0.0.1:8545", "http://127.0.0.1:8546"])
+        provider.disconnect = AsyncMock()
+        w3 = AsyncWeb3(provider)
+        clients = [AsyncNotifyClient(WALLET_KEY, w3=w3) for _ in range(2)]
+        for client in clients:
+            assert client.w3 is w3
+            await client.close()
+        provider.disconnect.assert_not_called()
+
+        owned = AsyncNotifyClient(WALLET_KEY, rpc_urls=["http://127.0.0.1:8545", "http://127.0.0.1:8546"])
+        owned.w3.provider.disconnect = AsyncMock()
+        await owned.close()
+        owned.w3.provider.disconnect.assert_awaited_once()
+
+    asyncio.run(run())
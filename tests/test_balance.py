@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.fakechain import FakeChain  # noqa: E402
+from benchmarks.fakegateway import FakeGateway  # noqa: E402
+from x402_notify import InsufficientFunds, NotifyClient  # noqa: E402
+from x402_notify.balance import BalanceTracker  # noqa: E402
+
+
+def test_reservations_and_low_balance_hook():
+    alerts = []
+    tracker = BalanceTracker(refresh_interval=3600, low_balance_wei=50, on_low_balance=alerts.append)
+    assert tracker.stale()
+    tracker.update(100)
+    assert tracker.try_reserve(40)
+    assert not tracker.try_reserve(70)
+    assert tracker.try_reserve(30)
+    assert alerts == [30]
+    tracker.release(30)
+    tracker.spend(40)
+    assert tracker.available() == 60
+    # fires again only after recovering above the threshold
+    assert tracker.try_reserve(20)
+    assert alerts == [30, 40]
+
+
+def test_client_fails_fast_without_rpc_work_when_wallet_is_empty():
+    chain = FakeChain(block_time=0.1, balance=10**13)
+    gateway = FakeGateway(chain)
+    rpc_url = chain.start()
+    gateway_url = gateway.start()
+    alerts = []
+    try:
+        client = NotifyClient(
+            "0x" + "5e" * 32, gateway_url=gateway_url, rpc_url=rpc_url, chain_id=chain.chain_id,
+            track_balance=True, low_balance_eth=0.01, on_low_balance=alerts.append,
+        )
+        for _ in range(3):
+            with pytest.raises(InsufficientFunds):
+                client.notify("chat", "never paid")
+        client.close()
+        assert alerts == [10**13]
+        # one balance read, no nonce lookup, gas estimate or broadcast
+        assert chain.calls["eth_getBalance"] == 1
+        assert chain.calls["eth_getTransactionCount"] == 0
+        assert chain.calls["eth_sendRawTransaction"] == 0
+    finally:
+        gateway.stop()
+        chain.stop()
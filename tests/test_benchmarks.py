@@ -0,0 +1,14 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.run import run_benchmarks  # noqa: E402
+
+
+def test_offline_benchmark_delivers_every_notification():
+    results = run_benchmarks(["sync", "async-native"], n=2, block_time=0.1, rpc_latency=0.0, concurrency=1)
+    for result in results:
+        assert (result["ok"], result["failed"]) == (2, 0), result
+        assert result["per_sec"] > 0
+        assert result["p99"] >= result["p50"] > 0
@@ -0,0 +1,18 @@
+from x402_notify.blocktime import BlockClock
+
+
+def test_clock_learns_cadence_and_polls_after_expected_block():
+    clock = BlockClock(default_interval=12.0, alpha=0.5)
+    clock.seed(timestamp_span=20, blocks=10)
+    assert clock.interval == 2.0
+
+    # blocks observed every 2s keep the estimate at 2s
+    for i in range(5):
+        clock.observe(100 + i, now=10.0 + 2 * i)
+    assert abs(clock.interval - 2.0) < 1e-9
+
+    # last block seen at t=18: next expected at t=20, poll just after it
+    assert 2.0 < clock.delay(now=18.0) < 2.5
+    assert 0.1 < clock.delay(now=19.5) < 1.0
+    # overdue: short re-checks instead of waiting a whole interval
+    assert clock.delay(now=25.0) == 0.5
@@ -0,0 +1,45 @@
+import io
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.fakechain import FakeChain  # noqa: E402
+from benchmarks.fakegateway import FakeGateway  # noqa: E402
+from x402_notify.cli import iter_rows, main  # noqa: E402
+
+
+def test_iter_rows_streams_csv_and_jsonl():
+    csv_rows = io.StringIO("id,message,chat_id\na,hello,1\n0,bye,\n")
+    assert list(iter_rows(csv_rows, "csv", default_chat_id="9")) == [("a", "1", "hello"), ("0", "9", "bye")]
+    jsonl = io.StringIO('{"chat_id": 5, "message": "hi"}\n\n{"id": 0, "chat_id": "6", "message": "yo"}\n')
+    assert list(iter_rows(jsonl, "jsonl")) == [("row-1", "5", "hi"), ("0", "6", "yo")]
+
+
+def test_send_resumes_from_checkpoint_without_paying_again(tmp_path, monkeypatch, capsys):
+    chain = FakeChain(block_time=0.1)
+    gateway = FakeGateway(chain)
+    rpc_url = chain.start()
+    gateway_url = gateway.start()
+    monkeypatch.setenv("AGENT_PRIVATE_KEY", "0x" + "7c" * 32)
+    rows = tmp_path / "campaign.jsonl"
+    rows.write_text("".join(json.dumps({"id": i, "chat_id": "42", "message": f"campaign #{i}"}) + "\n" for i in range(5)))
+    argv = [
+        "send", str(rows), "--gateway-url", gateway_url, "--rpc-url", rpc_url, "--chain-id", str(chain.chain_id),
+        "--checkpoint", str(tmp_path / "campaign.db"), "-c", "3", "--stats-interval", "0.2",
+    ]
+    stdout = sys.stdout
+    try:
+        assert main(argv) == 0
+        # the SDK's logs are silenced only while the run lasts
+        assert sys.stdout is stdout
+        assert gateway.delivered == 5
+        paid = chain.calls["eth_sendRawTransaction"]
+
+        assert main(argv) == 0
+        assert chain.calls["eth_sendRawTransaction"] == paid
+        assert "5/5 done: 0 delivered, 5 skipped, 0 failed" in capsys.readouterr().err
+    finally:
+        gateway.stop()
+        chain.stop()
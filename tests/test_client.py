@@ -50,3 +50,79 @@ def test_notify_flow_async(mock_post):
         res = __import__('asyncio').run(async_client.notify("chatid", "hello"))
 
     assert res == {"ok": True}
+
+
+@patch("x402_notify.client.requests.post")
+def test_idempotency_key_reuses_confirmed_payment(mock_post, tmp_path):
+    mock_post.side_effect = [
+        DummyResponse(status_code=402, json_data={"x402": {"accepts": [{"payTo": "0xAAA", "maxAmountRequired": "0.0001"}]}}),
+        DummyResponse(status_code=500, text="Telegram delivery failed"),
+        DummyResponse(status_code=200, json_data={"ok": True}),
+    ]
+
+    valid_key = "0x" + "1" * 64
+    client = NotifyClient(wallet_key=valid_key, gateway_url="http://localhost:3000",
+                          ledger_path=str(tmp_path / "ledger.db"))
+
+    with patch.object(NotifyClient, "_send_payment", return_value="0xFAKE_TX") as mock_pay:
+        with pytest.raises(Exception):
+            client.notify("chatid", "hello", idempotency_key="alert-1")
+        # Retry: no new 402 probe and no second payment
+        res = client.notify("chatid", "hello", idempotency_key="alert-1")
+        # Delivered keys short-circuit entirely
+        again = client.notify("chatid", "hello", idempotency_key="alert-1")
+
+    assert res == {"ok": True}
+    assert again == {"ok": True}
+    assert mock_pay.call_count == 1
+    assert mock_post.call_count == 3
+    assert mock_post.call_args.kwargs["headers"] == {"x-agent-payment-tx": "0xFAKE_TX"}
+
+
+def test_background_notify_returns_immediately_and_drains():
+    release = __import__("threading").Event()
+    done = []
+
+    def slow_notify(self, chat_id, message, agent_tx=None, idempotency_key=None):
+        release.wait(5)
+        return {"ok": True, "message": message}
+
+    client = NotifyClient(wallet_key="0x" + "1" * 64, executor_workers=2, max_pending=3)
+    with patch.object(NotifyClient, "_notify_sync", slow_notify):
+        futures = [client.notify("chat", f"m{i}", background=True, on_done=done.append) for i in range(3)]
+        assert not any(f.done() for f in futures)
+        assert client.pending() == 3
+        # the bounded queue is full: a fourth submission times out instead of piling up
+        with pytest.raises(RuntimeError):
+            client.notify("chat", "m3", background=True, submit_timeout=0.05)
+        assert client.drain(timeout=0.05) is False
+
+        release.set()
+        assert client.drain(timeout=5) is True
+
+    assert client.pending() == 0
+    assert sorted(f.result()["message"] for f in futures) == ["m0", "m1", "m2"]
+    assert len(done) == 3
+    client.close()
+
+
+def test_failed_fee_lookup_or_signing_leaves_no_nonce_gap():
+    from x402_notify.fees import FeeQuote
+
+    client = NotifyClient(wallet_key="0x" + "1" * 64)
+    client._next_nonce = 5
+    to = "0x" + "ab" * 20
+    with patch.object(client.fee_oracle, "gas_limit", side_effect=Exception("execution reverted")):
+        with pytest.raises(Exception):
+            client._sign_payment(to, 1)
+    assert client._next_nonce == 5
+
+    quote = FeeQuote(10**9, 10**6, None, 0.0)
+    with patch.object(client.fee_oracle, "gas_limit", return_value=21000), \
+            patch.object(client.fee_oracle, "quote", return_value=quote), \
+            patch.object(client, "_sign", side_effect=Exception("bad key")):
+        with pytest.raises(Exception):
+            client._sign_payment(to, 1)
+    # nonce 5 was handed out but never signed: resync from the chain
+    assert client._next_nonce is None
+    client.close()
@@ -0,0 +1,75 @@
+from concurrent.futures import Future
+
+from x402_notify.coalesce import CoalescingNotifier
+
+
+class FakeClient:
+    def __init__(self):
+        self.sent = []
+
+    def notify(self, chat_id, message, background=False):
+        self.sent.append((chat_id, message))
+        f = Future()
+        f.set_result({"ok": True, "n": len(self.sent)})
+        return f
+
+
+def test_burst_to_one_chat_is_sent_as_one_digest():
+    client = FakeClient()
+    notifier = CoalescingNotifier(client, window=60)
+    futures = [notifier.notify("123", f"alert {i}") for i in range(3)]
+    other = notifier.notify("456", "solo")
+    assert client.sent == []
+
+    notifier.close()
+
+    assert sorted(client.sent) == [("123", "alert 0\n\nalert 1\n\nalert 2"), ("456", "solo")]
+    results = [f.result(timeout=1) for f in futures]
+    assert results[0] == results[1] == results[2]
+    assert other.result(timeout=1)["ok"] is True
+
+
+def test_digest_respects_size_limits():
+    client = FakeClient()
+    notifier = CoalescingNotifier(client, window=60, max_messages=2, max_chars=20)
+    notifier.notify("123", "a" * 8)
+    notifier.notify("123", "b" * 8)  # hits max_messages -> sent immediately
+    notifier.notify("123", "c" * 15)
+    notifier.notify("123", "d" * 15)  # would exceed max_chars -> previous digest sent
+    notifier.notify("123", "e" * 50)  # clipped to max_chars
+    notifier.close()
+
+    assert client.sent[0] == ("123", "a" * 8 + "\n\n" + "b" * 8)
+    assert client.sent[1] == ("123", "c" * 15)
+    assert client.sent[2] == ("123", "d" * 15)
+    assert len(client.sent[3][1]) == 20
+    assert all(len(m) <= 20 for _, m in client.sent)
+
+
+def test_clipping_never_cuts_through_html():
+    client = FakeClient()
+    notifier = CoalescingNotifier(client, window=60, max_chars=20)
+    notifier.notify("123", "<b>short</b> &amp; ok")  # fits once the tags are gone
+    notifier.flush()
+    notifier.notify("123", "<b>price</b> " + "&amp;" * 10)
+    notifier.close()
+
+    assert client.sent[0] == ("123", "short &amp; ok")
+    clipped = client.sent[1][1]
+    assert len(clipped) <= 20 and "<" not in clipped
+    assert clipped == "price &amp;&amp;…"
+
+
+def test_stale_timer_does_not_flush_the_next_batch():
+    client = FakeClient()
+    notifier = CoalescingNotifier(client, window=60)
+    notifier.notify("123", "first")
+    stale = notifier._batches["123"]
+    notifier.flush("123")
+    notifier.notify("123", "second")
+    # the first batch's timer fires after it was already flushed
+    notifier._expire("123", stale)
+    assert client.sent == [("123", "first")]
+    assert notifier.pending() == 1
+    notifier.close()
+    assert client.sent[-1] == ("123", "second")
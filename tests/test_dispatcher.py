@@ -0,0 +1,100 @@
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from demo_service.dispatcher import FanoutDispatcher  # noqa: E402
+
+
+class Sink:
+    def __init__(self):
+        self.sent = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def send(self, chat_id, message):
+        self.release.wait(5)
+        if message == "boom":
+            raise RuntimeError("gateway down")
+        self.sent.append((chat_id, message))
+
+
+def test_queued_chat_keeps_only_the_newest_message():
+    sink = Sink()
+
+    async def run():
+        dispatcher = FanoutDispatcher(sink.send, workers=1, log=False)
+        dispatcher.start()
+        assert dispatcher.dispatch("m1", ["a", "b"]) == 2
+        dispatcher.submit("a", "m2")
+        assert dispatcher.stats["merged"] == 1
+        await dispatcher.stop()
+        return dispatcher
+
+    dispatcher = asyncio.run(run())
+    assert sink.sent == [("a", "m2"), ("b", "m1")]
+    assert dispatcher.stats["sent"] == 2
+
+
+def test_chat_in_flight_is_sent_again_with_its_newest_message():
+    sink = Sink()
+    sink.release.clear()
+
+    async def run():
+        dispatcher = FanoutDispatcher(sink.send, workers=2, log=False)
+        dispatcher.start()
+        dispatcher.submit("a", "first")
+        await asyncio.sleep(0.05)
+        # "a" is being sent: later alerts wait for it instead of a second worker
+        dispatcher.submit("a", "second")
+        dispatcher.submit("a", "third")
+        assert dispatcher.backlog() == 2
+        sink.release.set()
+        await dispatcher.stop()
+        return dispatcher
+
+    dispatcher = asyncio.run(run())
+    assert sink.sent == [("a", "first"), ("a", "third")]
+    assert dispatcher.stats["merged"] == 1
+
+
+def test_full_queue_drops_and_failures_are_counted():
+    sink = Sink()
+    sink.release.clear()
+
+    async def run():
+        dispatcher = FanoutDispatcher(sink.send, workers=1, max_queue=2, log=False)
+        dispatcher.start()
+        dispatcher.submit("busy", "x")
+        await asyncio.sleep(0.05)
+        assert dispatcher.dispatch("boom", ["a", "b", "c"]) == 2
+        assert dispatcher.stats["dropped"] == 1
+        sink.release.set()
+        await dispatcher.stop()
+        return dispatcher
+
+    dispatcher = asyncio.run(run())
+    assert dispatcher.stats == {"sent": 1, "failed": 2, "merged": 0, "dropped": 1}
+
+
+def test_stop_gives_up_draining_after_the_timeout(capsys):
+    sink = Sink()
+    sink.release.clear()
+
+    async def run():
+        dispatcher = FanoutDispatcher(sink.send, workers=1, log=False)
+        dispatcher.start()
+        dispatcher.dispatch("m", ["a", "b"])
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await dispatcher.stop(timeout=0.1)
+        elapsed = loop.time() - started
+        # unblock the abandoned send so the loop's thread pool can shut down
+        sink.release.set()
+        return elapsed
+
+    elapsed = asyncio.run(run())
+    assert elapsed < 1
+    assert "drain timed out with 2 chats pending" in capsys.readouterr().out
@@ -0,0 +1,125 @@
+import time
+
+import pytest
+from web3 import Web3
+
+from x402_notify.fees import FeeOracle
+
+TO = Web3.to_checksum_address("0x" + "ab" * 20)
+FROM = Web3.to_checksum_address("0x" + "cd" * 20)
+
+
+class FakeEth:
+    def __init__(self):
+        self.history_calls = 0
+        self.estimates = 0
+        self.fee_history_supported = True
+        self.down = False
+
+    def fee_history(self, count, newest, percentiles):
+        self.history_calls += 1
+        if self.down:
+            raise ConnectionError("rpc down")
+        if not self.fee_history_supported:
+            raise ValueError("method not found")
+        return {
+            "baseFeePerGas": [10**9] * count + [2 * 10**9],
+            "reward": [[5], [3 * 10**9], [2 * 10**9], [], [4 * 10**9]],
+        }
+
+    def get_block(self, ident):
+        if self.down:
+            raise ConnectionError("rpc down")
+        return {}
+
+    @property
+    def gas_price(self):
+        if self.down:
+            raise ConnectionError("rpc down")
+        return 7 * 10**9
+
+    def estimate_gas(self, tx):
+        self.estimates += 1
+        return 30000
+
+
+class FakeW3:
+    def __init__(self):
+        self.eth = FakeEth()
+
+
+def test_quote_uses_next_base_fee_and_median_priority():
+    w3 = FakeW3()
+    oracle = FeeOracle(w3, blocks=5, refresh_interval=3600)
+    try:
+        quote = oracle.quote()
+        assert quote.base_fee == 2 * 10**9
+        assert quote.priority_fee == 3 * 10**9
+        fields = quote.tx_fields(2.0, max_priority_wei=10**9)
+        assert fields == {"type": 2, "maxPriorityFeePerGas": 10**9, "maxFeePerGas": 5 * 10**9}
+        # cached: no further RPC until the background refresh
+        calls = w3.eth.history_calls
+        oracle.quote()
+        assert w3.eth.history_calls == calls
+    finally:
+        oracle.close()
+
+
+def test_legacy_chain_falls_back_to_gas_price():
+    w3 = FakeW3()
+    w3.eth.fee_history_supported = False
+    oracle = FeeOracle(w3, refresh_interval=3600)
+    try:
+        assert oracle.refresh().tx_fields(2.0) == {"gasPrice": 7 * 10**9}
+    finally:
+        oracle.close()
+
+
+def test_gas_limit_is_memoized_per_destination():
+    w3 = FakeW3()
+    oracle = FeeOracle(w3)
+    assert oracle.gas_limit(TO, 1, FROM) == 30000
+    assert oracle.gas_limit(TO.lower(), 2, FROM) == 30000
+    assert w3.eth.estimates == 1
+    assert oracle.gas_limit(FROM, 1, TO) == 30000
+    assert w3.eth.estimates == 2
+
+
+def test_shared_oracle_is_one_per_rpc_url():
+    assert FeeOracle.shared("http://127.0.0.1:1/a") is FeeOracle.shared("http://127.0.0.1:1/a")
+    assert FeeOracle.shared("http://127.0.0.1:1/a") is not FeeOracle.shared("http://127.0.0.1:1/b")
+
+
+def test_failed_refresh_keeps_last_good_quote_until_max_age():
+    w3 = FakeW3()
+    oracle = FeeOracle(w3, refresh_interval=3600, max_age=0.2)
+    try:
+        good = oracle.refresh()
+        w3.eth.down = True
+        with pytest.raises(ConnectionError):
+            oracle.refresh()
+        assert oracle.cached() is good
+        time.sleep(0.25)
+        # too old to trust and nothing fresh to replace it
+        assert oracle.cached() is None
+        with pytest.raises(ConnectionError):
+            oracle.quote()
+    finally:
+        oracle.close()
+
+
+def test_background_refresh_stops_when_idle():
+    w3 = FakeW3()
+    oracle = FeeOracle(w3, refresh_interval=0.01, idle_after=0.1)
+    try:
+        oracle.quote()
+        time.sleep(0.3)
+        assert oracle._thread is None
+        calls = w3.eth.history_calls
+        time.sleep(0.1)
+        assert w3.eth.history_calls == calls
+        # the next read starts polling again
+        oracle.quote()
+        assert oracle._thread is not None
+    finally:
+        oracle.close()
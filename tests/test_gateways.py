@@ -0,0 +1,71 @@
+from unittest.mock import patch
+
+import requests
+
+from x402_notify.client import NotifyClient
+from x402_notify.gateways import GatewayPool
+
+
+class DummyResponse:
+    def __init__(self, status_code=200, json_data=None, text=""):
+        self.status_code = status_code
+        self._json = json_data or {}
+        self.text = text
+
+    def json(self):
+        return self._json
+
+
+def _payment_required(pay_to):
+    return DummyResponse(402, {"x402": {"accepts": [{"payTo": pay_to, "maxAmountRequired": "0.0001"}]}})
+
+
+def test_pool_prefers_fast_healthy_gateways():
+    pool = GatewayPool(["http://a/", "http://b", "http://c"], down_after=2, cooldown=60)
+    pool.record_success("http://a", 0.5)
+    pool.record_success("http://b", 0.05)
+    pool.record_success("http://c", 0.1)
+    assert pool.ordered() == ["http://b", "http://c", "http://a"]
+    pool.record_failure("http://b")
+    assert pool.ordered()[0] == "http://c"
+    pool.record_failure("http://b")
+    # down: tried last until its cooldown ends or it answers again
+    assert pool.ordered() == ["http://c", "http://a", "http://b"]
+    pool.record_success("http://b", 0.05)
+    assert not any(s["down"] for s in pool.stats())
+    pool.close()
+
+
+def test_failover_never_pays_twice_or_presents_to_another_wallet():
+    presented = []
+
+    def post(url, json=None, headers=None, timeout=None):
+        gateway = url.split("/")[2]
+        if headers:
+            presented.append(gateway)
+        if gateway == "a":
+            raise requests.ConnectionError("connection refused")
+        if gateway == "d":
+            return _payment_required("0xOTHER")
+        if not headers:
+            return _payment_required("0xPAY")
+        if gateway == "b":
+            return DummyResponse(503, text="restarting")
+        return DummyResponse(200, {"ok": True, "gateway": gateway})
+
+    client = NotifyClient(
+        wallet_key="0x" + "1" * 64,
+        gateway_urls=["http://a", "http://b", "http://d", "http://c"],
+    )
+    # deterministic order for the probe: a (down), then b
+    client.gateways.record_success("http://b", 0.01)
+    client.gateways.record_success("http://d", 0.02)
+    client.gateways.record_success("http://c", 0.03)
+    with patch("x402_notify.client.requests.post", side_effect=post), \
+         patch.object(NotifyClient, "_send_payment", return_value="0xPAID") as pay:
+        res = client.notify("chatid", "hello")
+    client.close()
+
+    assert res == {"ok": True, "gateway": "c"}
+    assert pay.call_count == 1
+    assert presented == ["b", "c"]
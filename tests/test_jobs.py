@@ -0,0 +1,30 @@
+from unittest.mock import patch, MagicMock
+
+from x402_notify.jobs import wait_for_jobs
+
+
+def _stream(lines):
+    res = MagicMock()
+    res.__enter__.return_value = res
+    res.iter_lines.return_value = iter(lines)
+    return res
+
+
+@patch("x402_notify.jobs.requests.post")
+def test_wait_for_jobs_follows_event_stream(mock_post):
+    mock_post.return_value = _stream([
+        "event: job", 'data: {"job_id": "a", "status": "queued"}', "",
+        ": keepalive", "",
+        "event: job", 'data: {"job_id": "b", "status": "failed", "error": "boom"}', "",
+        "event: job", 'data: {"job_id": "a", "status": "finished", "result": {"ok": true}}', "",
+        "event: done", "data: {}", "",
+    ])
+
+    jobs = wait_for_jobs("http://localhost:8001", ["a", "b"], timeout=5)
+
+    assert jobs["a"]["status"] == "finished"
+    assert jobs["a"]["result"] == {"ok": True}
+    assert jobs["b"]["error"] == "boom"
+    # Both jobs were followed over a single connection
+    assert mock_post.call_count == 1
+    assert mock_post.call_args.kwargs["json"] == {"job_ids": ["a", "b"]}
@@ -0,0 +1,173 @@
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.fakechain import FakeChain  # noqa: E402
+from benchmarks.fakegateway import FakeGateway  # noqa: E402
+from x402_notify import NotifyClient  # noqa: E402
+from x402_notify.journal import PaymentJournal  # noqa: E402
+
+WALLET_KEY = "0x" + "4f" * 32
+
+
+class Crash(Exception):
+    pass
+
+
+def test_journal_skips_torn_line_and_compacts(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = PaymentJournal(str(path), fsync=False)
+    done = journal.start("chat", "delivered message")
+    journal.append(done, "delivered")
+    open_id = journal.start("chat", "open message")
+    journal.append(open_id, "signed", tx_hash="0xaa", nonce=3, tx={"nonce": 3})
+    with open(path, "a") as f:
+        f.write('{"id": "torn", "sta')
+
+    reopened = PaymentJournal(str(path), fsync=False)
+    [entry] = reopened.unfinished()
+    assert entry["id"] == open_id
+    assert (entry["state"], entry["tx_hashes"], entry["nonce"]) == ("signed", ["0xaa"], 3)
+    assert len(path.read_text().splitlines()) == 1
+
+
+def test_finished_entries_leave_memory_and_file_is_compacted(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = PaymentJournal(str(path), fsync=False, compact_every=3)
+    open_id = journal.start("chat", "still in flight")
+    for n in range(5):
+        entry_id = journal.start("chat", f"message {n}")
+        journal.append(entry_id, "signed", tx_hash=f"0x{n}", nonce=n, tx={"nonce": n})
+        journal.append(entry_id, "delivered")
+        assert journal.get(entry_id) is None
+
+    assert [e["id"] for e in journal.unfinished()] == [open_id]
+    # compacted after the third finished entry; the last two have 3 records each
+    assert len(path.read_text().splitlines()) == 1 + 2 * 3
+    assert [e["id"] for e in PaymentJournal(str(path), fsync=False).unfinished()] == [open_id]
+
+
+def test_restart_after_broadcast_delivers_without_paying_again(tmp_path):
+    chain = FakeChain(block_time=0.1)
+    gateway = FakeGateway(chain)
+    rpc_url = chain.start()
+    gateway_url = gateway.start()
+    journal_path = str(tmp_path / "journal.jsonl")
+    try:
+        crashing = NotifyClient(WALLET_KEY, gateway_url=gateway_url, rpc_url=rpc_url, chain_id=chain.chain_id, journal_path=journal_path)
+
+        def crash(*args, **kwargs):
+            raise Crash()
+
+        # the process dies right after broadcasting the payment
+        crashing._wait_for_inclusion = crash
+        try:
+            crashing.notify("chat", "survives a restart")
+        except Crash:
+            pass
+        crashing.close()
+        assert chain.calls["eth_sendRawTransaction"] == 1
+
+        restarted = NotifyClient(WALLET_KEY, gateway_url=gateway_url, rpc_url=rpc_url, chain_id=chain.chain_id, journal_path=journal_path)
+        [result] = restarted.recovery.result(timeout=30)
+        restarted.close()
+
+        assert result["success"]
+        assert gateway.delivered == 1
+        assert "survives a restart" in gateway.delivered_at
+        # the journaled tx was re-broadcast, never replaced by a second payment
+        assert int(chain.handle("eth_getTransactionCount", [restarted.wallet_address, "latest"]), 16) == 1
+        assert restarted.journal.unfinished() == []
+    finally:
+        gateway.stop()
+        chain.stop()
+
+
+def test_new_payments_skip_nonces_of_journaled_payments(tmp_path, monkeypatch):
+    chain = FakeChain(block_time=0.1)
+    gateway = FakeGateway(chain)
+    rpc_url = chain.start()
+    gateway_url = gateway.start()
+    journal_path = str(tmp_path / "journal.jsonl")
+    try:
+        crashing = NotifyClient(WALLET_KEY, gateway_url=gateway_url, rpc_url=rpc_url, chain_id=chain.chain_id, journal_path=journal_path)
+        append = crashing.journal.append
+
+        def crash_after_signing(entry_id, state, **fields):
+            append(entry_id, state, **fields)
+            if state == "signed":
+                raise Crash()
+
+        # the process dies after journaling the signed payment, before the node saw it
+        crashing.journal.append = crash_after_signing
+        try:
+            crashing.notify("chat", "signed before the crash")
+        except Crash:
+            pass
+        crashing.close()
+        assert chain.calls.get("eth_sendRawTransaction", 0) == 0
+
+        release = threading.Event()
+        recover_pending = NotifyClient.recover_pending
+
+        def held_recovery(self):
+            release.wait(10)
+            return recover_pending(self)
+
+        monkeypatch.setattr(NotifyClient, "recover_pending", held_recovery)
+        restarted = NotifyClient(WALLET_KEY, gateway_url=gateway_url, rpc_url=rpc_url, chain_id=chain.chain_id, journal_path=journal_path)
+        # recovery has not re-broadcast nonce 0 yet, so the node still reports 0
+        assert restarted._allocate_nonce() == 1
+        restarted._reset_nonce()
+        release.set()
+        [result] = restarted.recovery.result(timeout=30)
+        assert result["success"]
+        assert restarted.notify("chat", "paid after the restart", background=False)["success"]
+        restarted.close()
+
+        assert gateway.delivered == 2
+        assert int(chain.handle("eth_getTransactionCount", [restarted.wallet_address, "latest"]), 16) == 2
+    finally:
+        gateway.stop()
+        chain.stop()
+
+
+def test_ledger_retry_closes_journal_entry(tmp_path):
+    chain = FakeChain(block_time=0.1)
+    gateway = FakeGateway(chain)
+    rpc_url = chain.start()
+    gateway_url = gateway.start()
+    try:
+        client = NotifyClient(
+            WALLET_KEY, gateway_url=gateway_url, rpc_url=rpc_url, chain_id=chain.chain_id,
+            journal_path=str(tmp_path / "journal.jsonl"), ledger_path=str(tmp_path / "ledger.db"),
+        )
+        post_notify = client._post_notify
+        outage = MagicMock(status_code=503, text="gateway restarting")
+
+        def paid_delivery_fails_once(payload, headers, gateways):
+            if headers and not outage.called:
+                outage()
+                return gateway_url, outage
+            return post_notify(payload, headers, gateways)
+
+        client._post_notify = paid_delivery_fails_once
+        try:
+            client.notify("chat", "paid once", background=False, idempotency_key="k1")
+        except Exception:
+            pass
+        assert [e["state"] for e in client.journal.unfinished()] == ["mined"]
+
+        # the retry reuses the ledger's payment and must close the journaled one
+        assert client.notify("chat", "paid once", background=False, idempotency_key="k1")["success"]
+        client.close()
+
+        assert client.journal.unfinished() == []
+        assert gateway.delivered == 1
+        assert chain.calls["eth_sendRawTransaction"] == 1
+    finally:
+        gateway.stop()
+        chain.stop()
@@ -0,0 +1,81 @@
+from eth_account import Account
+from web3 import Web3
+
+from x402_notify.fees import FeeQuote
+from x402_notify.presign import PresignedPool
+
+PAY_TO = Web3.to_checksum_address("0x" + "a" * 40)
+
+
+class FakeEth:
+    def __init__(self):
+        self.base_fee = 10**9
+        self.nonce = 7
+
+    def get_block(self, ident):
+        return {"baseFeePerGas": self.base_fee}
+
+    def get_transaction_count(self, address, block="latest"):
+        return self.nonce
+
+    def estimate_gas(self, tx):
+        return 21000
+
+
+class FakeW3:
+    to_wei = staticmethod(Web3.to_wei)
+    to_hex = staticmethod(Web3.to_hex)
+
+    def __init__(self):
+        self.eth = FakeEth()
+
+
+def test_pool_signs_sequential_nonces_and_refreshes_fees():
+    w3 = FakeW3()
+    pool = PresignedPool(w3, Account.from_key("0x" + "1" * 64), 84532, size=3, refresh_interval=3600)
+    try:
+        first = pool.acquire(PAY_TO, 100)  # cold: signed on the spot
+        assert first.nonce == 7
+        pool.refill()
+        assert pool.ready() == 3
+        assert [pool.acquire(PAY_TO, 100).nonce for _ in range(2)] == [8, 9]
+
+        # base fee doubles: the remaining pooled tx is re-signed with the same nonce
+        w3.eth.base_fee *= 2
+        pool.refill()
+        ptx = pool.acquire(PAY_TO, 100)
+        assert ptx.nonce == 10
+        assert ptx.tx["maxFeePerGas"] == int(2 * 10**9 * 2.0 + Web3.to_wei(2, "gwei"))
+
+        # a different payTo drops unbroadcast txs and reuses their nonces
+        pool.refill()
+        assert pool.acquire(Web3.to_checksum_address("0x" + "b" * 40), 100).nonce == 11
+    finally:
+        pool.close()
+
+
+class FakeOracle:
+    def __init__(self, quote):
+        self._quote = quote
+
+    def quote(self):
+        return self._quote
+
+    def gas_limit(self, to_address, value, sender):
+        return 21000
+
+
+def test_pool_takes_oracle_fees_with_its_priority_cap():
+    w3 = FakeW3()
+    oracle = FakeOracle(FeeQuote(10**9, Web3.to_wei(5, "gwei"), None, 0.0))
+    pool = PresignedPool(w3, Account.from_key("0x" + "1" * 64), 84532, size=1, refresh_interval=3600, fee_oracle=oracle)
+    try:
+        tx = pool.acquire(PAY_TO, 100).tx
+        assert tx["maxPriorityFeePerGas"] == Web3.to_wei(2, "gwei")
+        assert tx["maxFeePerGas"] == int(10**9 * 2.0 + Web3.to_wei(2, "gwei"))
+
+        # legacy chain: no base fee, the oracle's gas price
+        oracle._quote = FeeQuote(None, 0, Web3.to_wei(3, "gwei"), 0.0)
+        assert pool._fee_fields(None) == {"gasPrice": Web3.to_wei(3, "gwei")}
+    finally:
+        pool.close()
@@ -0,0 +1,64 @@
+import threading
+from collections import Counter
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from x402_notify.agent_server import create_agent_app
+from x402_notify.priority import PriorityExecutor, WeightedLanes
+
+
+VALID_KEY = "0x" + "1" * 64
+
+
+def test_weighted_lanes_share_and_urgent_goes_next():
+    lanes = WeightedLanes()
+    picks = Counter(lanes.pick(["high", "normal", "low"]) for _ in range(120))
+    assert picks == {"high": 80, "normal": 30, "low": 10}
+
+    # a bulk backlog is being served when an alert arrives: the alert is next
+    lanes = WeightedLanes()
+    for _ in range(7):
+        lanes.pick(["normal", "low"])
+    assert lanes.pick(["high", "normal", "low"]) == "high"
+
+
+def test_priority_executor_runs_alert_before_queued_bulk():
+    executor = PriorityExecutor(workers=1)
+    gate = threading.Event()
+    order = []
+    executor.submit("low", gate.wait)
+    futures = [executor.submit("low", order.append, f"bulk {i}") for i in range(20)]
+    futures.append(executor.submit("high", order.append, "alert"))
+    gate.set()
+    for f in futures:
+        f.result(timeout=5)
+    executor.shutdown()
+    assert order[0] == "alert"
+
+
+def test_urgent_worker_serves_alerts_while_shared_workers_are_busy():
+    executor = PriorityExecutor(workers=1, urgent_workers=1)
+    gate = threading.Event()
+    executor.submit("normal", gate.wait)
+    executor.submit("normal", gate.wait)
+    assert executor.submit("high", lambda: "sent").result(timeout=5) == "sent"
+    assert executor.depths()["high"] == 0
+    gate.set()
+    executor.shutdown()
+
+
+@patch("x402_notify.agent_server.NotifyClient")
+def test_send_accepts_priority(mock_client, tmp_path):
+    sent = threading.Event()
+    mock_client.return_value.notify.side_effect = lambda chat_id, message: sent.set()
+    app = create_agent_app(VALID_KEY, db_path=str(tmp_path / "agent.db"))
+    http = TestClient(app)
+    http.post("/subscribe", json={"user_id": "alice", "chat_id": "123"})
+
+    res = http.post("/send/alice", json={"message": "wallet drained", "priority": "high"})
+    assert res.json() == {"ok": True, "status": "queued", "priority": "high"}
+    assert sent.wait(5)
+    mock_client.return_value.notify.assert_called_with("123", "wallet drained")
+
+    assert http.post("/send/alice", json={"message": "hi", "priority": "asap"}).status_code == 422
@@ -0,0 +1,191 @@
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from x402_notify.jobs import wait_for_job
+from x402_notify.queue import enqueue_notify, run_notify_job
+from x402_notify.sqlite_queue import SQLiteQueue, work
+
+
+VALID_KEY = "0x" + "1" * 64
+
+
+def _enqueue(db_url, message="hello", ledger_path=None):
+    return enqueue_notify(
+        redis_url=db_url,
+        wallet_key=VALID_KEY,
+        gateway_url="http://localhost:3000",
+        rpc_url="http://localhost:8545",
+        chain_id=84532,
+        chat_id="chatid",
+        message=message,
+        ledger_path=ledger_path,
+    )
+
+
+def test_sqlite_queue_claim_is_exclusive_and_lease_expires(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    job_id = _enqueue(f"sqlite:///{db_path}", ledger_path=str(tmp_path / "ledger.db"))
+
+    q = SQLiteQueue(db_path, visibility_timeout=0.05)
+    job = q.claim()
+    assert job["job_id"] == job_id
+    assert job["kwargs"]["message"] == "hello"
+    # Claimed jobs are invisible to other workers until the lease expires
+    assert q.claim() is None
+
+    time.sleep(0.1)
+    reclaimed = q.claim()
+    assert reclaimed["job_id"] == job_id
+    assert reclaimed["attempts"] == 2
+    # The first worker lost its lease and can no longer complete the job
+    assert q.complete(job_id, job["token"], {"ok": True}) is False
+    assert q.complete(job_id, reclaimed["token"], {"ok": True}) is True
+    assert q.get(job_id)["status"] == "finished"
+
+
+@patch("x402_notify.sqlite_queue.run_notify_job")
+def test_sqlite_queue_worker_runs_and_retries(mock_run, tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    ledger = str(tmp_path / "ledger.db")
+    ok_id = _enqueue(f"sqlite:///{db_path}", "ok", ledger)
+    bad_id = _enqueue(f"sqlite:///{db_path}", "bad", ledger)
+
+    def _run(job_id, **kwargs):
+        if kwargs["message"] == "bad":
+            raise Exception("gateway down")
+        return {"ok": True}
+
+    mock_run.side_effect = _run
+
+    processed = work(db_path, burst=True, max_attempts=2, retry_delay=0)
+    assert processed == 3
+
+    q = SQLiteQueue(db_path)
+    assert q.get(ok_id)["result"] == {"ok": True}
+    failed = q.get(bad_id)
+    assert failed["status"] == "failed"
+    assert failed["attempts"] == 2
+    assert failed["error"] == "gateway down"
+
+
+@patch("x402_notify.sqlite_queue.run_notify_job")
+def test_sqlite_queue_does_not_retry_jobs_without_ledger(mock_run, tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    job_id = _enqueue(f"sqlite:///{db_path}", "bad")
+    mock_run.side_effect = Exception("Delivery failed after payment: bot blocked")
+
+    assert work(db_path, burst=True, max_attempts=3, retry_delay=0) == 1
+    failed = SQLiteQueue(db_path).get(job_id)
+    assert failed["status"] == "failed"
+    assert failed["attempts"] == 1
+
+
+def test_sqlite_queue_expired_lease_without_ledger_fails(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    plain = _enqueue(f"sqlite:///{db_path}", "plain")
+    ledgered = _enqueue(f"sqlite:///{db_path}", "ledgered", str(tmp_path / "ledger.db"))
+
+    q = SQLiteQueue(db_path, visibility_timeout=0.05)
+    q.claim()
+    q.claim()
+    time.sleep(0.1)
+    # the worker may have paid before dying: only the ledgered job is reclaimed
+    assert q.claim()["job_id"] == ledgered
+    assert q.get(plain)["status"] == "failed"
+
+
+def test_sqlite_queue_claims_high_priority_first(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    q = SQLiteQueue(db_path)
+    for i in range(5):
+        q.enqueue(f"bulk-{i}", {"message": f"bulk {i}"}, priority="low")
+    alert = enqueue_notify(
+        redis_url=None,
+        backend=q,
+        wallet_key=VALID_KEY,
+        gateway_url="http://localhost:3000",
+        rpc_url="http://localhost:8545",
+        chain_id=84532,
+        chat_id="chatid",
+        message="wallet drained",
+        priority="high",
+    )
+
+    assert q.claim()["job_id"] == alert
+    assert q.get(alert)["priority"] == "high"
+    assert [q.claim()["job_id"] for _ in range(5)] == [f"bulk-{i}" for i in range(5)]
+
+
+def test_old_database_gains_priority_column_once(tmp_path):
+    import sqlite3
+    import threading
+
+    db_path = str(tmp_path / "jobs.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT UNIQUE NOT NULL, queue TEXT NOT NULL,"
+        " status TEXT NOT NULL, kwargs TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, token TEXT, lease_until REAL,"
+        " available_at REAL NOT NULL, result TEXT, error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+    )
+    conn.execute(
+        "INSERT INTO jobs (job_id, queue, status, kwargs, available_at, created_at, updated_at)"
+        " VALUES ('old', 'default', 'queued', '{}', 0, 0, 0)"
+    )
+    conn.commit()
+    conn.close()
+
+    errors = []
+
+    def open_queue():
+        try:
+            SQLiteQueue(db_path).close()
+        except Exception as e:
+            errors.append(e)
+
+    # several workers starting together on the same old database
+    threads = [threading.Thread(target=open_queue) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert SQLiteQueue(db_path).get("old")["priority"] == "normal"
+
+
+@patch("x402_notify.queue._worker_client")
+def test_failed_job_wakes_waiter(mock_client):
+    mock_client.return_value.notify.side_effect = Exception("gateway down")
+    updates = []
+
+    def _post(url, **kwargs):
+        if url.endswith("/update"):
+            updates.append({"job_id": url.split("/")[-2], **kwargs["json"]})
+            return MagicMock()
+        # /jobs/events replays the updates the worker sent
+        res = MagicMock()
+        res.__enter__.return_value = res
+        res.iter_lines.return_value = iter(
+            line for update in updates for line in ("event: job", "data: " + json.dumps(update), "")
+        )
+        return res
+
+    with patch("requests.post", side_effect=_post):
+        with pytest.raises(Exception, match="gateway down"):
+            run_notify_job(
+                "job-1",
+                wallet_key=VALID_KEY,
+                gateway_url="http://localhost:3000",
+                rpc_url="http://localhost:8545",
+                chain_id=84532,
+                chat_id="chatid",
+                message="hello",
+                callback_url="http://localhost:8001",
+            )
+        job = wait_for_job("http://localhost:8001", "job-1", timeout=5)
+
+    assert [u["status"] for u in updates] == ["running", "failed"]
+    assert job["status"] == "failed"
+    assert job["error"] == "gateway down"
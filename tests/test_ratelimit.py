@@ -0,0 +1,67 @@
+import asyncio
+import threading
+import time
+
+from x402_notify.ratelimit import RateScheduler
+
+
+def test_per_chat_limit_and_timeout():
+    limiter = RateScheduler(per_chat_rate=2.0, per_chat_burst=1, global_rate=1000, global_burst=1000)
+    assert limiter.acquire("123", timeout=0)
+    # second message for the same chat must wait ~0.5s
+    assert not limiter.acquire("123", timeout=0.05)
+    assert limiter.queued() == 0
+    # another chat is not affected
+    assert limiter.acquire("456", timeout=0)
+    start = time.monotonic()
+    assert limiter.acquire("123", timeout=2)
+    assert time.monotonic() - start >= 0.3
+
+
+def test_global_tokens_are_shared_round_robin():
+    limiter = RateScheduler(per_chat_rate=1000, per_chat_burst=1000, global_rate=20, global_burst=1)
+    assert limiter.acquire("warmup")
+    order = []
+    lock = threading.Lock()
+
+    def send(chat_id):
+        limiter.acquire(chat_id, timeout=5)
+        with lock:
+            order.append(chat_id)
+
+    # one busy chat queues 4 messages before a quiet chat queues 1
+    threads = [threading.Thread(target=send, args=("busy",)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    time.sleep(0.02)
+    quiet = threading.Thread(target=send, args=("quiet",))
+    quiet.start()
+    for t in threads + [quiet]:
+        t.join()
+
+    assert len(order) == 5
+    assert order.index("quiet") <= 2
+
+
+def test_async_waiters_use_no_threads_and_cancellation_returns_the_token():
+    limiter = RateScheduler(per_chat_rate=5.0, per_chat_burst=1, global_rate=1000, global_burst=1000)
+
+    async def run():
+        assert await limiter.acquire_async("123", timeout=0)
+        threads = threading.active_count()
+        waiters = [asyncio.ensure_future(limiter.acquire_async("123", timeout=5)) for _ in range(50)]
+        await asyncio.sleep(0.05)
+        assert limiter.queued() == 50
+        assert threading.active_count() == threads
+
+        for w in waiters[1:]:
+            w.cancel()
+        await asyncio.gather(*waiters[1:], return_exceptions=True)
+        assert limiter.queued() == 1
+        # the remaining waiter gets the next token (~0.2s)
+        assert await waiters[0]
+        assert limiter.queued() == 0
+        # nothing was consumed by the cancelled waiters
+        assert await limiter.acquire_async("123", timeout=0.3)
+
+    asyncio.run(run())
@@ -0,0 +1,70 @@
+from eth_account import Account
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+
+from x402_notify.client import NotifyClient
+from x402_notify.replacement import bump_fees
+
+GWEI = 10**9
+TX = {
+    "to": Web3.to_checksum_address("0x" + "a" * 40),
+    "value": 100,
+    "gas": 21000,
+    "nonce": 3,
+    "chainId": 84532,
+    "type": 2,
+    "maxPriorityFeePerGas": 2 * GWEI,
+    "maxFeePerGas": 10 * GWEI,
+}
+
+
+def test_bump_fees_respects_ceiling():
+    bumped = bump_fees(TX, 1.25, 100 * GWEI)
+    assert bumped["nonce"] == 3
+    assert bumped["maxFeePerGas"] > 12 * GWEI
+    assert bumped["maxPriorityFeePerGas"] > 2.5 * GWEI
+    # capped, and refused once the cap leaves less than the 10% nodes require
+    assert bump_fees(TX, 2.0, 15 * GWEI)["maxFeePerGas"] == 15 * GWEI
+    assert bump_fees(TX, 2.0, 10.5 * GWEI) is None
+
+
+class FakeEth:
+    account = Account
+
+    def __init__(self):
+        self.head = 100
+        self.sent = []
+
+    @property
+    def block_number(self):
+        # a new block on every poll
+        self.head += 1
+        return self.head
+
+    def send_raw_transaction(self, raw):
+        self.sent.append(raw)
+        return Web3.keccak(raw)
+
+    def get_transaction_receipt(self, tx_hash):
+        # the original never lands
+        if len(self.sent) and tx_hash == Web3.to_hex(Web3.keccak(self.sent[-1])):
+            return {"status": 1, "blockNumber": self.head}
+        raise TransactionNotFound("not found")
+
+
+class FakeW3:
+    to_wei = staticmethod(Web3.to_wei)
+    to_hex = staticmethod(Web3.to_hex)
+
+    def __init__(self):
+        self.eth = FakeEth()
+
+
+def test_stuck_payment_is_replaced_and_landed_hash_returned():
+    client = NotifyClient(wallet_key="0x" + "1" * 64, receipt_poll_interval=0, stuck_after_blocks=3)
+    client.w3 = FakeW3()
+    landed, receipt = client._wait_for_inclusion(TX, "0x" + "00" * 32)
+    assert len(client.w3.eth.sent) == 1
+    assert landed == Web3.to_hex(Web3.keccak(client.w3.eth.sent[0]))
+    assert receipt["status"] == 1
+    client.close()
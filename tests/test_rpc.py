@@ -0,0 +1,78 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from eth_account import Account  # noqa: E402
+from web3 import AsyncWeb3, Web3  # noqa: E402
+
+from benchmarks.fakechain import FakeChain  # noqa: E402
+from x402_notify.rpc import AsyncMultiHTTPProvider, MultiHTTPProvider  # noqa: E402
+
+
+def _chains():
+    slow, fast = FakeChain(block_time=0.2, latency=0.4), FakeChain(block_time=0.2)
+    return slow, fast, [slow.start(), fast.start()]
+
+
+def test_slow_endpoint_is_hedged_and_then_avoided():
+    slow, fast, urls = _chains()
+    seen = []
+    try:
+        provider = MultiHTTPProvider(urls, hedge_after=0.05, on_request=lambda m, url, latency, ok: seen.append(url))
+        w3 = Web3(provider)
+        # first call: slow is unmeasured and tried first, the hedge to fast wins
+        assert w3.eth.chain_id == fast.chain_id
+        first = {s["url"]: s for s in provider.stats()}
+        assert first[urls[1]]["hedges"] == 1 and first[urls[1]]["wins"] == 1
+        w3.eth.get_transaction_count("0x" + "11" * 20)
+        w3.eth.get_transaction_count("0x" + "22" * 20)
+        assert fast.calls["eth_getTransactionCount"] == 2
+        assert urls[1] in seen
+        provider.close()
+    finally:
+        slow.stop()
+        fast.stop()
+
+
+def test_time_queued_behind_other_calls_does_not_trigger_hedges():
+    chains = [FakeChain(block_time=0.2), FakeChain(block_time=0.2)]
+    urls = [c.start() for c in chains]
+    try:
+        provider = MultiHTTPProvider(urls, hedge_after=0.1)
+        busy = [provider._executor.submit(time.sleep, 0.3) for _ in range(provider._executor._max_workers)]
+        assert Web3(provider).eth.chain_id == chains[0].chain_id
+        assert all(s["hedges"] == 0 for s in provider.stats())
+        for f in busy:
+            f.result()
+        provider.close()
+    finally:
+        for c in chains:
+            c.stop()
+
+
+def test_raw_transactions_are_broadcast_to_every_endpoint():
+    slow, fast, urls = _chains()
+    try:
+        account = Account.from_key("0x" + "33" * 32)
+        tx = {"to": Web3.to_checksum_address("0x" + "44" * 20), "value": 1, "gas": 21000, "nonce": 0,
+              "chainId": fast.chain_id, "maxFeePerGas": 10**9, "maxPriorityFeePerGas": 10**6}
+        raw = account.sign_transaction(tx).raw_transaction
+
+        async def send():
+            provider = AsyncMultiHTTPProvider(urls)
+            w3 = AsyncWeb3(provider)
+            tx_hash = await w3.eth.send_raw_transaction(raw)
+            # let the slower endpoint finish propagating
+            await asyncio.sleep(0.6)
+            await provider.disconnect()
+            return tx_hash
+
+        tx_hash = asyncio.run(send())
+        assert slow.transaction(tx_hash.to_0x_hex()) is not None
+        assert fast.transaction(tx_hash.to_0x_hex()) is not None
+    finally:
+        slow.stop()
+        fast.stop()
@@ -0,0 +1,35 @@
+import asyncio
+
+from web3 import Web3
+
+from x402_notify.signing import BatchSigner, sign_transaction
+
+KEY = "0x" + "22" * 32
+TO = Web3.to_checksum_address("0x" + "ab" * 20)
+
+
+def _tx(nonce: int) -> dict:
+    return {"to": TO, "value": 1, "gas": 21000, "nonce": nonce, "chainId": 84532, "gasPrice": 10**9}
+
+
+def test_batch_signer_coalesces_concurrent_requests():
+    async def run():
+        signer = BatchSigner(KEY, max_batch=8, max_delay=0.01)
+        raws = await asyncio.gather(*(signer.sign(_tx(i)) for i in range(10)))
+        return signer, raws
+
+    signer, raws = asyncio.run(run())
+    assert raws == [sign_transaction(_tx(i), KEY) for i in range(10)]
+    # 8 hit max_batch, the remaining 2 were flushed by the timer
+    assert signer.batches == 2
+
+
+def test_batch_signer_fails_only_the_bad_transaction():
+    async def run():
+        signer = BatchSigner(KEY, max_delay=0.01)
+        bad = dict(_tx(1), to="not an address")
+        return await asyncio.gather(signer.sign(_tx(0)), signer.sign(bad), return_exceptions=True)
+
+    good, bad = asyncio.run(run())
+    assert good == sign_transaction(_tx(0), KEY)
+    assert isinstance(bad, Exception)
@@ -0,0 +1,52 @@
+from unittest.mock import patch
+
+from x402_notify import InsufficientFunds
+from x402_notify.client import NotifyClient
+from x402_notify.stats import NotifyStats, failure_reason
+
+
+class DummyResponse:
+    def __init__(self, status_code=200, json_data=None):
+        self.status_code = status_code
+        self._json = json_data or {}
+
+    def json(self):
+        return self._json
+
+    def raise_for_status(self):
+        pass
+
+
+def test_aggregates_spend_failures_and_latency():
+    stats = NotifyStats()
+    for latency in (0.1, 0.2, 0.3, 0.4):
+        stats.record_sent(latency)
+    stats.record_payment(10**14, 21000, 21000 * 10**9)
+    stats.record_failure(InsufficientFunds(2, 1))
+    stats.record_failure(Exception("Delivery failed after payment: boom"))
+    stats.record_failure(Exception("Delivery failed using agent_tx: 500"))
+
+    snap = stats.snapshot()
+    assert (snap["sent"], snap["failed"], snap["payments"], snap["gas_used"]) == (4, 3, 1, 21000)
+    assert snap["failures"] == {"insufficient_funds": 1, "delivery_failed": 2}
+    assert snap["eth_spent"] == "0.000121"
+    assert snap["latency"]["p50"] == 0.3 and snap["latency"]["p99"] == 0.4
+
+
+def test_failure_reason_falls_back_to_exception_type():
+    assert failure_reason(ValueError("x")) == "ValueError"
+    assert failure_reason(Exception("Payment not confirmed within 120s")) == "confirmation_timeout"
+
+
+@patch("x402_notify.client.requests.get")
+def test_get_stats_is_local_and_remote_merge_is_cached(mock_get):
+    mock_get.return_value = DummyResponse(json_data={"delivered": 7})
+    client = NotifyClient(wallet_key="0x" + "1" * 64, remote_stats_interval=3600)
+    assert client.get_stats()["sent"] == 0
+    assert mock_get.call_count == 0
+
+    first = client.get_stats(remote=True)
+    second = client.get_stats(remote=True)
+    client.close()
+    assert first["remote"] == second["remote"] == {"delivered": 7}
+    assert mock_get.call_count == 1
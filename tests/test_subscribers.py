@@ -0,0 +1,93 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from demo_service.subscribers import SubscriberStore  # noqa: E402
+
+
+def _ops(seed, n=20000, universe=3000):
+    rng = random.Random(seed)
+    for _ in range(n):
+        # small universe: lots of re-adds onto tombstones; include 0 and negative ids
+        yield rng.random() < 0.6, rng.randrange(-universe // 2, universe // 2)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_store_matches_a_set_under_random_adds_and_removes(seed):
+    store, expected = SubscriberStore(), set()
+    for add, chat_id in _ops(seed):
+        if add:
+            assert store.add(chat_id) == (chat_id not in expected)
+            expected.add(chat_id)
+        else:
+            assert store.discard(chat_id) == (chat_id in expected)
+            expected.discard(chat_id)
+        assert len(store) == len(expected)
+    assert sorted(int(c) for c in store) == sorted(expected)
+    assert all(c in store for c in expected)
+    assert not any(c in store for c in range(5000, 5100))
+    # growth and removal never leave the index without empty slots to end a probe
+    assert store._used * 2 <= len(store._slots)
+
+
+def test_reload_from_snapshot_plus_log_is_identical(tmp_path):
+    store = SubscriberStore(str(tmp_path), snapshot_every=700)
+    expected = set()
+    for add, chat_id in _ops(3, n=5000):
+        (store.add if add else store.discard)(chat_id)
+        (expected.add if add else expected.discard)(chat_id)
+    # records since the last snapshot are only in the log
+    assert store._log_records > 0
+    ids = list(store)
+
+    reloaded = SubscriberStore(str(tmp_path))
+    assert list(reloaded) == ids
+    assert set(int(c) for c in reloaded) == expected
+    # both behave the same from here on
+    for add, chat_id in _ops(4, n=500):
+        if add:
+            assert reloaded.add(chat_id) == store.add(chat_id)
+        else:
+            assert reloaded.discard(chat_id) == store.discard(chat_id)
+    assert list(reloaded) == list(store)
+    store.close()
+    reloaded.close()
+
+    # after close the snapshot alone holds everything
+    assert list(SubscriberStore(str(tmp_path))) == list(reloaded)
+
+
+def test_torn_log_record_is_ignored(tmp_path):
+    store = SubscriberStore(str(tmp_path))
+    store.add(42)
+    store.add("-100123")
+    store._log.write(b"\x01\x02\x03")
+    store._log.flush()
+
+    reloaded = SubscriberStore(str(tmp_path))
+    assert sorted(reloaded) == ["-100123", "42"]
+    with pytest.raises(ValueError):
+        reloaded.add("not-a-chat")
+
+
+def test_restored_subscribers_get_both_default_rules(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEMO_SUBSCRIBERS_DIR", "")
+    from demo_service.alerts import AlertEngine
+    from demo_service.app import restore_default_rules
+
+    store = SubscriberStore(str(tmp_path))
+    store.add(1)
+    store.add(-2)
+    store.close()
+
+    reopened = SubscriberStore(str(tmp_path))
+    engine = AlertEngine()
+    engine.add_rule("1", 5000, "above")  # already has a rule: left alone
+    assert restore_default_rules(reopened, engine) == 1
+    assert [(r["threshold"], r["direction"]) for r in engine.rules_for("-2")] == [(4000.0, "above"), (3000.0, "below")]
+    assert [(r["threshold"], r["direction"]) for r in engine.rules_for("1")] == [(5000.0, "above")]
+    reopened.close()